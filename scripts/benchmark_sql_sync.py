@@ -0,0 +1,98 @@
+"""
+Benchmark de exportación/importación/sincronización SQL sobre SQLite
+No requiere SQL Server: usa un libro Excel temporal y una base SQLite local
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+# Permitir ejecutar el script desde la raíz del proyecto
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.excel_manager import ExcelManager, VALID_ALERT_TYPES, VALID_CONDITIONS
+from src.data.sql_manager import SQLManager
+
+
+def generate_alerts(count: int, seed: int = 42) -> pd.DataFrame:
+    """Genera alertas sintéticas con la estructura del Excel"""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    rows = []
+    
+    for i in range(count):
+        fecha = start + timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 5))
+        rows.append({
+            "FechaHora": fecha.strftime("%d/%m/%Y %H:%M:%S"),
+            "TipoAlerta": rng.choice(VALID_ALERT_TYPES),
+            "Condicion": rng.choice(VALID_CONDITIONS),
+            "Ubicacion": f"B{rng.randint(4000, 4200)} Fase {rng.choice('NSEW')}",
+            "VelocidadMmDia": f"{rng.uniform(0, 120):.1f}",
+            "Respaldo": "",
+            "Colapso": rng.choice(["Sí", "No"]),
+            "FechaHoraColapso": "",
+            "Evacuacion": rng.choice(["Sí", "No"]),
+            "CronologiaAnalisis": f"Análisis sintético {i}",
+            "Observaciones": f"Observación sintética {i}",
+            "Usuario": f"usuario{rng.randint(1, 15)}",
+            "FechaRegistro": fecha.strftime("%d/%m/%Y %H:%M:%S"),
+            "HojaOrigen": "Benchmark"
+        })
+        
+    return pd.DataFrame(rows)
+
+
+def timed(label: str, func):
+    """Ejecuta una función y muestra su duración"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ {label}: {elapsed:.3f} s -> {result}")
+    return elapsed
+
+
+def run_benchmark(rows: int, database: str):
+    """Ejecuta el benchmark completo"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        excel_path = Path(tmp_dir) / "benchmark_alertas.xlsx"
+        excel_manager = ExcelManager(str(excel_path))
+        
+        print(f"📝 Generando {rows} alertas sintéticas...")
+        excel_manager._save_formatted_excel(generate_alerts(rows))
+        
+        sql_manager = SQLManager.sqlite(database, excel_manager=excel_manager)
+        
+        print(f"🗄️ Base SQLite: {database}")
+        export_time = timed("Exportar a SQL", sql_manager.export_to_sql)
+        timed("Exportar sin cambios", sql_manager.export_to_sql)
+        timed("Importar desde SQL", sql_manager.import_from_sql)
+        timed("Sincronización bidireccional", sql_manager.sync_bidirectional)
+        timed("Estadísticas SQL", lambda: sql_manager.get_sql_statistics().get('total_records'))
+        
+        query = ("SELECT TipoAlerta, Condicion, COUNT(*) AS total FROM alertas_geotecnicas "
+                 "GROUP BY TipoAlerta, Condicion")
+        timed("Consulta personalizada", lambda: sql_manager.execute_custom_query(query)[1])
+        timed("Consulta personalizada (caché)", lambda: sql_manager.execute_custom_query(query)[1])
+        
+        if export_time > 0:
+            print(f"📊 Throughput de exportación: {rows / export_time:,.0f} filas/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de sincronización Excel <-> SQLite")
+    parser.add_argument("--rows", type=int, default=5000, help="Cantidad de alertas sintéticas")
+    parser.add_argument("--database", default=":memory:",
+                        help="Archivo SQLite (por defecto, base en memoria)")
+    args = parser.parse_args()
+    
+    run_benchmark(args.rows, args.database)
+
+
+if __name__ == "__main__":
+    main()
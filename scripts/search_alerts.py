@@ -0,0 +1,54 @@
+"""
+Búsqueda de texto completo en las alertas desde la línea de comandos
+Usa el mismo índice que el visor de datos (se actualiza antes de consultar)
+
+Ejemplos:
+    python scripts/search_alerts.py grieta radar
+    python scripts/search_alerts.py '"sector norte" OR desliz*'
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Permitir ejecutar el script desde la raíz del proyecto
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.excel_manager import ExcelManager
+from src.data.search_index import SearchIndex, alert_ids_for
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda de texto completo en alertas geotécnicas")
+    parser.add_argument("query", nargs="+", help="Términos, \"frases\", prefijos* y OR")
+    parser.add_argument("--excel", default="data/alertas_geotecnicas.xlsx", help="Archivo Excel de alertas")
+    parser.add_argument("--limit", type=int, default=20, help="Máximo de resultados a mostrar")
+    args = parser.parse_args()
+    
+    excel_manager = ExcelManager(args.excel)
+    df = excel_manager.load_data()
+    
+    start = time.perf_counter()
+    index = SearchIndex.for_excel(excel_manager)
+    added, updated, removed = index.update_from_frame(df)
+    index.save()
+    print(f"🔎 Índice: {len(index)} alertas ({added} nuevas, {updated} actualizadas, "
+          f"{removed} eliminadas) en {time.perf_counter() - start:.3f} s")
+          
+    query = " ".join(args.query)
+    start = time.perf_counter()
+    matches = index.search(query)
+    elapsed = time.perf_counter() - start
+    
+    results = df[alert_ids_for(df).isin(matches)]
+    print(f"✅ {len(results)} alertas para '{query}' ({elapsed * 1000:.1f} ms)")
+    
+    for _, row in results.head(args.limit).iterrows():
+        observaciones = str(row.get('Observaciones', ''))[:80]
+        print(f"- {row.get('FechaHora', '')} | {row.get('TipoAlerta', '')} | "
+              f"{row.get('Ubicacion', '')} | {observaciones}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Cubo de agregados del Dashboard
+Conteos de alertas por combinación de (Año, Mes, TipoAlerta, Condicion, Usuario,
+Ubicacion) más un conteo diario por tipo para el KPI de alertas recientes. Se
+construye una vez por versión de datos (group-by con NumPy) y se actualiza solo con
+las alertas agregadas, modificadas o eliminadas; cualquier combinación de filtros
+se resuelve sumando sobre esas tablas pequeñas, sin recorrer las alertas
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.excel_manager import ExcelManager, parse_fecha_hora
+from src.data.search_index import alert_ids_for
+
+# Dimensiones del cubo (Año y Mes enteros; el resto codificadas). -1 = vacío
+CUBE_DIMENSIONS = ['Año', 'Mes', 'TipoAlerta', 'Condicion', 'Usuario', 'Ubicacion']
+CODED_DIMENSIONS = ['TipoAlerta', 'Condicion', 'Usuario', 'Ubicacion']
+
+# Registro de una fila: (celda del cubo, celda diaria (día, año, mes, tipo) o None)
+_Record = Tuple[tuple, Optional[tuple]]
+
+_NANOS_PER_DAY = 86400 * 10**9
+
+
+class _CountTable:
+    """Conteos por combinación de códigos enteros (una fila de keys por combinación)"""
+    
+    def __init__(self, width: int):
+        self._keys = np.empty((0, width), dtype=np.int64)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._rows: Dict[tuple, int] = {}
+        
+    def __len__(self) -> int:
+        return len(self._rows)
+        
+    def add(self, key: tuple, delta: int):
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._counts):
+                # Crecer al doble para que agregar combinaciones sea O(1) amortizado
+                capacity = max(16, 2 * row)
+                self._keys = np.resize(self._keys, (capacity, self._keys.shape[1]))
+                self._counts = np.concatenate([self._counts, np.zeros(capacity - row, dtype=np.int64)])
+            self._keys[row] = key
+            self._counts[row] = 0
+            self._rows[key] = row
+        self._counts[row] += delta
+        
+    def load(self, keys: np.ndarray, counts: np.ndarray):
+        """Reemplaza el contenido por combinaciones ya agrupadas"""
+        self._keys = keys.astype(np.int64)
+        self._counts = counts.astype(np.int64)
+        self._rows = {key: row for row, key in enumerate(map(tuple, self._keys.tolist()))}
+        
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        size = len(self._rows)
+        return self._keys[:size], self._counts[:size]
+
+
+class AggregateCube:
+    """Agregados del Dashboard para cualquier combinación de año, mes y tipo
+    
+    Uso:
+        cube = AggregateCube.for_excel(excel_manager)
+        cube.update_from_frame(df)          # df con Año y Mes (load_data)
+        cube.aggregates(year=2024, month=None, alert_type='Roja')
+    """
+    
+    _shared: Dict[Path, 'AggregateCube'] = {}
+    _shared_lock = threading.Lock()
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._values: Dict[str, List] = {dimension: [] for dimension in CODED_DIMENSIONS}
+        self._codes: Dict[str, Dict] = {dimension: {} for dimension in CODED_DIMENSIONS}
+        self._cells = _CountTable(len(CUBE_DIMENSIONS))
+        self._days = _CountTable(4)  # (día desde 1970, año, mes, código de tipo)
+        self._records: Dict[str, Tuple[_Record, ...]] = {}
+        self.data_version = None  # Versión del Excel con la que está al día
+        
+    @classmethod
+    def for_excel(cls, excel_manager: ExcelManager) -> 'AggregateCube':
+        """Cubo compartido del Excel, actualizado automáticamente en cada guardado"""
+        key = excel_manager.excel_file.resolve()
+        with cls._shared_lock:
+            cube = cls._shared.get(key)
+            if cube is None:
+                cube = cls._shared[key] = cls()
+                excel_manager.add_change_listener(
+                    lambda df: cube.update_from_frame(excel_manager.derive_date_columns(df),
+                                                      excel_manager.data_version))
+        return cube
+        
+    # ---------------------------- Mantenimiento ---------------------------- #
+    def _encode(self, dimension: str, column: pd.Series) -> np.ndarray:
+        """Códigos de una columna de texto; los valores nuevos se agregan al vocabulario"""
+        values = column.astype(object)
+        values = values.where(values.notna(), None)
+        codes = self._codes[dimension]
+        for value in values.unique():
+            if value is not None and value not in codes:
+                codes[value] = len(self._values[dimension])
+                self._values[dimension].append(value)
+        return values.map(codes).fillna(-1).to_numpy(dtype=np.int64)
+        
+    @staticmethod
+    def _integer_column(df: pd.DataFrame, column: str) -> np.ndarray:
+        if column not in df.columns:
+            return np.full(len(df), -1, dtype=np.int64)
+        return pd.to_numeric(df[column], errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+        
+    def _frame_codes(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Celdas del cubo y del conteo diario de cada fila (día -1 = sin fecha)"""
+        columns = [self._integer_column(df, 'Año'), self._integer_column(df, 'Mes')]
+        for dimension in CODED_DIMENSIONS:
+            column = df[dimension] if dimension in df.columns else pd.Series(None, index=df.index)
+            columns.append(self._encode(dimension, column))
+        cells = np.column_stack(columns)
+        
+        if 'FechaHora' in df.columns:
+            fechas = parse_fecha_hora(df['FechaHora'])
+            days = np.where(fechas.notna(), fechas.to_numpy(dtype='datetime64[ns]').astype(np.int64) // _NANOS_PER_DAY, -1)
+        else:
+            days = np.full(len(df), -1, dtype=np.int64)
+        day_cells = np.column_stack([days, cells[:, 0], cells[:, 1], cells[:, 2]])
+        return cells, day_cells
+        
+    def _apply(self, record: _Record, sign: int):
+        cell, day_cell = record
+        self._cells.add(cell, sign)
+        if day_cell is not None:
+            self._days.add(day_cell, sign)
+            
+    def update_from_frame(self, df: pd.DataFrame, data_version: Optional[int] = None) -> Tuple[int, int, int]:
+        """Sincroniza el cubo con los datos: (agregadas, actualizadas, eliminadas)
+        
+        La primera vez agrupa todas las filas con NumPy; después solo se suman o
+        restan las alertas que cambiaron.
+        """
+        with self._lock:
+            cells, day_cells = self._frame_codes(df)
+            alert_ids = alert_ids_for(df).tolist()
+            current: Dict[str, Tuple[_Record, ...]] = {}
+            for alert_id, cell, day_cell in zip(alert_ids, map(tuple, cells.tolist()), map(tuple, day_cells.tolist())):
+                record = (cell, day_cell if day_cell[0] >= 0 else None)
+                current[alert_id] = current.get(alert_id, ()) + (record,)
+                
+            if not self._records:
+                self._build(cells, day_cells)
+                self._records = current
+                self.data_version = data_version
+                return len(current), 0, 0
+                
+            added = updated = removed = 0
+            for alert_id in [alert_id for alert_id in self._records if alert_id not in current]:
+                for record in self._records.pop(alert_id):
+                    self._apply(record, -1)
+                removed += 1
+                
+            for alert_id, records in current.items():
+                previous = self._records.get(alert_id)
+                if previous == records:
+                    continue
+                if previous is None:
+                    added += 1
+                else:
+                    updated += 1
+                    for record in previous:
+                        self._apply(record, -1)
+                for record in records:
+                    self._apply(record, 1)
+                self._records[alert_id] = records
+                
+            self.data_version = data_version
+            return added, updated, removed
+            
+    def _build(self, cells: np.ndarray, day_cells: np.ndarray):
+        """Construcción completa: group-by de las combinaciones con np.unique"""
+        if len(cells):
+            keys, counts = np.unique(cells, axis=0, return_counts=True)
+        else:
+            keys, counts = cells.reshape(0, len(CUBE_DIMENSIONS)), np.empty(0, dtype=np.int64)
+        self._cells.load(keys, counts)
+        
+        day_cells = day_cells[day_cells[:, 0] >= 0]
+        if len(day_cells):
+            keys, counts = np.unique(day_cells, axis=0, return_counts=True)
+        else:
+            keys, counts = day_cells.reshape(0, 4), np.empty(0, dtype=np.int64)
+        self._days.load(keys, counts)
+        
+    # ---------------------------- Consultas ---------------------------- #
+    def _filter_mask(self, keys: np.ndarray, year_column: int, month_column: int, type_column: int,
+                     year: Optional[int], month: Optional[int], alert_type: Optional[str]) -> np.ndarray:
+        mask = np.ones(len(keys), dtype=bool)
+        if year is not None:
+            mask &= keys[:, year_column] == int(year)
+        if month is not None:
+            mask &= keys[:, month_column] == int(month)
+        if alert_type is not None:
+            mask &= keys[:, type_column] == self._codes['TipoAlerta'].get(alert_type, -2)
+        return mask
+        
+    def _counts_by(self, dimension: str, codes: np.ndarray, counts: np.ndarray) -> pd.Series:
+        """Conteos por valor, de mayor a menor (igual que summarize_groups)"""
+        valid = codes >= 0
+        sums = np.bincount(codes[valid], weights=counts[valid], minlength=len(self._values[dimension]))
+        series = pd.Series(sums.astype(int), index=pd.Index(self._values[dimension], dtype=object))
+        series = series[series > 0].sort_index()
+        return series.sort_values(ascending=False, kind='stable').rename(None)
+        
+    def aggregates(self, year: Optional[int] = None, month: Optional[int] = None,
+                   alert_type: Optional[str] = None, recent_since: Optional[pd.Timestamp] = None) -> Dict:
+        """Agregados del Dashboard para los filtros (mismo formato que summarize_groups)
+        
+        recent_since: inicio de la ventana de alertas recientes (medianoche).
+        """
+        with self._lock:
+            keys, counts = self._cells.arrays()
+            mask = self._filter_mask(keys, 0, 1, 2, year, month, alert_type) & (counts > 0)
+            keys, counts = keys[mask], counts[mask]
+            
+            months = keys[:, 1] >= 1
+            by_month = pd.Series(np.bincount(keys[months, 1], weights=counts[months], minlength=13).astype(int))
+            by_month = by_month[by_month > 0].rename(None)
+            
+            recent = 0
+            if recent_since is not None:
+                day_keys, day_counts = self._days.arrays()
+                since = pd.Timestamp(recent_since).value // _NANOS_PER_DAY
+                day_mask = self._filter_mask(day_keys, 1, 2, 3, year, month, alert_type) & (day_keys[:, 0] >= since)
+                recent = int(day_counts[day_mask].sum())
+                
+            return {
+                'total': int(counts.sum()),
+                'by_type': self._counts_by('TipoAlerta', keys[:, 2], counts),
+                'by_condition': self._counts_by('Condicion', keys[:, 3], counts),
+                'by_user': self._counts_by('Usuario', keys[:, 4], counts),
+                'by_month': by_month,
+                'recent': recent
+            }
+            
+    def __len__(self) -> int:
+        """Combinaciones distintas en el cubo"""
+        with self._lock:
+            return len(self._cells)
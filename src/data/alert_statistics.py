@@ -0,0 +1,140 @@
+"""
+Estadísticas de las alertas mantenidas en memoria
+Contadores por tipo, condición y usuario más las alertas del último mes; se
+actualizan solo con las alertas que cambian en cada guardado del Excel, de modo
+que consultarlas no lee el archivo
+"""
+
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.data.excel_manager import ExcelManager, parse_fecha_hora
+from src.data.search_index import alert_ids_for
+
+# Días que cuentan como alertas recientes
+RECENT_DAYS = 30
+
+# Registro de una alerta: (TipoAlerta, Usuario, Condicion, FechaHora en ns o None)
+_Record = Tuple[Optional[str], Optional[str], Optional[str], Optional[int]]
+
+
+def _column_values(df: pd.DataFrame, column: str) -> List:
+    if column not in df.columns:
+        return [None] * len(df)
+    values = df[column].astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+class AlertStatistics:
+    """Contadores de alertas por AlertaId, actualizables de forma incremental
+    
+    Uso:
+        stats = AlertStatistics.for_excel(excel_manager)
+        stats.update_from_frame(df)
+        stats.snapshot()   # mismo formato que ExcelManager.get_statistics
+    """
+    
+    def __init__(self, recent_days: int = RECENT_DAYS):
+        self.recent_window = pd.Timedelta(days=recent_days)
+        self._lock = threading.RLock()
+        self._records: Dict[str, Tuple[_Record, ...]] = {}
+        self.total = 0
+        self.by_type: Counter = Counter()
+        self.by_user: Counter = Counter()
+        self.by_condition: Counter = Counter()
+        self._recent_times: List[int] = []  # FechaHora (ns) de las alertas recientes, ordenadas
+        
+    @classmethod
+    def for_excel(cls, excel_manager: ExcelManager) -> 'AlertStatistics':
+        """Estadísticas del Excel, actualizadas automáticamente en cada guardado"""
+        statistics = cls()
+        excel_manager.add_change_listener(statistics.on_data_saved)
+        return statistics
+        
+    # ---------------------------- Mantenimiento ---------------------------- #
+    def _cutoff(self) -> int:
+        return (pd.Timestamp(datetime.now()) - self.recent_window).value
+        
+    def _apply(self, record: _Record, sign: int, cutoff: int):
+        tipo, usuario, condicion, fecha = record
+        self.total += sign
+        for counter, value in ((self.by_type, tipo), (self.by_user, usuario), (self.by_condition, condicion)):
+            if value is None:
+                continue
+            counter[value] += sign
+            if counter[value] <= 0:
+                del counter[value]
+                
+        if fecha is None or fecha < cutoff:
+            return
+        if sign > 0:
+            insort(self._recent_times, fecha)
+        else:
+            position = bisect_left(self._recent_times, fecha)
+            if position < len(self._recent_times) and self._recent_times[position] == fecha:
+                del self._recent_times[position]
+                
+    def update_from_frame(self, df: pd.DataFrame) -> Tuple[int, int, int]:
+        """Sincroniza los contadores con los datos: (agregadas, actualizadas, eliminadas)
+        
+        Solo se recuentan las alertas nuevas, modificadas o eliminadas.
+        """
+        fechas = parse_fecha_hora(df['FechaHora']) if 'FechaHora' in df.columns else pd.Series(pd.NaT, index=df.index)
+        nanos = [None if pd.isna(fecha) else fecha.value for fecha in fechas]
+        current: Dict[str, Tuple[_Record, ...]] = {}
+        for alert_id, *record in zip(alert_ids_for(df).tolist(), _column_values(df, 'TipoAlerta'),
+                                     _column_values(df, 'Usuario'), _column_values(df, 'Condicion'), nanos):
+            current[alert_id] = current.get(alert_id, ()) + (tuple(record),)
+            
+        with self._lock:
+            cutoff = self._cutoff()
+            added = updated = removed = 0
+            for alert_id in [alert_id for alert_id in self._records if alert_id not in current]:
+                for record in self._records.pop(alert_id):
+                    self._apply(record, -1, cutoff)
+                removed += 1
+                
+            for alert_id, records in current.items():
+                previous = self._records.get(alert_id)
+                if previous == records:
+                    continue
+                if previous is None:
+                    added += 1
+                else:
+                    updated += 1
+                    for record in previous:
+                        self._apply(record, -1, cutoff)
+                for record in records:
+                    self._apply(record, 1, cutoff)
+                self._records[alert_id] = records
+                
+            return added, updated, removed
+            
+    def on_data_saved(self, df: pd.DataFrame):
+        """Listener de ExcelManager: actualiza los contadores tras cada cambio"""
+        self.update_from_frame(df)
+        
+    # ---------------------------- Consultas ---------------------------- #
+    def recent_count(self) -> int:
+        """Alertas con fecha dentro de la ventana reciente (se descartan las que vencieron)"""
+        with self._lock:
+            expired = bisect_left(self._recent_times, self._cutoff())
+            if expired:
+                del self._recent_times[:expired]
+            return len(self._recent_times)
+            
+    def snapshot(self) -> Dict:
+        """Estadísticas actuales con el formato de ExcelManager.get_statistics"""
+        with self._lock:
+            return {
+                'total_alerts': self.total,
+                'alert_by_type': dict(self.by_type),
+                'alert_by_user': dict(self.by_user),
+                'alert_by_condition': dict(self.by_condition),
+                'recent_alerts': self.recent_count()
+            }
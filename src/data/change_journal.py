@@ -0,0 +1,120 @@
+"""
+Diario de cambios de campos editados en el visor de alertas
+Cada edición se agrega de inmediato a un archivo JSON Lines junto al Excel
+(no se pierde si la aplicación se cierra) y se aplica al Excel por lotes:
+muchas ediciones cuestan una sola escritura del libro
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.data.excel_manager import ExcelManager
+
+
+class ChangeJournal:
+    """Cambios pendientes de guardar en el Excel: {AlertaId, column, old, value, Usuario, FechaCambio}"""
+    
+    def __init__(self, journal_file: Path):
+        self.journal_file = Path(journal_file)
+        self._lock = threading.RLock()
+        self._entries: List[Dict] = []
+        self.load()
+        
+    @classmethod
+    def for_excel(cls, excel_manager: ExcelManager) -> 'ChangeJournal':
+        """Diario del Excel (data/alertas_geotecnicas.journal.jsonl)"""
+        return cls(excel_manager.excel_file.with_suffix('.journal.jsonl'))
+        
+    def __len__(self) -> int:
+        return len(self._entries)
+        
+    # ---------------------------- Persistencia ---------------------------- #
+    def load(self):
+        """Lee los cambios que quedaron pendientes (por ejemplo, tras un cierre inesperado)"""
+        with self._lock:
+            self._entries = []
+            if not self.journal_file.exists():
+                return
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self._entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Última línea incompleta si se cortó la escritura
+                        print(f"⚠️ Línea ilegible en el diario de cambios: {line.strip()[:80]}")
+                        
+    def record(self, alert_id: str, column: str, old_value, value, user: Optional[str] = None) -> Dict:
+        """Agrega un cambio al diario (se escribe al final del archivo de inmediato)"""
+        entry = {
+            'AlertaId': str(alert_id),
+            'column': column,
+            'old': None if pd.isna(old_value) else old_value,
+            'value': value,
+            'Usuario': user,
+            'FechaCambio': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with self._lock:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            self._entries.append(entry)
+        return entry
+        
+    def _rewrite(self, entries: List[Dict]):
+        """Reemplaza el archivo por las entradas indicadas (escritura atómica)"""
+        if not entries:
+            self.journal_file.unlink(missing_ok=True)
+            return
+        temp_file = self.journal_file.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+        temp_file.replace(self.journal_file)
+        
+    # ---------------------------- Aplicación ---------------------------- #
+    def pending(self) -> List[Dict]:
+        """Cambios aún no guardados en el Excel, en orden"""
+        with self._lock:
+            return list(self._entries)
+            
+    def overlay(self, df: pd.DataFrame, row_ids: pd.Series) -> pd.DataFrame:
+        """Aplica los cambios pendientes sobre datos leídos del Excel (sin modificar el original)"""
+        entries = self.pending()
+        if not entries or df.empty:
+            return df
+            
+        df = df.copy()
+        row_of = {alert_id: row for row, alert_id in enumerate(row_ids.tolist())}
+        for entry in entries:
+            row = row_of.get(entry['AlertaId'])
+            if row is not None and entry['column'] in df.columns:
+                df.iloc[row, df.columns.get_loc(entry['column'])] = entry['value']
+        return df
+        
+    def flush(self, excel_manager: ExcelManager) -> Tuple[bool, str]:
+        """Guarda los cambios pendientes en el Excel con una sola escritura
+        
+        Lectura, escritura y recorte del diario se hacen dentro del lock de escritura
+        del Excel: otro escritor (sincronización, formulario) no puede reescribir el
+        libro con datos leídos antes, y los cambios solo se quitan del diario una vez
+        guardados. Las ediciones que llegan durante la escritura quedan para el próximo lote.
+        """
+        with excel_manager.write_lock:
+            batch = self.pending()
+            if not batch:
+                return True, "Sin cambios pendientes"
+                
+            updates = [{'AlertaId': entry['AlertaId'], 'column': entry['column'], 'value': entry['value']}
+                       for entry in batch]
+            success, message = excel_manager.apply_field_updates(updates)
+            if not success:
+                return False, message
+                
+            with self._lock:
+                self._entries = self._entries[len(batch):]
+                self._rewrite(self._entries)
+        return True, message
@@ -5,9 +5,10 @@ Gestor para el manejo de archivos Excel con alertas geotécnicas
 import pandas as pd
 import openpyxl
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 import hashlib
+import threading
 from openpyxl.styles import PatternFill, Font, Alignment
 from openpyxl.utils.dataframe import dataframe_to_rows
 
@@ -22,6 +23,75 @@ VALID_CONDITIONS = [
     'Progresiva-Crítica'
 ]
 
+# Columnas del Excel (orden correcto); AlertaId identifica cada alerta en la sincronización
+ALERT_COLUMNS = [
+    "FechaHora", "TipoAlerta", "Condicion", "Ubicacion", "VelocidadMmDia",
+    "Respaldo", "Colapso", "FechaHoraColapso", "Evacuacion", 
+    "CronologiaAnalisis", "Observaciones", "Usuario", "FechaRegistro", "HojaOrigen", "AlertaId"
+]
+
+
+def parse_fecha_hora(values: pd.Series) -> pd.Series:
+    """Convierte FechaHora a datetime aceptando ISO (YYYY-MM-DD) y formato día/mes/año"""
+    parsed = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    pending = parsed.isna() & values.notna()
+    if pending.any():
+        # Formato habitual del Excel (rápido); 'mixed' solo para lo que quede sin interpretar
+        parsed[pending] = pd.to_datetime(values[pending], format='%d/%m/%Y %H:%M:%S', errors='coerce')
+        pending = parsed.isna() & values.notna()
+    if pending.any():
+        parsed[pending] = pd.to_datetime(values[pending], format='mixed', dayfirst=True, errors='coerce')
+    return parsed
+
+
+def normalize_fecha_hora(values: pd.Series) -> pd.Series:
+    """Normaliza FechaHora a texto ISO (YYYY-MM-DD HH:MM:SS) para comparar y almacenar"""
+    parsed = parse_fecha_hora(values)
+    normalized = parsed.dt.strftime('%Y-%m-%d %H:%M:%S')
+    # Conservar el valor original cuando no se puede interpretar como fecha
+    return normalized.where(parsed.notna(), values.astype(str))
+
+
+def alert_key(df: pd.DataFrame) -> pd.Series:
+    """Identidad de una alerta: FechaHora normalizada + TipoAlerta + Observaciones"""
+    return (
+        normalize_fecha_hora(df['FechaHora']) + "|" +
+        df['TipoAlerta'].fillna('').astype(str) + "|" +
+        df['Observaciones'].fillna('').astype(str)
+    )
+
+
+def legacy_alert_ids(df: pd.DataFrame, taken=()) -> pd.Series:
+    """AlertaId determinista para filas sin ID (hash de alert_key)
+    
+    Al derivarse del contenido, dos equipos que asignan ID a las mismas alertas
+    antiguas obtienen el mismo valor y la primera sincronización converge. Las filas
+    con la misma clave se distinguen por su número de aparición (la primera conserva
+    el hash de la clave), y se omiten los IDs de taken (ya usados por otras filas).
+    """
+    keys = alert_key(df)
+    used = set(taken)
+    ids = []
+    for key, occurrence in zip(keys, keys.groupby(keys).cumcount()):
+        alert_id = hashlib.md5((f"{key}|{occurrence}" if occurrence else key).encode()).hexdigest()
+        while alert_id in used:
+            occurrence += 1
+            alert_id = hashlib.md5(f"{key}|{occurrence}".encode()).hexdigest()
+        used.add(alert_id)
+        ids.append(alert_id)
+    return pd.Series(ids, index=df.index, dtype=object)
+
+
+# Listeners de cambios y versión de los datos por archivo: cualquier ExcelManager que
+# guarde un archivo avisa a todos los interesados en ese archivo (formulario, visor, sync)
+_change_listeners: Dict[Path, List[Callable[[pd.DataFrame], None]]] = {}
+_data_versions: Dict[Path, int] = {}
+_listeners_lock = threading.Lock()
+# Lock de escritura por archivo: toda secuencia leer -> modificar -> guardar del libro se
+# hace dentro de él, para que un escritor no reescriba el archivo con datos leídos antes
+# de que otro guardara (formulario, eliminación, importación, diario, sincronización)
+_write_locks: Dict[Path, threading.RLock] = {}
+
 
 class ExcelManager:
     """Gestor para operaciones con Excel"""
@@ -29,10 +99,54 @@ class ExcelManager:
     def __init__(self, excel_file: str = "data/alertas_geotecnicas.xlsx"):
         self.excel_file = Path(excel_file)
         self.excel_file.parent.mkdir(exist_ok=True, parents=True)
+        self._file_key = self.excel_file.resolve()
         self._ensure_excel_file()
         # Verificar y actualizar estructura si es necesario
         self.update_excel_structure()
         
+    @property
+    def data_version(self) -> int:
+        """Versión de los datos del archivo: aumenta con cada guardado (índices y cachés la comparan)"""
+        return _data_versions.get(self._file_key, 0)
+        
+    @property
+    def write_lock(self) -> threading.RLock:
+        """Lock de escritura del archivo, compartido por todos los ExcelManager que lo usan
+        
+        Es reentrante: dentro de él se puede llamar a save_alert, _save_formatted_excel, etc.
+        """
+        with _listeners_lock:
+            return _write_locks.setdefault(self._file_key, threading.RLock())
+            
+    def add_change_listener(self, callback: Callable[[pd.DataFrame], None]):
+        """Registra una función que recibe los datos cada vez que se guarda el Excel
+        
+        Se invoca desde el thread que guarda (por ejemplo, la sincronización automática).
+        """
+        with _listeners_lock:
+            listeners = _change_listeners.setdefault(self._file_key, [])
+            if callback not in listeners:
+                listeners.append(callback)
+                
+    def remove_change_listener(self, callback: Callable[[pd.DataFrame], None]):
+        """Quita una función registrada con add_change_listener"""
+        with _listeners_lock:
+            listeners = _change_listeners.get(self._file_key, [])
+            if callback in listeners:
+                listeners.remove(callback)
+                
+    def _notify_change(self, df: pd.DataFrame):
+        """Avisa a los interesados que los datos cambiaron (alta, importación, eliminación)"""
+        with _listeners_lock:
+            _data_versions[self._file_key] = _data_versions.get(self._file_key, 0) + 1
+            listeners = list(_change_listeners.get(self._file_key, []))
+            
+        for callback in listeners:
+            try:
+                callback(df)
+            except Exception as e:
+                print(f"⚠️ Error notificando cambios del Excel: {e}")
+                
     def _ensure_excel_file(self):
         """Asegura que el archivo Excel existe con la estructura correcta"""
         if not self.excel_file.exists():
@@ -40,11 +154,7 @@ class ExcelManager:
             
     def _create_empty_excel(self):
         """Crea un archivo Excel vacío con la estructura correcta"""
-        columns = [
-            "FechaHora", "TipoAlerta", "Condicion", "Ubicacion", "VelocidadMmDia",
-            "Respaldo", "Colapso", "FechaHoraColapso", "Evacuacion", 
-            "CronologiaAnalisis", "Observaciones", "Usuario", "FechaRegistro", "HojaOrigen"
-        ]
+        columns = ALERT_COLUMNS
         
         df = pd.DataFrame(columns=columns)
         
@@ -87,6 +197,21 @@ class ExcelManager:
         hash_string = f"{alert_data['FechaHora']}{alert_data['TipoAlerta']}{alert_data['Observaciones']}"
         return hashlib.md5(hash_string.encode()).hexdigest()
         
+    def ensure_alert_ids(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Asigna AlertaId a las filas que no lo tienen (sin modificar el original)"""
+        if df.empty or not {'FechaHora', 'TipoAlerta', 'Observaciones'}.issubset(df.columns):
+            return df
+            
+        df = df.copy()
+        if 'AlertaId' not in df.columns:
+            df['AlertaId'] = None
+            
+        missing = df['AlertaId'].isna() | (df['AlertaId'].astype(str).str.strip() == '')
+        if missing.any():
+            df.loc[missing, 'AlertaId'] = legacy_alert_ids(df[missing], taken=df.loc[~missing, 'AlertaId'].astype(str))
+            
+        return df
+        
     def load_data(self) -> pd.DataFrame:
         """Carga los datos del archivo Excel filtrando cabeceras y separadores"""
         try:
@@ -144,42 +269,51 @@ class ExcelManager:
                     # Guardar los cambios al archivo
                     self._save_user_updates(df)
             
-            # Convertir FechaHora a datetime y extraer año/mes
-            if not df.empty and 'FechaHora' in df.columns:
-                # Convertir a datetime con formato mixto (maneja múltiples formatos)
-                df['FechaHora_dt'] = pd.to_datetime(df['FechaHora'], format='mixed', errors='coerce')
-                
-                # Mantener todas las filas (incluye separadores con fechas no convertibles)
-                # df = df[df['FechaHora_dt'].notna()]  # COMENTADO para incluir separadores
-                
-                # Extraer año y mes para los filtros (solo para fechas válidas)
-                df['Año'] = df['FechaHora_dt'].dt.year
-                df['Mes'] = df['FechaHora_dt'].dt.month
-                
-                # Para separadores (01/01/yyyy 00:00), extraer año manualmente
-                fecha_str = df['FechaHora'].astype(str)
-                mask_separador = fecha_str.str.contains(r'01/01/\d{4} 00:00', na=False)
-                if mask_separador.any():
-                    # Extraer año de separadores usando regex
-                    separador_years = fecha_str.str.extract(r'01/01/(\d{4}) 00:00')[0]
-                    # Crear máscara para separadores sin año
-                    mask_sin_año = mask_separador & df['Año'].isna()
-                    if mask_sin_año.any():
-                        # Asignar año a separadores donde el año es NaN
-                        años_extraidos = pd.to_numeric(separador_years[mask_sin_año], errors='coerce')
-                        df.loc[mask_sin_año, 'Año'] = años_extraidos
-                
-                # Ordenar por fecha (colocar fechas nulas al final)
-                df = df.sort_values('FechaHora_dt', ascending=True, na_position='last')
-                
-                # Eliminar columna temporal datetime
-                df = df.drop('FechaHora_dt', axis=1)
-                
-            return df
+            # Convertir FechaHora a datetime, extraer año/mes y ordenar por fecha
+            return self.derive_date_columns(df)
         except Exception as e:
             print(f"Error cargando datos: {e}")
             return pd.DataFrame()
     
+    def derive_date_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Agrega Año y Mes (desde FechaHora) y ordena por fecha, como load_data
+        
+        Permite preparar datos recibidos en una notificación de cambios sin releer el archivo.
+        """
+        df = df.copy()
+        if not df.empty and 'FechaHora' in df.columns:
+            # Convertir a datetime con formato mixto (maneja múltiples formatos)
+            df['FechaHora_dt'] = pd.to_datetime(df['FechaHora'], format='mixed', errors='coerce')
+            
+            # Mantener todas las filas (incluye separadores con fechas no convertibles)
+            # df = df[df['FechaHora_dt'].notna()]  # COMENTADO para incluir separadores
+            
+            # Extraer año y mes para los filtros (solo para fechas válidas)
+            df['Año'] = df['FechaHora_dt'].dt.year
+            df['Mes'] = df['FechaHora_dt'].dt.month
+            
+            # Para separadores (01/01/yyyy 00:00), extraer año manualmente
+            fecha_str = df['FechaHora'].astype(str)
+            mask_separador = fecha_str.str.contains(r'01/01/\d{4} 00:00', na=False)
+            if mask_separador.any():
+                # Extraer año de separadores usando regex
+                separador_years = fecha_str.str.extract(r'01/01/(\d{4}) 00:00')[0]
+                # Crear máscara para separadores sin año
+                mask_sin_año = mask_separador & df['Año'].isna()
+                if mask_sin_año.any():
+                    # Asignar año a separadores donde el año es NaN
+                    años_extraidos = pd.to_numeric(separador_years[mask_sin_año], errors='coerce')
+                    df.loc[mask_sin_año, 'Año'] = años_extraidos
+            
+            # Ordenar por fecha (colocar fechas nulas al final); estable para que las filas
+            # con la misma fecha conserven su orden (y su ID derivado)
+            df = df.sort_values('FechaHora_dt', ascending=True, na_position='last', kind='stable')
+            
+            # Eliminar columna temporal datetime
+            df = df.drop('FechaHora_dt', axis=1)
+            
+        return df
+        
     def _save_user_updates(self, df):
         """Guarda las actualizaciones de usuario al archivo Excel"""
         try:
@@ -224,34 +358,35 @@ class ExcelManager:
                 print(f"❌ Velocidad inválida: {alert_data.get('VelocidadMmDia')}")
                 return False
             
-            # Cargar datos existentes
-            df = self.load_data()
-            
-            # Agregar columna HojaOrigen si no existe
-            if 'HojaOrigen' not in alert_data:
-                alert_data['HojaOrigen'] = 'Manual'
-            
-            # Verificar duplicados
-            if self._is_duplicate(alert_data, df):
-                print("⚠️ Alerta duplicada detectada")
-                return False
+            with self.write_lock:
+                # Cargar datos existentes
+                df = self.load_data()
                 
-            # Agregar nueva fila
-            new_row = pd.DataFrame([alert_data])
-            df = pd.concat([df, new_row], ignore_index=True)
-            
-            # Ordenar por fecha - usar formato correcto
-            if not df.empty and 'FechaHora' in df.columns:
-                # Los datos pueden estar en diferentes formatos, usar format='mixed'
-                df['FechaHora_dt'] = pd.to_datetime(df['FechaHora'], format='mixed', errors='coerce')
-                df = df.sort_values('FechaHora_dt', ascending=True)
-                df = df.drop('FechaHora_dt', axis=1)
-                print(f"📊 Datos ordenados por fecha - Total: {len(df)} registros")
-            
-            # Guardar en Excel con formato
-            self._save_formatted_excel(df)
-            
-            return True
+                # Agregar columna HojaOrigen si no existe
+                if 'HojaOrigen' not in alert_data:
+                    alert_data['HojaOrigen'] = 'Manual'
+                
+                # Verificar duplicados
+                if self._is_duplicate(alert_data, df):
+                    print("⚠️ Alerta duplicada detectada")
+                    return False
+                    
+                # Agregar nueva fila
+                new_row = pd.DataFrame([alert_data])
+                df = pd.concat([df, new_row], ignore_index=True)
+                
+                # Ordenar por fecha - usar formato correcto
+                if not df.empty and 'FechaHora' in df.columns:
+                    # Los datos pueden estar en diferentes formatos, usar format='mixed'
+                    df['FechaHora_dt'] = pd.to_datetime(df['FechaHora'], format='mixed', errors='coerce')
+                    df = df.sort_values('FechaHora_dt', ascending=True)
+                    df = df.drop('FechaHora_dt', axis=1)
+                    print(f"📊 Datos ordenados por fecha - Total: {len(df)} registros")
+                
+                # Guardar en Excel con formato
+                self._save_formatted_excel(df)
+                
+                return True
             
         except Exception as e:
             print(f"Error guardando alerta: {e}")
@@ -273,6 +408,9 @@ class ExcelManager:
         
     def _save_formatted_excel(self, df: pd.DataFrame):
         """Guarda el DataFrame con formato en Excel"""
+        # Toda alerta guardada lleva su AlertaId (requerido por la sincronización)
+        df = self.ensure_alert_ids(df)
+        
         # Crear una copia para no modificar el DataFrame original
         df_formatted = df.copy()
         
@@ -335,7 +473,9 @@ class ExcelManager:
         for col, width in column_widths.items():
             ws.column_dimensions[col].width = width
             
-        wb.save(self.excel_file)
+        with self.write_lock:
+            wb.save(self.excel_file)
+            self._notify_change(df)
         
     def _fuzzy_match_column(self, column_name: str, target_mappings: dict) -> str:
         """Busca la mejor coincidencia para un nombre de columna usando fuzzy matching"""
@@ -576,119 +716,120 @@ class ExcelManager:
             sheets_processed = 0
             processing_log = []
             
-            # Cargar datos existentes una sola vez
-            existing_df = self.load_data()
-            
-            for sheet_name in sheet_names:
-                try:
-                    # Leer cada hoja
-                    raw_df = pd.read_excel(file_path, sheet_name=sheet_name)
-                    
-                    # Saltar hojas vacías
-                    if raw_df.empty:
-                        processing_log.append(f"Hoja '{sheet_name}': vacía, omitida")
-                        continue
-                    
-                    # Normalizar columnas
-                    normalized_df = self._normalize_columns(raw_df, sheet_name)
-                    
-                    # Verificar que tenemos datos después de normalizar
-                    if normalized_df.empty:
-                        processing_log.append(f"Hoja '{sheet_name}': sin datos válidos después de normalización")
-                        continue
-                    
-                    # Verificar columnas críticas con lógica más flexible
-                    has_critical_data = False
-                    rows_with_data = 0
-                    
-                    # Contar filas que tienen algún contenido válido
-                    for _, row in normalized_df.iterrows():
-                        row_has_content = False
-                        for col in ['FechaHora', 'TipoAlerta', 'Observaciones', 'CronologiaAnalisis']:
-                            if col in normalized_df.columns:
-                                value = row[col]
-                                if pd.notna(value) and str(value).strip():
-                                    row_has_content = True
-                                    break
-                        if row_has_content:
-                            rows_with_data += 1
-                    
-                    if rows_with_data > 0:
-                        has_critical_data = True
-                    
-                    if not has_critical_data:
-                        processing_log.append(f"Hoja '{sheet_name}': sin datos válidos en filas, omitida")
-                        continue
-                    
-                    # Procesar registros de esta hoja
-                    sheet_new_records = 0
-                    sheet_duplicates = 0
-                    
-                    for _, row in normalized_df.iterrows():
-                        alert_data = row.to_dict()
+            with self.write_lock:
+                # Cargar datos existentes una sola vez
+                existing_df = self.load_data()
+                
+                for sheet_name in sheet_names:
+                    try:
+                        # Leer cada hoja
+                        raw_df = pd.read_excel(file_path, sheet_name=sheet_name)
                         
-                        # Limpiar valores NaN/NaT
-                        for key, value in alert_data.items():
-                            if pd.isna(value):
-                                alert_data[key] = ""
-                            else:
-                                alert_data[key] = str(value).strip()
+                        # Saltar hojas vacías
+                        if raw_df.empty:
+                            processing_log.append(f"Hoja '{sheet_name}': vacía, omitida")
+                            continue
+                        
+                        # Normalizar columnas
+                        normalized_df = self._normalize_columns(raw_df, sheet_name)
+                        
+                        # Verificar que tenemos datos después de normalizar
+                        if normalized_df.empty:
+                            processing_log.append(f"Hoja '{sheet_name}': sin datos válidos después de normalización")
+                            continue
                         
-                        # Validación más flexible - solo requiere que tenga ALGÚN contenido útil
-                        has_content = False
-                        critical_fields = ['FechaHora', 'TipoAlerta', 'Observaciones', 'CronologiaAnalisis', 'Condicion']
+                        # Verificar columnas críticas con lógica más flexible
+                        has_critical_data = False
+                        rows_with_data = 0
                         
-                        for field in critical_fields:
-                            if alert_data.get(field) and len(alert_data[field]) > 2:  # Al menos 3 caracteres
-                                has_content = True
-                                break
+                        # Contar filas que tienen algún contenido válido
+                        for _, row in normalized_df.iterrows():
+                            row_has_content = False
+                            for col in ['FechaHora', 'TipoAlerta', 'Observaciones', 'CronologiaAnalisis']:
+                                if col in normalized_df.columns:
+                                    value = row[col]
+                                    if pd.notna(value) and str(value).strip():
+                                        row_has_content = True
+                                        break
+                            if row_has_content:
+                                rows_with_data += 1
                         
-                        if not has_content:
-                            continue  # Saltar fila sin contenido relevante
+                        if rows_with_data > 0:
+                            has_critical_data = True
                         
-                        # Si no tiene fecha, intentar usar valor por defecto
-                        if not alert_data.get('FechaHora'):
-                            alert_data['FechaHora'] = f"01/01/{sheet_name} 00:00:00" if sheet_name.isdigit() else "01/01/2024 00:00:00"
+                        if not has_critical_data:
+                            processing_log.append(f"Hoja '{sheet_name}': sin datos válidos en filas, omitida")
+                            continue
                         
-                        # Si no tiene observaciones, usar cronología si existe
-                        if not alert_data.get('Observaciones'):
-                            if alert_data.get('CronologiaAnalisis'):
-                                alert_data['Observaciones'] = alert_data['CronologiaAnalisis']
+                        # Procesar registros de esta hoja
+                        sheet_new_records = 0
+                        sheet_duplicates = 0
+                        
+                        for _, row in normalized_df.iterrows():
+                            alert_data = row.to_dict()
+                            
+                            # Limpiar valores NaN/NaT
+                            for key, value in alert_data.items():
+                                if pd.isna(value):
+                                    alert_data[key] = ""
+                                else:
+                                    alert_data[key] = str(value).strip()
+                            
+                            # Validación más flexible - solo requiere que tenga ALGÚN contenido útil
+                            has_content = False
+                            critical_fields = ['FechaHora', 'TipoAlerta', 'Observaciones', 'CronologiaAnalisis', 'Condicion']
+                            
+                            for field in critical_fields:
+                                if alert_data.get(field) and len(alert_data[field]) > 2:  # Al menos 3 caracteres
+                                    has_content = True
+                                    break
+                            
+                            if not has_content:
+                                continue  # Saltar fila sin contenido relevante
+                            
+                            # Si no tiene fecha, intentar usar valor por defecto
+                            if not alert_data.get('FechaHora'):
+                                alert_data['FechaHora'] = f"01/01/{sheet_name} 00:00:00" if sheet_name.isdigit() else "01/01/2024 00:00:00"
+                            
+                            # Si no tiene observaciones, usar cronología si existe
+                            if not alert_data.get('Observaciones'):
+                                if alert_data.get('CronologiaAnalisis'):
+                                    alert_data['Observaciones'] = alert_data['CronologiaAnalisis']
+                                else:
+                                    alert_data['Observaciones'] = ""  # Dejar en blanco si no hay datos
+                            
+                            if not self._is_duplicate(alert_data, existing_df):
+                                # Asegurar que todas las columnas necesarias existen
+                                for col in existing_df.columns:
+                                    if col not in alert_data:
+                                        alert_data[col] = ""
+                                        
+                                new_row = pd.DataFrame([alert_data])
+                                existing_df = pd.concat([existing_df, new_row], ignore_index=True)
+                                sheet_new_records += 1
                             else:
-                                alert_data['Observaciones'] = ""  # Dejar en blanco si no hay datos
+                                sheet_duplicates += 1
                         
-                        if not self._is_duplicate(alert_data, existing_df):
-                            # Asegurar que todas las columnas necesarias existen
-                            for col in existing_df.columns:
-                                if col not in alert_data:
-                                    alert_data[col] = ""
-                                    
-                            new_row = pd.DataFrame([alert_data])
-                            existing_df = pd.concat([existing_df, new_row], ignore_index=True)
-                            sheet_new_records += 1
-                        else:
-                            sheet_duplicates += 1
-                    
-                    total_new_records += sheet_new_records
-                    total_duplicates += sheet_duplicates
-                    sheets_processed += 1
-                    
-                    processing_log.append(f"Hoja '{sheet_name}': {sheet_new_records} nuevos, {sheet_duplicates} duplicados")
-                    
-                except Exception as e:
-                    processing_log.append(f"Hoja '{sheet_name}': error - {str(e)}")
-                    continue
-                    
-            # Ordenar y guardar si hay registros nuevos
-            if total_new_records > 0:
-                if not existing_df.empty and 'FechaHora' in existing_df.columns:
-                    existing_df['FechaHora_dt'] = pd.to_datetime(
-                        existing_df['FechaHora'], format='%d/%m/%Y %H:%M:%S', errors='coerce'
-                    )
-                    existing_df = existing_df.sort_values('FechaHora_dt', ascending=True)
-                    existing_df = existing_df.drop('FechaHora_dt', axis=1)
-                    
-                self._save_formatted_excel(existing_df)
+                        total_new_records += sheet_new_records
+                        total_duplicates += sheet_duplicates
+                        sheets_processed += 1
+                        
+                        processing_log.append(f"Hoja '{sheet_name}': {sheet_new_records} nuevos, {sheet_duplicates} duplicados")
+                        
+                    except Exception as e:
+                        processing_log.append(f"Hoja '{sheet_name}': error - {str(e)}")
+                        continue
+                        
+                # Ordenar y guardar si hay registros nuevos
+                if total_new_records > 0:
+                    if not existing_df.empty and 'FechaHora' in existing_df.columns:
+                        existing_df['FechaHora_dt'] = pd.to_datetime(
+                            existing_df['FechaHora'], format='%d/%m/%Y %H:%M:%S', errors='coerce'
+                        )
+                        existing_df = existing_df.sort_values('FechaHora_dt', ascending=True)
+                        existing_df = existing_df.drop('FechaHora_dt', axis=1)
+                        
+                    self._save_formatted_excel(existing_df)
                 
             # Crear mensaje de resultado
             message = f"Importación con normalización completada:\n\n"
@@ -712,10 +853,13 @@ class ExcelManager:
             
     def export_excel(self, file_path: str) -> bool:
         """Exporta los datos a un archivo Excel"""
+        from src.data.export_service import ExportService
+        
         try:
-            df = self.load_data()
-            self._save_formatted_excel_to_path(df, file_path)
-            return True
+            df = self.load_data().drop(columns=['Año', 'Mes'], errors='ignore')
+            success, message = ExportService(df).export(file_path, 'xlsx')
+            print(f"{'✅' if success else '❌'} {message}")
+            return success
         except Exception as e:
             print(f"Error exportando: {e}")
             return False
@@ -820,80 +964,122 @@ class ExcelManager:
             
         return stats
     
-    def delete_alerts_by_index(self, indices: List[int]) -> bool:
-        """Elimina alertas por sus índices en el DataFrame"""
+    def delete_alerts_by_id(self, alert_ids: List[str]) -> bool:
+        """Elimina las alertas con los AlertaId indicados
+        
+        Se identifican por ID y no por posición: el orden de los datos leídos puede
+        diferir del de la vista (ordenamiento, cambios guardados por la sincronización).
+        """
         try:
-            df = self.load_data()
-            
-            if df.empty:
-                return False
-            
-            # Filtrar índices válidos
-            valid_indices = [i for i in indices if 0 <= i < len(df)]
-            
-            if not valid_indices:
-                return False
-            
-            # Eliminar filas
-            df_filtered = df.drop(df.index[valid_indices])
-            
-            # Guardar datos actualizados
-            self._save_formatted_excel(df_filtered)
-            
-            return True
+            with self.write_lock:
+                df = self.ensure_alert_ids(self.load_data())
+                
+                if df.empty:
+                    return False
+                
+                # Filas de las alertas seleccionadas que siguen en el Excel
+                selected = df['AlertaId'].astype(str).isin([str(alert_id) for alert_id in alert_ids])
+                
+                if not selected.any():
+                    return False
+                
+                # Eliminar filas
+                df_filtered = df[~selected].drop(columns=['Año', 'Mes'], errors='ignore')
+                
+                # Guardar datos actualizados
+                self._save_formatted_excel(df_filtered)
+                
+                return True
             
         except Exception as e:
             print(f"Error eliminando alertas: {e}")
             return False
 
+    def apply_field_updates(self, updates: List[Dict]) -> Tuple[bool, str]:
+        """Aplica cambios de campos de alertas existentes con una sola escritura del Excel
+        
+        updates: [{'AlertaId': ..., 'column': ..., 'value': ...}] en orden; si un campo
+        se cambió varias veces queda el último valor.
+        """
+        try:
+            if not updates:
+                return True, "Sin cambios para guardar"
+                
+            with self.write_lock:
+                df = self.ensure_alert_ids(self.load_data())
+                if df.empty:
+                    return False, "No hay datos para actualizar"
+                    
+                row_of = {alert_id: row for row, alert_id in enumerate(df['AlertaId'].astype(str))}
+                applied = missing = 0
+                for update in updates:
+                    row = row_of.get(str(update['AlertaId']))
+                    if row is None or update['column'] not in df.columns:
+                        missing += 1
+                        continue
+                    df.iloc[row, df.columns.get_loc(update['column'])] = update['value']
+                    applied += 1
+                    
+                if not applied:
+                    # Las alertas se eliminaron después de editarlas: no hay nada que escribir
+                    return True, f"{missing} cambios omitidos: la alerta ya no existe"
+                    
+                self._save_formatted_excel(df.drop(columns=['Año', 'Mes'], errors='ignore'))
+            message = f"Se guardaron {applied} cambios"
+            if missing:
+                message += f" ({missing} omitidos: la alerta ya no existe)"
+            return True, message
+            
+        except Exception as e:
+            return False, f"Error guardando cambios: {e}"
+
     def update_excel_structure(self) -> bool:
         """Actualiza la estructura del Excel añadiendo columnas faltantes"""
         try:
             print("🔄 Verificando estructura del archivo Excel...")
             
-            # Cargar datos existentes
-            df = self.load_data()
-            
-            # Columnas esperadas (orden correcto)
-            expected_columns = [
-                "FechaHora", "TipoAlerta", "Condicion", "Ubicacion", "VelocidadMmDia",
-                "Respaldo", "Colapso", "FechaHoraColapso", "Evacuacion", 
-                "CronologiaAnalisis", "Observaciones", "Usuario", "FechaRegistro", "HojaOrigen"
-            ]
-            
-            # Verificar si faltan columnas
-            missing_columns = [col for col in expected_columns if col not in df.columns]
-            
-            if not missing_columns:
-                print("✅ La estructura del Excel ya está actualizada.")
-                return True
-            
-            print(f"📝 Agregando columnas faltantes: {missing_columns}")
-            
-            # Agregar columnas faltantes con valores por defecto
-            for col in missing_columns:
-                if col == 'Ubicacion':
-                    df[col] = 'No especificada'
-                elif col == 'VelocidadMmDia':
-                    df[col] = '0'
-                elif col == 'Usuario':
-                    df[col] = 'admin'
-                elif col == 'FechaRegistro':
-                    from datetime import datetime
-                    df[col] = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-                elif col == 'HojaOrigen':
-                    df[col] = 'Alertas'
-                else:
-                    df[col] = ''
-            
-            # Reordenar columnas según el orden esperado
-            df_reordered = pd.DataFrame()
-            for col in expected_columns:
-                if col in df.columns:
-                    df_reordered[col] = df[col]
-            
-            # Guardar archivo actualizado
-            self._save_formatted_excel(df_reordered)
+            with self.write_lock:
+                # Cargar datos existentes
+                df = self.load_data()
+                
+                # Columnas esperadas (orden correcto)
+                expected_columns = ALERT_COLUMNS
+                
+                # Verificar si faltan columnas
+                missing_columns = [col for col in expected_columns if col not in df.columns]
+                
+                if not missing_columns:
+                    print("✅ La estructura del Excel ya está actualizada.")
+                    return True
+                
+                print(f"📝 Agregando columnas faltantes: {missing_columns}")
+                
+                # Agregar columnas faltantes con valores por defecto
+                for col in missing_columns:
+                    if col == 'Ubicacion':
+                        df[col] = 'No especificada'
+                    elif col == 'VelocidadMmDia':
+                        df[col] = '0'
+                    elif col == 'Usuario':
+                        df[col] = 'admin'
+                    elif col == 'FechaRegistro':
+                        from datetime import datetime
+                        df[col] = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+                    elif col == 'HojaOrigen':
+                        df[col] = 'Alertas'
+                    elif col == 'AlertaId':
+                        df[col] = None  # Se asigna al guardar (ensure_alert_ids)
+                    else:
+                        df[col] = ''
+                
+                # Reordenar columnas según el orden esperado
+                df_reordered = pd.DataFrame()
+                for col in expected_columns:
+                    if col in df.columns:
+                        df_reordered[col] = df[col]
+                
+                # Guardar archivo actualizado
+                self._save_formatted_excel(df_reordered)
             
             print(f"✅ Excel actualizado correctamente. Agregadas {len(missing_columns)} columnas.")
             return True
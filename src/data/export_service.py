@@ -0,0 +1,191 @@
+"""
+Exportación de alertas a xlsx (con formato), CSV y Parquet (si pyarrow está instalado)
+Escribe exactamente las filas indicadas (vista filtrada o selección) por bloques,
+sin copiar el DataFrame completo: el xlsx usa el modo write-only de openpyxl
+(memoria constante) y Parquet se escribe por grupos de filas. Admite progreso y
+cancelación para ejecutarse en un thread.
+"""
+
+import os
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Alignment
+from openpyxl.utils import get_column_letter
+
+from src.data.excel_manager import parse_fecha_hora
+
+# Formatos disponibles: extensión -> descripción para el diálogo de guardado
+EXPORT_FORMATS = {
+    'xlsx': "Excel Files (*.xlsx)",
+    'csv': "CSV (*.csv)",
+}
+# Parquet solo se ofrece si está instalada su dependencia opcional
+if find_spec('pyarrow') is not None:
+    EXPORT_FORMATS['parquet'] = "Parquet (*.parquet)"
+# Filas que se procesan por bloque
+CHUNK_ROWS = 5000
+
+# Formato del xlsx (igual al del archivo de alertas)
+HEADER_FILL = PatternFill(start_color="2E8B57", end_color="2E8B57", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_ALIGNMENT = Alignment(horizontal="center")
+ALERT_STYLES = {
+    'Amarilla': (PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid"), Font(color="000000", bold=True)),
+    'Naranja': (PatternFill(start_color="FF8C00", end_color="FF8C00", fill_type="solid"), Font(color="FFFFFF", bold=True)),
+    'Roja': (PatternFill(start_color="DC143C", end_color="DC143C", fill_type="solid"), Font(color="FFFFFF", bold=True)),
+}
+COLUMN_WIDTHS = {
+    'FechaHora': 18, 'TipoAlerta': 12, 'Condicion': 15, 'Ubicacion': 25, 'VelocidadMmDia': 10,
+    'Respaldo': 18, 'Colapso': 12, 'FechaHoraColapso': 18, 'Evacuacion': 12,
+    'CronologiaAnalisis': 30, 'Observaciones': 30, 'Usuario': 15,
+}
+
+
+def format_for_path(file_path: str) -> Optional[str]:
+    """Formato de exportación según la extensión del archivo"""
+    extension = Path(file_path).suffix.lower().lstrip('.')
+    return extension if extension in EXPORT_FORMATS else None
+
+
+class ExportCancelled(Exception):
+    """El usuario canceló la exportación"""
+
+
+class ExportService:
+    """Exporta filas de un DataFrame de alertas
+    
+    positions: posiciones (iloc) de las filas a exportar, en el orden de la vista;
+    None exporta todas. columns: columnas a incluir (por defecto todas).
+    """
+    
+    def __init__(self, df: pd.DataFrame, positions: Optional[Sequence[int]] = None,
+                 columns: Optional[List[str]] = None):
+        self.df = df
+        self.positions = np.arange(len(df)) if positions is None else np.asarray(positions, dtype=np.int64)
+        self.columns = [col for col in (columns or list(df.columns)) if col in df.columns]
+        self._column_positions = [df.columns.get_loc(col) for col in self.columns]
+        
+    def __len__(self) -> int:
+        return len(self.positions)
+        
+    def chunks(self):
+        """Bloques de filas a exportar (solo se copia un bloque a la vez)"""
+        for start in range(0, len(self.positions), CHUNK_ROWS):
+            rows = self.positions[start:start + CHUNK_ROWS]
+            yield start + len(rows), self.df.iloc[rows, self._column_positions]
+            
+    # ---------------------------- Exportación ---------------------------- #
+    def export(self, file_path: str, file_format: Optional[str] = None,
+               progress: Optional[Callable[[int], None]] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None) -> Tuple[bool, str]:
+        """Escribe el archivo; devuelve (éxito, mensaje)
+        
+        Se escribe en un archivo temporal que reemplaza al destino solo si termina bien.
+        """
+        file_format = file_format or format_for_path(file_path)
+        writers = {'xlsx': self._write_xlsx, 'csv': self._write_csv, 'parquet': self._write_parquet}
+        if file_format not in writers:
+            return False, f"Formato no soportado: {Path(file_path).suffix or file_path}"
+            
+        temp_path = f"{file_path}.tmp"
+        total = max(len(self.positions), 1)
+        
+        def advance(done: int):
+            if is_cancelled is not None and is_cancelled():
+                raise ExportCancelled()
+            if progress is not None:
+                progress(int(done * 100 / total))
+                
+        try:
+            writers[file_format](temp_path, advance)
+            os.replace(temp_path, file_path)
+            return True, f"Se exportaron {len(self.positions)} alertas a {Path(file_path).name}"
+        except ExportCancelled:
+            return False, "Exportación cancelada"
+        except ImportError as e:
+            return False, f"Falta una dependencia para exportar a {file_format}: {e}"
+        except Exception as e:
+            return False, f"Error al exportar: {e}"
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+                
+    @staticmethod
+    def _format_dates(chunk: pd.DataFrame) -> pd.DataFrame:
+        """FechaHora como dd/mm/yyyy hh:mm (como en el archivo de alertas)"""
+        if 'FechaHora' not in chunk.columns:
+            return chunk
+        fechas = parse_fecha_hora(chunk['FechaHora'])
+        chunk = chunk.copy()
+        chunk['FechaHora'] = fechas.dt.strftime('%d/%m/%Y %H:%M').where(fechas.notna(), chunk['FechaHora'])
+        return chunk
+        
+    def _write_xlsx(self, path: str, advance: Callable[[int], None]):
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Alertas")
+        
+        # Los anchos deben definirse antes de escribir filas en modo write-only
+        for index, column in enumerate(self.columns, 1):
+            ws.column_dimensions[get_column_letter(index)].width = COLUMN_WIDTHS.get(column, 15)
+            
+        header = []
+        for column in self.columns:
+            cell = WriteOnlyCell(ws, value=column)
+            cell.fill, cell.font, cell.alignment = HEADER_FILL, HEADER_FONT, HEADER_ALIGNMENT
+            header.append(cell)
+        ws.append(header)
+        
+        type_column = self.columns.index('TipoAlerta') if 'TipoAlerta' in self.columns else None
+        for done, chunk in self.chunks():
+            chunk = self._format_dates(chunk).astype(object)
+            for row in chunk.where(chunk.notna(), None).itertuples(index=False, name=None):
+                if type_column is not None and row[type_column] in ALERT_STYLES:
+                    cell = WriteOnlyCell(ws, value=row[type_column])
+                    cell.fill, cell.font = ALERT_STYLES[row[type_column]]
+                    row = row[:type_column] + (cell,) + row[type_column + 1:]
+                ws.append(row)
+            advance(done)
+            
+        wb.save(path)
+        
+    def _write_csv(self, path: str, advance: Callable[[int], None]):
+        # utf-8-sig para que Excel reconozca las tildes al abrir el CSV
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            for done, chunk in self.chunks():
+                self._format_dates(chunk).to_csv(f, header=(done <= CHUNK_ROWS), index=False)
+                advance(done)
+            if not len(self.positions):
+                pd.DataFrame(columns=self.columns).to_csv(f, index=False)
+                
+    def _write_parquet(self, path: str, advance: Callable[[int], None]):
+        import pyarrow as pa  # Dependencia opcional (solo para Parquet)
+        import pyarrow.parquet as pq
+        
+        # Columnas de texto como string en todos los bloques para que el esquema coincida
+        text_columns = [col for col in self.columns if self.df[col].dtype == object]
+        
+        def to_table(chunk: pd.DataFrame):
+            chunk = chunk.copy()
+            for col in text_columns:
+                chunk[col] = chunk[col].map(lambda value: None if pd.isna(value) else str(value)).astype('string')
+            return pa.Table.from_pandas(chunk, preserve_index=False)
+            
+        writer = None
+        try:
+            for done, chunk in self.chunks():
+                table = to_table(chunk)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                advance(done)
+            if writer is None:
+                pq.write_table(to_table(self.df.iloc[:0][self.columns]), path)
+        finally:
+            if writer is not None:
+                writer.close()
@@ -0,0 +1,136 @@
+"""
+Motor de filtros para los datos de alertas en memoria
+Precalcula, por columna, las posiciones de las filas de cada valor (códigos ordenados)
+y un índice ordenado de fechas; cada combinación de filtros se resuelve con
+operaciones vectorizadas sobre máscaras booleanas, sin copiar el DataFrame
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.excel_manager import parse_fecha_hora
+
+class _ValueIndex:
+    """Posiciones de las filas de cada valor de una columna
+    
+    order contiene las posiciones agrupadas por valor; las de valor k están en
+    order[starts[k]:starts[k + 1]].
+    """
+    
+    def __init__(self, values: pd.Series):
+        codes, uniques = pd.factorize(values, sort=True)
+        self.values = list(uniques)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+        
+        # Los valores vacíos (código -1) no pertenecen a ningún grupo
+        positions = np.flatnonzero(codes >= 0)
+        sort = np.argsort(codes[positions], kind='stable')
+        self.order = positions[sort]
+        self.starts = np.searchsorted(codes[positions][sort], np.arange(len(self.values) + 1))
+        
+    def positions(self, value) -> np.ndarray:
+        code = self.codes.get(value)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self.order[self.starts[code]:self.starts[code + 1]]
+
+
+class FilterEngine:
+    """Filtros combinables (AND entre columnas, OR entre valores de una columna)
+    
+    Sirve para cualquier columna categórica (TipoAlerta, Condicion, Usuario, Ubicacion,
+    Colapso, Evacuacion, Año, Mes...); el índice de cada una se crea en su primer uso.
+    
+    Uso:
+        engine = FilterEngine(df)
+        mask = engine.mask({'TipoAlerta': 'Roja', 'Año': 2024}, start=desde, end=hasta)
+        mask |= engine.match('Condicion', ['Crítica'])
+        filtrado = engine.frame(mask)
+    """
+    
+    def __init__(self, df: pd.DataFrame, date_column: str = 'FechaHora'):
+        self.df = df
+        self.size = len(df)
+        self.date_column = date_column if date_column in df.columns else None
+        self._value_indexes: Dict[str, _ValueIndex] = {}
+        self._date_order = None
+        self._date_values = None
+        
+    # ---------------------------- Índices (se crean al primer uso) ---------------------------- #
+    def _value_index(self, column: str) -> _ValueIndex:
+        if column not in self._value_indexes:
+            self._value_indexes[column] = _ValueIndex(self.df[column])
+        return self._value_indexes[column]
+        
+    def _date_index(self):
+        if self._date_order is None:
+            fechas = parse_fecha_hora(self.df[self.date_column]).to_numpy(dtype='datetime64[ns]')
+            valid = np.flatnonzero(~np.isnat(fechas))
+            self._date_order = valid[np.argsort(fechas[valid], kind='stable')]
+            self._date_values = fechas[self._date_order]
+        return self._date_order, self._date_values
+        
+    # ---------------------------- Consultas ---------------------------- #
+    def values(self, column: str) -> List:
+        """Valores distintos de una columna, ordenados (para poblar filtros)"""
+        if column not in self.df.columns or self.size == 0:
+            return []
+        return list(self._value_index(column).values)
+        
+    def match(self, column: str, values) -> np.ndarray:
+        """Máscara de las filas cuyo valor en la columna es alguno de los indicados"""
+        mask = np.zeros(self.size, dtype=bool)
+        if column not in self.df.columns:
+            return mask
+            
+        if isinstance(values, (str, int, float)) or values is None:
+            values = [values]
+            
+        index = self._value_index(column)
+        for value in values:
+            mask[index.positions(value)] = True
+        return mask
+        
+    def date_range(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+        """Máscara de las filas con fecha en [start, end) (búsqueda binaria sobre fechas ordenadas)"""
+        mask = np.zeros(self.size, dtype=bool)
+        if self.date_column is None:
+            return mask
+            
+        order, fechas = self._date_index()
+        low = 0 if start is None else np.searchsorted(fechas, np.datetime64(pd.Timestamp(start)), 'left')
+        high = len(fechas) if end is None else np.searchsorted(fechas, np.datetime64(pd.Timestamp(end)), 'left')
+        mask[order[low:high]] = True
+        return mask
+        
+    def mask(self, filters: Optional[Dict] = None, start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> np.ndarray:
+        """Máscara de la combinación de filtros; se ignoran los valores None y las columnas ausentes
+        
+        filters: {columna: valor o lista de valores}
+        """
+        mask = np.ones(self.size, dtype=bool)
+        
+        for column, values in (filters or {}).items():
+            if values is None or column not in self.df.columns:
+                continue
+            mask &= self.match(column, values)
+            
+        if start is not None or end is not None:
+            mask &= self.date_range(start, end)
+            
+        return mask
+        
+    def positions(self, filters: Optional[Dict] = None, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> np.ndarray:
+        """Posiciones de las filas que cumplen los filtros"""
+        return np.flatnonzero(self.mask(filters, start, end))
+        
+    def frame(self, mask: np.ndarray) -> pd.DataFrame:
+        """Filas del DataFrame que cumplen la máscara"""
+        if mask.all():
+            return self.df
+        return self.df.iloc[np.flatnonzero(mask)]
@@ -0,0 +1,355 @@
+"""
+Ejecución asíncrona de consultas SQL personalizadas
+Pool de workers con cancelación, timeout, límite de filas, resultados parciales
+y caché LRU de resultados con expiración (TTL)
+"""
+
+import re
+import math
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+import sqlalchemy
+
+# Filas por bloque al leer resultados (cada bloque se entrega a on_chunk)
+DEFAULT_CHUNK_SIZE = 5000
+# Caché de resultados: cantidad de consultas y vigencia de cada resultado
+DEFAULT_CACHE_ENTRIES = 64
+DEFAULT_CACHE_TTL_SECONDS = 300
+# Instrucciones SQLite entre verificaciones de cancelación/timeout
+SQLITE_PROGRESS_STEPS = 10000
+
+# Literales entre comillas simples (con '' escapadas) que no se normalizan
+_SQL_LITERAL = re.compile(r"('(?:[^']|'')*')")
+# Literales, identificadores entre comillas/corchetes y comentarios (no son palabras clave)
+_SQL_NON_CODE = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"|\[[^\]]*\]|--[^\n]*|/\*.*?\*/", re.DOTALL)
+_SQL_WORD = re.compile(r"[a-z_]+")
+# Verbos que inician la sentencia principal de un WITH
+_STATEMENT_VERBS = {'select', 'insert', 'update', 'delete', 'merge'}
+
+
+class QueryCancelledError(Exception):
+    """La consulta fue cancelada o superó su tiempo máximo"""
+
+
+class CancellationToken:
+    """Señal compartida para cancelar una consulta en curso"""
+    
+    def __init__(self):
+        self._event = threading.Event()
+        
+    def cancel(self):
+        """Solicita la cancelación"""
+        self._event.set()
+        
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+def freeze_params(value):
+    """Versión hashable de los parámetros (listas para IN (...) pasan a tuplas)"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze_params(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [freeze_params(item) for item in value]
+        return tuple(sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items)
+    return value
+
+
+def normalize_sql(query: str) -> str:
+    """Normaliza una consulta para usarla como clave de caché
+    
+    Colapsa espacios, pasa a minúsculas y quita el ';' final fuera de los literales,
+    de modo que variantes de formato de la misma consulta compartan resultado.
+    """
+    parts = _SQL_LITERAL.split(query.strip().rstrip(';').strip())
+    return "".join(
+        part if index % 2 else re.sub(r"\s+", " ", part).lower()
+        for index, part in enumerate(parts)
+    )
+
+
+def is_read_only(query: str) -> bool:
+    """Indica si la consulta es de solo lectura y por lo tanto cacheable
+    
+    Lo es un SELECT, o un WITH cuya sentencia principal (la que sigue a las CTE) es un
+    SELECT: WITH ... DELETE/UPDATE/INSERT escribe. SELECT ... INTO y varias sentencias
+    separadas por ';' se tratan como escrituras.
+    """
+    code = _SQL_NON_CODE.sub(' ', query).strip().rstrip(';').lower()
+    if ';' in code:
+        return False
+        
+    # Palabras fuera de paréntesis: los cuerpos de las CTE y las subconsultas quedan fuera
+    depth = 0
+    outer = []
+    for char in code:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            outer.append(char)
+            continue
+        outer.append(' ')
+    words = _SQL_WORD.findall(''.join(outer))
+    
+    if not words or words[0] not in ('select', 'with'):
+        return False
+    verb = next((word for word in words if word in _STATEMENT_VERBS), None)
+    return verb == 'select' and 'into' not in words
+
+
+class QueryResultCache:
+    """Caché LRU de resultados con TTL, segura entre threads
+    
+    Las claves incluyen un espacio de nombres (la base de datos) para poder
+    invalidar solo los resultados de una conexión tras escribir en ella.
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES,
+                 ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        
+    @staticmethod
+    def make_key(namespace: str, query: str, params: Optional[Dict] = None,
+                 max_rows: Optional[int] = None) -> Optional[tuple]:
+        """Clave: base de datos + SQL normalizado + parámetros + límite de filas
+        
+        None si algún parámetro no es hashable (la consulta se ejecuta sin caché).
+        """
+        key = namespace, normalize_sql(query), freeze_params(params or {}), max_rows
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+        
+    def get(self, key: tuple) -> Optional[Tuple[pd.DataFrame, bool]]:
+        """Resultado vigente (DataFrame, truncado) o None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+                
+            stored_at, df, truncated = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+                
+            self._entries.move_to_end(key)
+            return df.copy(), truncated
+            
+    def put(self, key: tuple, df: pd.DataFrame, truncated: bool):
+        """Guarda un resultado, descartando el menos usado si se supera el máximo"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), df.copy(), truncated)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                
+    def invalidate(self, namespace: Optional[str] = None):
+        """Descarta los resultados de una base de datos (o todos)"""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == namespace]:
+                del self._entries[key]
+                
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# Caché compartida por todos los SQLManager del proceso
+result_cache = QueryResultCache()
+
+
+class QueryExecutor:
+    """Ejecuta consultas en un pool de threads sobre el engine de un SQLManager"""
+    
+    def __init__(self, sql_manager, max_workers: int = 2,
+                 cache: Optional[QueryResultCache] = None):
+        self.sql_manager = sql_manager
+        self.cache = cache if cache is not None else result_cache
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix="consulta_sql")
+                                        
+    def submit(self, query: str, params: Optional[Dict] = None, max_rows: Optional[int] = None,
+               timeout: Optional[float] = None, token: Optional[CancellationToken] = None,
+               on_chunk: Optional[Callable[[pd.DataFrame], None]] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, use_cache: bool = True) -> Future:
+        """Encola una consulta; el Future entrega (éxito, mensaje, DataFrame)
+        
+        on_chunk recibe cada bloque de filas a medida que llega (desde el thread del pool).
+        """
+        return self._pool.submit(self.execute, query, params, max_rows, timeout,
+                                 token, on_chunk, chunk_size, use_cache)
+                                 
+    def execute(self, query: str, params: Optional[Dict] = None, max_rows: Optional[int] = None,
+                timeout: Optional[float] = None, token: Optional[CancellationToken] = None,
+                on_chunk: Optional[Callable[[pd.DataFrame], None]] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE,
+                use_cache: bool = True) -> Tuple[bool, str, pd.DataFrame]:
+        """Ejecuta una consulta en el thread actual"""
+        token = token or CancellationToken()
+        namespace = self.sql_manager.cache_namespace()
+        key = self.cache.make_key(namespace, query, params, max_rows)
+        cacheable = use_cache and key is not None and is_read_only(query)
+        
+        try:
+            if cacheable:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    df, truncated = cached
+                    if on_chunk is not None and not df.empty:
+                        on_chunk(df)
+                    return True, self._result_message(df, truncated, cached=True), df
+                    
+            if not is_read_only(query):
+                return self._execute_write(query, params, timeout, token)
+                
+            df, truncated = self._fetch(query, params, max_rows, timeout, token,
+                                        on_chunk, chunk_size)
+                                        
+            if cacheable:
+                self.cache.put(key, df, truncated)
+                
+            return True, self._result_message(df, truncated), df
+            
+        except QueryCancelledError as e:
+            return False, str(e), pd.DataFrame()
+        except Exception as e:
+            if token.is_cancelled:
+                return False, "Consulta cancelada", pd.DataFrame()
+            return False, f"Error ejecutando consulta: {str(e)}", pd.DataFrame()
+            
+    def _fetch(self, query: str, params: Optional[Dict], max_rows: Optional[int],
+               timeout: Optional[float], token: CancellationToken,
+               on_chunk: Optional[Callable[[pd.DataFrame], None]],
+               chunk_size: int) -> Tuple[pd.DataFrame, bool]:
+        """Lee el resultado por bloques verificando cancelación, timeout y límite de filas"""
+        deadline = time.monotonic() + timeout if timeout else None
+        chunks = []
+        row_count = 0
+        truncated = False
+        
+        engine = self.sql_manager._get_engine()
+        with engine.connect() as conn:
+            self._install_interrupt(conn, token, deadline)
+            try:
+                result = conn.execution_options(stream_results=True).execute(
+                    sqlalchemy.text(query), params or {}
+                )
+                columns = list(result.keys())
+                
+                while True:
+                    self._check(token, deadline)
+                    
+                    fetch_size = chunk_size
+                    if max_rows is not None:
+                        fetch_size = min(chunk_size, max_rows - row_count + 1)
+                        
+                    rows = result.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                        
+                    if max_rows is not None and row_count + len(rows) > max_rows:
+                        rows = rows[:max_rows - row_count]
+                        truncated = True
+                        
+                    chunk = pd.DataFrame.from_records(rows, columns=columns)
+                    chunks.append(chunk)
+                    row_count += len(chunk)
+                    
+                    if on_chunk is not None and not chunk.empty:
+                        on_chunk(chunk)
+                        
+                    if truncated:
+                        break
+                        
+                result.close()
+            except sqlalchemy.exc.DBAPIError:
+                # Interrupción del motor: informar si fue por cancelación o timeout
+                self._check(token, deadline)
+                raise
+            finally:
+                self._remove_interrupt(conn)
+                
+        if not chunks:
+            return pd.DataFrame(columns=columns), False
+        return pd.concat(chunks, ignore_index=True), truncated
+        
+    def _execute_write(self, query: str, params: Optional[Dict], timeout: Optional[float],
+                       token: CancellationToken) -> Tuple[bool, str, pd.DataFrame]:
+        """Ejecuta una sentencia de escritura e invalida la caché de esta base de datos"""
+        deadline = time.monotonic() + timeout if timeout else None
+        
+        with self.sql_manager._get_engine().begin() as conn:
+            self._install_interrupt(conn, token, deadline)
+            try:
+                result = conn.execute(sqlalchemy.text(query), params or {})
+                affected = result.rowcount
+            except sqlalchemy.exc.DBAPIError:
+                self._check(token, deadline)
+                raise
+            finally:
+                self._remove_interrupt(conn)
+                
+        self.sql_manager.invalidate_query_cache()
+        return True, f"Sentencia ejecutada ({affected} filas afectadas)", pd.DataFrame()
+        
+    def _check(self, token: CancellationToken, deadline: Optional[float]):
+        """Lanza QueryCancelledError si corresponde detener la lectura"""
+        if token.is_cancelled:
+            raise QueryCancelledError("Consulta cancelada")
+        if deadline is not None and time.monotonic() > deadline:
+            raise QueryCancelledError("Tiempo máximo de consulta excedido")
+            
+    def _install_interrupt(self, conn, token: CancellationToken, deadline: Optional[float]):
+        """Permite interrumpir la consulta dentro del motor, no solo entre bloques
+        
+        SQLite consulta un progress handler durante la ejecución; en SQL Server
+        (pyodbc) se usa el timeout de consulta de la conexión.
+        """
+        dbapi_conn = conn.connection.dbapi_connection
+        
+        if hasattr(dbapi_conn, "set_progress_handler"):
+            def should_abort():
+                expired = deadline is not None and time.monotonic() > deadline
+                return 1 if token.is_cancelled or expired else 0
+                
+            dbapi_conn.set_progress_handler(should_abort, SQLITE_PROGRESS_STEPS)
+        elif deadline is not None and hasattr(dbapi_conn, "timeout"):
+            dbapi_conn.timeout = max(1, math.ceil(deadline - time.monotonic()))
+            
+    def _remove_interrupt(self, conn):
+        """Restaura la conexión antes de devolverla al pool"""
+        dbapi_conn = conn.connection.dbapi_connection
+        
+        if hasattr(dbapi_conn, "set_progress_handler"):
+            dbapi_conn.set_progress_handler(None, SQLITE_PROGRESS_STEPS)
+        elif hasattr(dbapi_conn, "timeout"):
+            dbapi_conn.timeout = 0
+            
+    def _result_message(self, df: pd.DataFrame, truncated: bool, cached: bool = False) -> str:
+        """Mensaje de resultado para la interfaz"""
+        message = f"Consulta ejecutada correctamente ({len(df)} filas"
+        if truncated:
+            message += ", resultado truncado"
+        if cached:
+            message += ", desde caché"
+        return message + ")"
+        
+    def shutdown(self, wait: bool = False):
+        """Libera el pool de threads"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,201 @@
+"""
+Proveedores de consultas para el Dashboard
+Aplican los filtros (año, mes, tipo) y calculan los agregados sobre el Excel en memoria
+o directamente en SQL con GROUP BY, de modo que solo viajan resultados pequeños
+"""
+
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import select, func, case, extract
+
+from src.data.excel_manager import ExcelManager
+from src.data.sql_manager import SQLManager, load_database_settings
+from src.data.filter_engine import FilterEngine
+from src.data.aggregate_cube import AggregateCube
+
+# Ventana del KPI de alertas recientes (31 días para incluir el día 30 completo)
+RECENT_DAYS = 31
+
+# Columnas del agregado base: una fila por combinación con su cantidad
+GROUP_COLUMNS = ['TipoAlerta', 'Condicion', 'Usuario', 'MesNumero', 'Reciente']
+
+
+def recent_cutoff() -> datetime:
+    """Inicio (medianoche) de la ventana de alertas recientes"""
+    today = datetime.now().date()
+    return datetime.combine(today - timedelta(days=RECENT_DAYS), datetime.min.time())
+
+
+def empty_aggregates() -> Dict:
+    """Agregados para un conjunto vacío"""
+    return summarize_groups(pd.DataFrame(columns=GROUP_COLUMNS + ['total']))
+
+
+def summarize_groups(grouped: pd.DataFrame) -> Dict:
+    """Convierte el agregado base (GROUP_COLUMNS + total) en los datos del Dashboard
+    
+    Las series por tipo, condición y usuario quedan ordenadas de mayor a menor
+    (igual que value_counts); by_month se indexa por número de mes (1-12).
+    """
+    def counts_by(column: str) -> pd.Series:
+        counts = grouped.dropna(subset=[column]).groupby(column)['total'].sum()
+        return counts.astype(int).sort_values(ascending=False, kind='stable').rename(None)
+        
+    by_month = grouped.dropna(subset=['MesNumero']).groupby('MesNumero')['total'].sum()
+    by_month.index = by_month.index.astype(int)
+    
+    return {
+        'total': int(grouped['total'].sum()),
+        'by_type': counts_by('TipoAlerta'),
+        'by_condition': counts_by('Condicion'),
+        'by_user': counts_by('Usuario'),
+        'by_month': by_month.astype(int).sort_index().rename(None),
+        'recent': int(grouped.loc[grouped['Reciente'] == 1, 'total'].sum())
+    }
+
+
+class DataFrameQueryProvider:
+    """Filtra en memoria sobre los datos cargados del Excel; los agregados salen del cubo"""
+    
+    source_name = "Excel"
+    
+    def __init__(self, excel_manager: ExcelManager):
+        self.excel_manager = excel_manager
+        self.data = pd.DataFrame()
+        self.filter_engine = FilterEngine(self.data)
+        # Cubo compartido: se mantiene al día con cada guardado del Excel
+        self.cube = AggregateCube.for_excel(excel_manager)
+        
+    def reload(self) -> int:
+        """Recarga los datos desde Excel; devuelve la cantidad de filas"""
+        self.data = self.excel_manager.load_data()
+        self.filter_engine = FilterEngine(self.data)
+        data_version = self.excel_manager.data_version
+        if self.cube.data_version != data_version:
+            self.cube.update_from_frame(self.data, data_version)
+        return len(self.data)
+        
+    def available_years(self) -> List[int]:
+        """Años con alertas, ordenados"""
+        return sorted({int(year) for year in self.filter_engine.values('Año')})
+        
+    def available_types(self) -> List[str]:
+        """Tipos de alerta presentes, ordenados"""
+        return sorted(str(tipo) for tipo in self.filter_engine.values('TipoAlerta'))
+        
+    def filter_data(self, year: Optional[int] = None, month: Optional[int] = None,
+                    alert_type: Optional[str] = None) -> pd.DataFrame:
+        """Filas que cumplen los filtros"""
+        if self.data.empty:
+            return pd.DataFrame()
+            
+        mask = self.filter_engine.mask({'Año': year, 'Mes': month, 'TipoAlerta': alert_type})
+        return self.filter_engine.frame(mask)
+        
+    def aggregates(self, year: Optional[int] = None, month: Optional[int] = None,
+                   alert_type: Optional[str] = None) -> Dict:
+        """Agregados del Dashboard para los filtros indicados (suma sobre el cubo, sin filtrar filas)"""
+        return self.cube.aggregates(year, month, alert_type, recent_since=recent_cutoff())
+
+
+class SQLQueryProvider:
+    """Empuja filtros y agregados a SQL (GROUP BY); solo se transfieren los conteos"""
+    
+    source_name = "SQL"
+    
+    def __init__(self, sql_manager: SQLManager):
+        self.sql_manager = sql_manager
+        self.table = sql_manager.alerts_table
+        
+    def reload(self) -> int:
+        """Verifica la tabla; devuelve la cantidad de registros"""
+        if not self.sql_manager._create_table_if_not_exists():
+            raise RuntimeError("No se pudo acceder a la tabla SQL")
+            
+        with self.sql_manager._get_engine().connect() as conn:
+            query = select(func.count()).select_from(self.table).where(self.sql_manager.active_condition())
+            return int(conn.execute(query).scalar())
+            
+    def available_years(self) -> List[int]:
+        """Años con alertas, ordenados"""
+        year = extract('year', self.table.c.FechaHora)
+        query = select(year).where(self.table.c.FechaHora.is_not(None),
+                                   self.sql_manager.active_condition()).distinct()
+        
+        with self.sql_manager._get_engine().connect() as conn:
+            return sorted(int(row[0]) for row in conn.execute(query))
+            
+    def available_types(self) -> List[str]:
+        """Tipos de alerta presentes, ordenados"""
+        query = select(self.table.c.TipoAlerta).where(self.table.c.TipoAlerta.is_not(None),
+                                                      self.sql_manager.active_condition()).distinct()
+        
+        with self.sql_manager._get_engine().connect() as conn:
+            return sorted(str(row[0]) for row in conn.execute(query))
+            
+    def _filter_conditions(self, year: Optional[int], month: Optional[int],
+                           alert_type: Optional[str]) -> list:
+        """Condiciones WHERE; el año se expresa como rango para aprovechar el índice de FechaHora"""
+        fecha = self.table.c.FechaHora
+        conditions = [self.sql_manager.active_condition()]
+        
+        if year is not None:
+            conditions.append(fecha >= datetime(year, 1, 1))
+            conditions.append(fecha < datetime(year + 1, 1, 1))
+        if month is not None:
+            conditions.append(extract('month', fecha) == month)
+        if alert_type is not None:
+            conditions.append(self.table.c.TipoAlerta == alert_type)
+            
+        return conditions
+        
+    def filter_data(self, year: Optional[int] = None, month: Optional[int] = None,
+                    alert_type: Optional[str] = None) -> pd.DataFrame:
+        """Filas que cumplen los filtros, en el formato del Excel"""
+        query = select(self.table).where(*self._filter_conditions(year, month, alert_type))
+        
+        with self.sql_manager._get_engine().connect() as conn:
+            df = pd.read_sql(query, conn)
+            
+        return self.sql_manager._from_sql_frame(df)
+        
+    def aggregates(self, year: Optional[int] = None, month: Optional[int] = None,
+                   alert_type: Optional[str] = None) -> Dict:
+        """Agregados del Dashboard calculados en una sola consulta GROUP BY"""
+        table = self.table
+        
+        # Subconsulta con las expresiones calculadas (SQL Server no agrupa por
+        # expresiones con parámetros)
+        alertas = select(
+            table.c.TipoAlerta,
+            table.c.Condicion,
+            table.c.Usuario,
+            extract('month', table.c.FechaHora).label('MesNumero'),
+            case((table.c.FechaHora >= recent_cutoff(), 1), else_=0).label('Reciente')
+        ).where(*self._filter_conditions(year, month, alert_type)).subquery('alertas')
+        
+        group_columns = [alertas.c[column] for column in GROUP_COLUMNS]
+        query = select(*group_columns, func.count().label('total')).group_by(*group_columns)
+        
+        with self.sql_manager._get_engine().connect() as conn:
+            grouped = pd.read_sql(query, conn)
+            
+        if grouped.empty:
+            return empty_aggregates()
+            
+        return summarize_groups(grouped)
+
+
+def create_query_provider(excel_manager: ExcelManager, database_settings: Optional[Dict] = None):
+    """Proveedor según la configuración: SQL si dashboard_from_sql está activo y configurado"""
+    if database_settings is None:
+        database_settings = load_database_settings()
+        
+    if database_settings.get("dashboard_from_sql", False):
+        sql_manager = SQLManager.from_settings(database_settings, excel_manager)
+        if sql_manager.is_configured():
+            return SQLQueryProvider(sql_manager)
+        print("⚠️ Dashboard desde SQL activado pero la conexión no está configurada; usando Excel")
+        
+    return DataFrameQueryProvider(excel_manager)
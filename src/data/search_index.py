@@ -0,0 +1,308 @@
+"""
+Índice invertido de texto completo sobre las narrativas de las alertas
+(Observaciones, CronologiaAnalisis, Ubicacion)
+
+Los términos se normalizan (minúsculas, sin tildes) y se reducen con un stemmer
+liviano para español, de modo que "grietas" encuentra "Grieta". Consultas:
+    grieta radar           ambos términos (AND)
+    grieta OR radar        cualquiera de los dos
+    "sector norte"         frase exacta
+    desliz*                prefijo
+El índice se guarda junto al Excel y se actualiza solo con las alertas que cambian.
+"""
+
+import re
+import json
+import hashlib
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from src.data.excel_manager import ExcelManager, legacy_alert_ids
+from src.utils.text_search import SEARCH_COLUMNS, fold_text, build_search_text
+
+# Versión del formato del archivo; al cambiar el tokenizador se reconstruye el índice
+# (2: se guardan las palabras sin reducir, que usan las búsquedas por prefijo)
+INDEX_FORMAT = 2
+
+# Sufijos que elimina el stemmer (del más largo al más corto)
+SPANISH_SUFFIXES = sorted([
+    'amientos', 'imientos', 'amiento', 'imiento', 'aciones', 'uciones', 'acion', 'ucion',
+    'adoras', 'adores', 'adora', 'ador', 'ancias', 'encias', 'ancia', 'encia',
+    'idades', 'idad', 'mente', 'ismos', 'ismo', 'istas', 'ista', 'ables', 'ibles', 'able', 'ible',
+    'osas', 'osos', 'osa', 'oso', 'ivas', 'ivos', 'iva', 'ivo', 'ando', 'iendo',
+    'adas', 'ados', 'idas', 'idos', 'ada', 'ado', 'ida', 'ido',
+    'es', 'as', 'os', 'a', 'o', 'e', 's'
+], key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+
+_WORD = re.compile(r'\w+')
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+OR_OPERATORS = {'OR', '|'}
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """Raíz aproximada de una palabra ya normalizada ("grietas" -> "griet")"""
+    if len(token) <= MIN_STEM_LENGTH or token.isdigit():
+        return token
+    for suffix in SPANISH_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(folded_text: str) -> List[str]:
+    """Términos (raíces) de un texto ya normalizado, en orden"""
+    return [stem(word) for word in _WORD.findall(folded_text)]
+
+
+def alert_ids_for(df: pd.DataFrame) -> pd.Series:
+    """AlertaId de cada fila; las filas sin ID usan el ID derivado de su contenido"""
+    if df.empty:
+        return pd.Series([], dtype=object, index=df.index)
+    if 'AlertaId' not in df.columns:
+        return legacy_alert_ids(df)
+    ids = df['AlertaId'].astype(object)
+    missing = ids.isna()
+    if missing.any():
+        ids = ids.copy()
+        ids[missing] = legacy_alert_ids(df[missing], taken=ids[~missing].astype(str))
+    return ids.astype(str)
+
+
+class SearchIndex:
+    """Índice término -> conjunto de documentos, con un documento por AlertaId"""
+    
+    def __init__(self, index_file: Optional[Path] = None):
+        self.index_file = Path(index_file) if index_file else None
+        self.dirty = False
+        # El listener de guardado puede ejecutarse en otro thread (sincronización automática)
+        self._lock = threading.RLock()
+        self._clear()
+        
+    def _clear(self):
+        self.doc_ids: List[Optional[str]] = []      # documento -> AlertaId (None si se eliminó)
+        self.doc_by_id: Dict[str, int] = {}
+        self.doc_words: Dict[int, List[str]] = {}   # palabras normalizadas, sin reducir
+        self.doc_terms: Dict[int, List[str]] = {}
+        self.doc_hashes: Dict[int, str] = {}
+        self.postings: Dict[str, Set[int]] = {}
+        # Los prefijos se buscan en las palabras completas: un prefijo parcial como
+        # "deslizami" no es prefijo de la raíz "desliz" de "deslizamiento"
+        self.word_postings: Dict[str, Set[int]] = {}
+        self._vocabulary: Optional[List[str]] = None  # palabras ordenadas (para prefijos)
+        
+    @classmethod
+    def for_excel(cls, excel_manager: ExcelManager) -> 'SearchIndex':
+        """Índice persistente del Excel, actualizado automáticamente en cada guardado"""
+        index = cls(excel_manager.excel_file.with_suffix('.search.json'))
+        index.load()
+        excel_manager.add_change_listener(index.on_data_saved)
+        return index
+        
+    # ---------------------------- Mantenimiento ---------------------------- #
+    def __len__(self) -> int:
+        return len(self.doc_by_id)
+        
+    def _add_document(self, alert_id: str, words: List[str], content_hash: str):
+        doc = len(self.doc_ids)
+        terms = [stem(word) for word in words]
+        self.doc_ids.append(alert_id)
+        self.doc_by_id[alert_id] = doc
+        self.doc_words[doc] = words
+        self.doc_terms[doc] = terms
+        self.doc_hashes[doc] = content_hash
+        for term in set(terms):
+            self.postings.setdefault(term, set()).add(doc)
+        for word in set(words):
+            if word not in self.word_postings:
+                self.word_postings[word] = set()
+                self._vocabulary = None
+            self.word_postings[word].add(doc)
+            
+    def _remove_document(self, alert_id: str):
+        doc = self.doc_by_id.pop(alert_id)
+        for term in set(self.doc_terms.pop(doc)):
+            docs = self.postings[term]
+            docs.discard(doc)
+            if not docs:
+                del self.postings[term]
+        for word in set(self.doc_words.pop(doc)):
+            docs = self.word_postings[word]
+            docs.discard(doc)
+            if not docs:
+                del self.word_postings[word]
+                self._vocabulary = None
+        self.doc_hashes.pop(doc, None)
+        self.doc_ids[doc] = None
+        
+    def update_from_frame(self, df: pd.DataFrame) -> Tuple[int, int, int]:
+        """Sincroniza el índice con los datos: (agregadas, actualizadas, eliminadas)
+        
+        Solo se tokenizan las alertas nuevas o cuyo texto cambió (se compara un
+        hash del texto normalizado).
+        """
+        texts = build_search_text(df, SEARCH_COLUMNS)
+        ids = alert_ids_for(df).tolist()
+        current = {}
+        for alert_id, text in zip(ids, texts):
+            current[alert_id] = (text, hashlib.md5(text.encode()).hexdigest())
+            
+        with self._lock:
+            added = updated = 0
+            removed_ids = [alert_id for alert_id in self.doc_by_id if alert_id not in current]
+            for alert_id in removed_ids:
+                self._remove_document(alert_id)
+                
+            for alert_id, (text, content_hash) in current.items():
+                doc = self.doc_by_id.get(alert_id)
+                if doc is not None:
+                    if self.doc_hashes.get(doc) == content_hash:
+                        continue
+                    self._remove_document(alert_id)
+                    updated += 1
+                else:
+                    added += 1
+                self._add_document(alert_id, _WORD.findall(text), content_hash)
+                
+            if added or updated or removed_ids:
+                self.dirty = True
+            return added, updated, len(removed_ids)
+        
+    def on_data_saved(self, df: pd.DataFrame):
+        """Listener de ExcelManager: actualiza y guarda el índice tras cada cambio"""
+        with self._lock:
+            self.update_from_frame(df)
+            self.save()
+        
+    # ---------------------------- Persistencia ---------------------------- #
+    def load(self) -> bool:
+        """Carga el índice guardado; si no existe o es de otro formato queda vacío"""
+        self._clear()
+        if self.index_file is None or not self.index_file.exists():
+            return False
+            
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('format') != INDEX_FORMAT:
+                return False
+            for alert_id, entry in stored.get('documents', {}).items():
+                self._add_document(alert_id, entry['words'], entry['hash'])
+            self.dirty = False
+            return True
+        except Exception as e:
+            print(f"⚠️ Índice de búsqueda ilegible, se reconstruirá: {e}")
+            self._clear()
+            return False
+            
+    def save(self):
+        """Guarda el índice (solo si cambió) de forma atómica"""
+        with self._lock:
+            if self.index_file is None or not self.dirty:
+                return
+                
+            documents = {
+                alert_id: {'hash': self.doc_hashes[doc], 'words': self.doc_words[doc]}
+                for alert_id, doc in self.doc_by_id.items()
+            }
+            temp_file = self.index_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'format': INDEX_FORMAT, 'documents': documents}, f, ensure_ascii=False)
+            temp_file.replace(self.index_file)
+            self.dirty = False
+        
+    # ---------------------------- Consultas ---------------------------- #
+    def _term_docs(self, term: str) -> Set[int]:
+        return self.postings.get(term, set())
+        
+    def _prefix_docs(self, prefix: str) -> Set[int]:
+        """Documentos con alguna palabra (sin reducir) que empieza con el prefijo"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.word_postings)
+            
+        docs = set()
+        position = bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(prefix):
+            docs |= self.word_postings[self._vocabulary[position]]
+            position += 1
+        return docs
+        
+    def _phrase_docs(self, terms: List[str]) -> Set[int]:
+        """Documentos que contienen los términos consecutivos"""
+        if not terms:
+            return set()
+        docs = set.intersection(*(self._term_docs(term) for term in terms))
+        if len(terms) == 1:
+            return docs
+            
+        size = len(terms)
+        return {
+            doc for doc in docs
+            if any(self.doc_terms[doc][i:i + size] == terms
+                   for i in range(len(self.doc_terms[doc]) - size + 1))
+        }
+        
+    def _parse(self, query: str, prefix_last: bool) -> List[List[Tuple[str, object]]]:
+        """Grupos OR de cláusulas AND: ('term' | 'prefix' | 'phrase', valor)"""
+        groups = [[]]
+        parts = list(_QUERY_PART.finditer(query))
+        
+        for number, match in enumerate(parts):
+            phrase, word = match.groups()
+            if phrase is not None:
+                groups[-1].append(('phrase', tokenize(fold_text(phrase))))
+                continue
+            if word in OR_OPERATORS:
+                groups.append([])
+                continue
+                
+            is_prefix = word.endswith('*') or (prefix_last and number == len(parts) - 1)
+            words = _WORD.findall(fold_text(word))
+            if not words:
+                continue
+            if is_prefix and len(words) == 1:
+                # El prefijo es una palabra incompleta: se normaliza pero no se reduce
+                groups[-1].append(('prefix', words[0]))
+            elif len(words) == 1:
+                groups[-1].append(('term', stem(words[0])))
+            else:
+                # "sector-5" o "N°3": las partes deben aparecer juntas
+                groups[-1].append(('phrase', [stem(part) for part in words]))
+                
+        return [group for group in groups if group]
+        
+    def search_docs(self, query: str, prefix_last: bool = False) -> Set[int]:
+        """Documentos que cumplen la consulta"""
+        with self._lock:
+            return self._search_docs(query, prefix_last)
+            
+    def _search_docs(self, query: str, prefix_last: bool) -> Set[int]:
+        result = set()
+        for group in self._parse(query, prefix_last):
+            group_docs = None
+            for kind, value in group:
+                if kind == 'term':
+                    docs = self._term_docs(value)
+                elif kind == 'prefix':
+                    docs = self._prefix_docs(value)
+                else:
+                    docs = self._phrase_docs(value)
+                group_docs = set(docs) if group_docs is None else group_docs & docs
+                if not group_docs:
+                    break
+            result |= group_docs or set()
+        return result
+        
+    def search(self, query: str, prefix_last: bool = False) -> Set[str]:
+        """AlertaId de las alertas que cumplen la consulta
+        
+        Con prefix_last la última palabra se trata como prefijo (búsqueda mientras se escribe).
+        """
+        with self._lock:
+            return {self.doc_ids[doc] for doc in self.search_docs(query, prefix_last)}
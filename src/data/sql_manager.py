@@ -1,53 +1,201 @@
 """
-Gestor para integración con SQL Server
+Gestor para integración con bases de datos SQL (SQL Server o SQLite)
 """
 
+import json
 import pandas as pd
 import sqlalchemy
-from sqlalchemy import create_engine, text, MetaData, Table, Column, String, DateTime, Text
+from sqlalchemy import (create_engine, select, func, case, extract, or_, MetaData, Table, Column,
+                        Index, String, Unicode, UnicodeText, DateTime, Float, Integer, Boolean)
+from sqlalchemy.dialects import mssql as mssql_types
+from sqlalchemy.engine import URL
+from sqlalchemy.pool import StaticPool
 from typing import Dict, Tuple, Optional
-from datetime import datetime
-import urllib.parse
+from datetime import datetime, timedelta
+from pathlib import Path
 
-from src.data.excel_manager import ExcelManager
+from src.data.excel_manager import ExcelManager, parse_fecha_hora, alert_key, legacy_alert_ids
+from src.data.query_executor import QueryExecutor, CancellationToken, result_cache
+
+# Dialectos soportados
+DIALECT_MSSQL = "mssql"
+DIALECT_SQLITE = "sqlite"
+SUPPORTED_DIALECTS = [DIALECT_MSSQL, DIALECT_SQLITE]
+
+# Configuración persistida por SettingsDialog
+SETTINGS_FILE = Path("config/settings.json")
+
+# Columnas propias de SQL que no se llevan al Excel (incluye metadatos de sincronización)
+SQL_ONLY_COLUMNS = ['id', 'FechaCreacionSQL', 'Version', 'ModificadoEn', 'Eliminado']
+
+# Columnas derivadas por ExcelManager.load_data que no se persisten
+DERIVED_COLUMNS = ['Año', 'Mes']
+
+# Columnas tipadas en SQL (en Excel se guardan como texto)
+DATETIME_COLUMNS = ['FechaHora', 'FechaHoraColapso', 'FechaRegistro']
+NUMERIC_COLUMNS = ['VelocidadMmDia']
+
+# Fecha/hora: DATETIME2 en SQL Server, DATETIME genérico en los demás motores
+TIMESTAMP_TYPE = DateTime().with_variant(mssql_types.DATETIME2(), "mssql")
+# Texto largo: NVARCHAR(max) en SQL Server (NTEXT está obsoleto)
+LONG_TEXT_TYPE = UnicodeText().with_variant(mssql_types.NVARCHAR(None), "mssql")
+
+
+def load_database_settings(settings_file: Path = SETTINGS_FILE) -> dict:
+    """Lee la sección 'database' de la configuración (vacía si no existe)"""
+    try:
+        if settings_file.exists():
+            with open(settings_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("database", {})
+    except Exception as e:
+        print(f"⚠️ Error leyendo configuración de base de datos: {str(e)}")
+    return {}
+
+
+def build_alerts_table(metadata: MetaData, table_name: str) -> Table:
+    """Define la estructura de la tabla de alertas"""
+    return Table(
+        table_name, metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('FechaHora', TIMESTAMP_TYPE),
+        Column('TipoAlerta', Unicode(20)),
+        Column('Condicion', Unicode(30)),
+        Column('Ubicacion', Unicode(100)),
+        Column('VelocidadMmDia', Float),
+        Column('Respaldo', LONG_TEXT_TYPE),
+        Column('Colapso', Unicode(10)),
+        Column('FechaHoraColapso', TIMESTAMP_TYPE),
+        Column('Evacuacion', Unicode(10)),
+        Column('CronologiaAnalisis', LONG_TEXT_TYPE),
+        Column('Observaciones', LONG_TEXT_TYPE),
+        Column('Usuario', Unicode(100)),
+        Column('FechaRegistro', TIMESTAMP_TYPE),
+        Column('HojaOrigen', Unicode(50)),
+        Column('FechaCreacionSQL', DateTime, default=datetime.now),
+        # Sincronización: ID estable, versión por fila, última modificación y borrado lógico
+        Column('AlertaId', Unicode(32)),
+        Column('Version', Integer, default=1),
+        Column('ModificadoEn', DateTime, default=datetime.now),
+        Column('Eliminado', Boolean, default=False),
+        # Filtros y ordenamientos por rango de fechas, tipo y usuario
+        Index(f"ix_{table_name}_fecha", 'FechaHora'),
+        Index(f"ix_{table_name}_tipo_fecha", 'TipoAlerta', 'FechaHora'),
+        Index(f"ix_{table_name}_usuario", 'Usuario'),
+        # Índice cubriente para get_sql_statistics: la consulta agregada recorre
+        # este índice angosto en lugar de la tabla con columnas de texto largo
+        Index(f"ix_{table_name}_estadisticas",
+              'TipoAlerta', 'Condicion', 'Usuario', 'FechaHora', 'FechaCreacionSQL'),
+        Index(f"ix_{table_name}_creacion", 'FechaCreacionSQL'),
+        Index(f"ix_{table_name}_alerta_id", 'AlertaId'),
+        Index(f"ix_{table_name}_modificado", 'ModificadoEn')
+    )
+
+
+def parse_velocidad(values: pd.Series) -> pd.Series:
+    """Convierte VelocidadMmDia a número (acepta coma decimal)"""
+    return pd.to_numeric(values.astype(str).str.replace(',', '.', regex=False), errors='coerce')
 
 
 class SQLManager:
-    """Gestor para operaciones con SQL Server"""
+    """Gestor para operaciones con SQL Server o SQLite"""
     
-    def __init__(self, server: str, database: str, username: Optional[str] = None, 
-                 password: Optional[str] = None, table: str = "alertas_geotecnicas"):
+    def __init__(self, server: str = "", database: str = "", username: Optional[str] = None,
+                 password: Optional[str] = None, table: str = "alertas_geotecnicas",
+                 dialect: str = DIALECT_MSSQL, excel_manager: Optional[ExcelManager] = None):
+        if dialect not in SUPPORTED_DIALECTS:
+            raise ValueError(f"Dialecto no soportado: {dialect}")
+            
         self.server = server
         self.database = database
         self.username = username
         self.password = password
         self.table = table
+        self.dialect = dialect
         self.engine = None
-        self.excel_manager = ExcelManager()
+        self.query_executor = None
+        self.conflict_policy = "last_writer_wins"
+        self.excel_manager = excel_manager or ExcelManager()
+        
+        # Definición de la tabla con SQLAlchemy Core (independiente del dialecto)
+        self.metadata = MetaData()
+        self.alerts_table = build_alerts_table(self.metadata, self.table)
+        
+    @classmethod
+    def sqlite(cls, path: str = ":memory:", table: str = "alertas_geotecnicas",
+               excel_manager: Optional[ExcelManager] = None) -> "SQLManager":
+        """Crea un gestor sobre SQLite (archivo o en memoria)"""
+        return cls(database=path, table=table, dialect=DIALECT_SQLITE,
+                   excel_manager=excel_manager)
+                   
+    @classmethod
+    def from_settings(cls, database_settings: Dict,
+                      excel_manager: Optional[ExcelManager] = None) -> "SQLManager":
+        """Crea un gestor a partir de la sección 'database' de config/settings.json"""
+        dialect = database_settings.get("sql_dialect", DIALECT_MSSQL)
+        table = database_settings.get("sql_table") or "alertas_geotecnicas"
+        
+        if dialect == DIALECT_SQLITE:
+            manager = cls.sqlite(database_settings.get("sql_database") or ":memory:",
+                                 table=table, excel_manager=excel_manager)
+            manager.conflict_policy = database_settings.get("sync_conflict_policy", manager.conflict_policy)
+            return manager
+            
+        use_sql_auth = database_settings.get("auth_type") == "SQL Server Authentication"
+        manager = cls(
+            server=database_settings.get("sql_server", ""),
+            database=database_settings.get("sql_database", ""),
+            username=database_settings.get("sql_username") if use_sql_auth else None,
+            password=database_settings.get("sql_password") if use_sql_auth else None,
+            table=table,
+            dialect=dialect,
+            excel_manager=excel_manager
+        )
+        manager.conflict_policy = database_settings.get("sync_conflict_policy", manager.conflict_policy)
+        return manager
+        
+    def is_configured(self) -> bool:
+        """Indica si hay datos suficientes para conectarse"""
+        if self.dialect == DIALECT_SQLITE:
+            return bool(self.database)
+        return bool(self.server and self.database)
+        
+    def _create_connection_string(self) -> URL:
+        """Crea la URL de conexión según el dialecto"""
+        if self.dialect == DIALECT_SQLITE:
+            # Archivo SQLite o base en memoria
+            database = None if self.database in ("", ":memory:") else self.database
+            return URL.create("sqlite", database=database)
+            
+        query = {"driver": "ODBC Driver 17 for SQL Server"}
         
-    def _create_connection_string(self) -> str:
-        """Crea la cadena de conexión"""
         if self.username and self.password:
             # Conexión con autenticación SQL
-            password_encoded = urllib.parse.quote_plus(self.password)
-            connection_string = (
-                f"mssql+pyodbc://{self.username}:{password_encoded}@{self.server}/"
-                f"{self.database}?driver=ODBC+Driver+17+for+SQL+Server"
-            )
-        else:
-            # Conexión con autenticación Windows
-            connection_string = (
-                f"mssql+pyodbc://@{self.server}/{self.database}?"
-                f"driver=ODBC+Driver+17+for+SQL+Server&trusted_connection=yes"
+            return URL.create(
+                "mssql+pyodbc", username=self.username, password=self.password,
+                host=self.server, database=self.database, query=query
             )
             
-        return connection_string
+        # Conexión con autenticación Windows
+        query["trusted_connection"] = "yes"
+        return URL.create("mssql+pyodbc", host=self.server, database=self.database, query=query)
         
     def _get_engine(self) -> sqlalchemy.Engine:
         """Obtiene el engine de SQLAlchemy"""
         if self.engine is None:
             connection_string = self._create_connection_string()
-            self.engine = create_engine(connection_string, echo=False)
+            engine_kwargs = {"echo": False}
+            
+            if self.dialect == DIALECT_SQLITE:
+                # Compartir la conexión entre hilos (sincronización en segundo plano)
+                engine_kwargs["connect_args"] = {"check_same_thread": False}
+                if connection_string.database is None:
+                    # Una base en memoria solo existe mientras vive su conexión
+                    engine_kwargs["poolclass"] = StaticPool
+            elif self.dialect == DIALECT_MSSQL:
+                # Inserciones masivas eficientes con pyodbc
+                engine_kwargs["fast_executemany"] = True
+                
+            self.engine = create_engine(connection_string, **engine_kwargs)
         return self.engine
         
     def test_connection(self) -> Tuple[bool, str]:
@@ -55,7 +203,7 @@ class SQLManager:
         try:
             engine = self._get_engine()
             with engine.connect() as conn:
-                result = conn.execute(text("SELECT 1"))
+                conn.execute(select(1))
                 return True, "Conexión exitosa"
         except Exception as e:
             return False, str(e)
@@ -65,37 +213,187 @@ class SQLManager:
         try:
             engine = self._get_engine()
             
-            metadata = MetaData()
-            
-            # Definir la estructura de la tabla
-            alerts_table = Table(
-                self.table, metadata,
-                Column('id', sqlalchemy.Integer, primary_key=True, autoincrement=True),
-                Column('FechaHora', String(50)),
-                Column('TipoAlerta', String(20)),
-                Column('Condicion', String(20)),
-                Column('Respaldo', Text),
-                Column('Colapso', String(10)),
-                Column('FechaHoraColapso', String(50)),
-                Column('Evacuacion', String(10)),
-                Column('CronologiaAnalisis', Text),
-                Column('Observaciones', Text),
-                Column('Usuario', String(100)),
-                Column('FechaRegistro', String(50)),
-                Column('FechaCreacionSQL', DateTime, default=datetime.now)
-            )
+            # Migrar tablas con el esquema anterior (fechas y velocidad como texto)
+            self._migrate_legacy_schema(engine)
             
             # Crear tabla si no existe
-            metadata.create_all(engine, checkfirst=True)
+            self.metadata.create_all(engine, checkfirst=True)
+            
+            # Tablas creadas por versiones anteriores pueden no tener todas las columnas
+            self._add_missing_columns(engine)
+            self._backfill_sync_metadata(engine)
             
+            # Índices recomendados (create_all no los agrega a tablas existentes)
+            for index in self.alerts_table.indexes:
+                index.create(engine, checkfirst=True)
+                
             return True
             
         except Exception as e:
             print(f"Error creando tabla: {e}")
             return False
             
+    def _add_missing_columns(self, engine: sqlalchemy.Engine):
+        """Agrega a una tabla existente las columnas definidas que le falten"""
+        existing = {col['name'] for col in sqlalchemy.inspect(engine).get_columns(self.table)}
+        missing = [col for col in self.alerts_table.columns if col.name not in existing]
+        
+        if not missing:
+            return
+            
+        with engine.begin() as conn:
+            preparer = engine.dialect.identifier_preparer
+            for col in missing:
+                # ALTER TABLE ... ADD <columna> <tipo> es válido en SQL Server y SQLite
+                col_type = col.type.compile(dialect=engine.dialect)
+                conn.execute(sqlalchemy.text(
+                    f"ALTER TABLE {preparer.format_table(self.alerts_table)} "
+                    f"ADD {preparer.format_column(col)} {col_type}"
+                ))
+                print(f"Columna agregada a {self.table}: {col.name}")
+                
+    def active_condition(self):
+        """Condición WHERE para excluir alertas con borrado lógico"""
+        eliminado = self.alerts_table.c.Eliminado
+        return or_(eliminado.is_(None), eliminado == False)  # noqa: E712
+        
+    def _backfill_sync_metadata(self, engine: sqlalchemy.Engine):
+        """Completa AlertaId/Version/ModificadoEn/Eliminado en filas de versiones anteriores"""
+        table = self.alerts_table
+        
+        with engine.begin() as conn:
+            missing_ids = pd.read_sql(
+                select(table.c.id, table.c.FechaHora, table.c.TipoAlerta, table.c.Observaciones)
+                .where(table.c.AlertaId.is_(None)).order_by(table.c.id),
+                conn
+            )
+            
+            if not missing_ids.empty:
+                # Mismo ID determinista que asigna el Excel a sus filas antiguas
+                ids = legacy_alert_ids(missing_ids)
+                conn.execute(
+                    table.update()
+                    .where(table.c.id == sqlalchemy.bindparam('fila_id'))
+                    .values(AlertaId=sqlalchemy.bindparam('nuevo_id')),
+                    [{'fila_id': int(row_id), 'nuevo_id': alert_id}
+                     for row_id, alert_id in zip(missing_ids['id'], ids)]
+                )
+                print(f"🆔 AlertaId asignado a {len(missing_ids)} registros SQL")
+                
+            conn.execute(table.update().where(table.c.Version.is_(None)).values(Version=1))
+            conn.execute(table.update().where(table.c.Eliminado.is_(None)).values(Eliminado=False))
+            conn.execute(
+                table.update().where(table.c.ModificadoEn.is_(None))
+                .values(ModificadoEn=func.coalesce(table.c.FechaCreacionSQL, datetime.now()))
+            )
+            
+    def _needs_migration(self, engine: sqlalchemy.Engine) -> bool:
+        """Indica si la tabla existe con fechas/velocidad almacenadas como texto"""
+        inspector = sqlalchemy.inspect(engine)
+        if not inspector.has_table(self.table):
+            return False
+            
+        column_types = {col['name']: col['type'] for col in inspector.get_columns(self.table)}
+        typed_columns = [col for col in DATETIME_COLUMNS + NUMERIC_COLUMNS if col in column_types]
+        return any(isinstance(column_types[col], sqlalchemy.String) for col in typed_columns)
+        
+    def _rename_table_statement(self, old_name: str, new_name: str, preparer) -> str:
+        """Sentencia para renombrar una tabla según el dialecto"""
+        if self.dialect == DIALECT_MSSQL:
+            return f"EXEC sp_rename '{old_name}', '{new_name}'"
+        return f"ALTER TABLE {preparer.quote(old_name)} RENAME TO {preparer.quote(new_name)}"
+        
+    def _migrate_legacy_schema(self, engine: sqlalchemy.Engine) -> bool:
+        """Migra en el lugar una tabla del esquema anterior al esquema tipado
+        
+        Los valores se convierten en Python (las fechas antiguas tienen formatos mixtos),
+        se copian a una tabla nueva con el esquema actual y ésta reemplaza a la original
+        dentro de una misma transacción. Los índices se crean después, con el nombre final.
+        """
+        if not self._needs_migration(engine):
+            return False
+            
+        print(f"🔄 Migrando tabla {self.table} al esquema tipado...")
+        temp_name = f"{self.table}_migracion"
+        temp_table = build_alerts_table(MetaData(), temp_name)
+        temp_table.indexes.clear()
+        preparer = engine.dialect.identifier_preparer
+        
+        with engine.begin() as conn:
+            legacy_table = Table(self.table, MetaData(), autoload_with=conn)
+            order_column = legacy_table.c['id'] if 'id' in legacy_table.c else None
+            query = select(legacy_table)
+            if order_column is not None:
+                query = query.order_by(order_column)
+            legacy_df = pd.read_sql(query, conn)
+            
+            temp_table.drop(conn, checkfirst=True)
+            temp_table.create(conn)
+            
+            records = self._to_sql_records(legacy_df, temp_table)
+            if records:
+                conn.execute(temp_table.insert(), records)
+                
+            legacy_table.drop(conn)
+            conn.execute(sqlalchemy.text(self._rename_table_statement(temp_name, self.table, preparer)))
+            
+        self.invalidate_query_cache()
+        print(f"✅ Tabla {self.table} migrada: {len(legacy_df)} registros")
+        return True
+        
+    def _to_sql_records(self, df: pd.DataFrame, table: Optional[Table] = None) -> list:
+        """Convierte un DataFrame de Excel en registros tipados para la tabla SQL"""
+        table = table if table is not None else self.alerts_table
+        table_columns = [col.name for col in table.columns if col.name != 'id']
+        columns = [col for col in table_columns if col in df.columns]
+        
+        records_df = df[columns].copy()
+        
+        for col in columns:
+            if col in DATETIME_COLUMNS:
+                records_df[col] = parse_fecha_hora(records_df[col])
+            elif col in NUMERIC_COLUMNS:
+                records_df[col] = parse_velocidad(records_df[col])
+            elif col not in SQL_ONLY_COLUMNS:
+                # El resto se almacena como texto
+                records_df[col] = records_df[col].map(
+                    lambda value: None if pd.isna(value) else str(value)
+                )
+                
+        return records_df.astype(object).where(records_df.notna(), None).to_dict('records')
+        
+    def _from_sql_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Convierte columnas tipadas de SQL al formato de texto del Excel"""
+        df = df.drop(columns=[col for col in SQL_ONLY_COLUMNS if col in df.columns])
+        
+        if 'FechaHora' in df.columns:
+            fecha = pd.to_datetime(df['FechaHora'], errors='coerce')
+            df['FechaHora'] = fecha.dt.strftime('%Y-%m-%d %H:%M:%S').where(fecha.notna(), None)
+            
+        for col in ['FechaHoraColapso', 'FechaRegistro']:
+            if col in df.columns:
+                fecha = pd.to_datetime(df[col], errors='coerce')
+                df[col] = fecha.dt.strftime('%d/%m/%Y %H:%M:%S').where(fecha.notna(), None)
+                
+        for col in NUMERIC_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].map(lambda value: None if pd.isna(value) else format(value, 'g'))
+                
+        return df
+        
+    def _read_table(self, conn, columns: Optional[list] = None,
+                    include_deleted: bool = False) -> pd.DataFrame:
+        """Lee la tabla de alertas (o algunas columnas) como DataFrame"""
+        if columns:
+            query = select(*[self.alerts_table.c[col] for col in columns])
+        else:
+            query = select(self.alerts_table)
+        if not include_deleted:
+            query = query.where(self.active_condition())
+        return pd.read_sql(query, conn)
+        
     def export_to_sql(self) -> Tuple[bool, str]:
-        """Exporta datos de Excel a SQL Server"""
+        """Exporta datos de Excel a la base de datos SQL"""
         try:
             # Cargar datos de Excel
             df = self.excel_manager.load_data()
@@ -105,193 +403,232 @@ class SQLManager:
                 
             # Crear tabla si no existe
             if not self._create_table_if_not_exists():
-                return False, "Error creando tabla en SQL Server"
+                return False, "Error creando tabla en SQL"
                 
             engine = self._get_engine()
             
-            # Agregar columna de timestamp para SQL
-            df['FechaCreacionSQL'] = datetime.now()
+            # Agregar columnas de timestamp y versión para SQL
+            df = self.excel_manager.ensure_alert_ids(df)
+            now = datetime.now()
+            df['FechaCreacionSQL'] = now
+            df['ModificadoEn'] = now
+            df['Version'] = 1
+            df['Eliminado'] = False
             
-            # Verificar duplicados en SQL
+            # Verificar duplicados en SQL (incluye borrados lógicos para no reinsertarlos)
             with engine.connect() as conn:
-                # Obtener datos existentes
-                try:
-                    existing_df = pd.read_sql(
-                        f"SELECT FechaHora, TipoAlerta, Observaciones FROM {self.table}",
-                        conn
-                    )
-                except:
-                    existing_df = pd.DataFrame()
-                    
-            # Filtrar registros nuevos
-            if not existing_df.empty:
-                # Crear hash para comparación
-                df['temp_hash'] = df['FechaHora'] + df['TipoAlerta'] + df['Observaciones']
-                existing_df['temp_hash'] = (
-                    existing_df['FechaHora'] + 
-                    existing_df['TipoAlerta'] + 
-                    existing_df['Observaciones']
+                existing_df = self._read_table(
+                    conn, ['FechaHora', 'TipoAlerta', 'Observaciones', 'AlertaId'], include_deleted=True
                 )
                 
-                # Filtrar solo registros nuevos
-                new_df = df[~df['temp_hash'].isin(existing_df['temp_hash'])]
-                new_df = new_df.drop('temp_hash', axis=1)
+            # Filtrar registros nuevos
+            if not existing_df.empty:
+                new_df = df[~alert_key(df).isin(alert_key(existing_df)) &
+                            ~df['AlertaId'].isin(existing_df['AlertaId'])]
             else:
                 new_df = df
                 
             if new_df.empty:
                 return True, "No hay registros nuevos para exportar"
                 
-            # Insertar en SQL Server
-            rows_inserted = new_df.to_sql(
-                self.table, 
-                engine, 
-                if_exists='append', 
-                index=False,
-                method='multi'
-            )
-            
-            return True, f"Exportados {len(new_df)} registros a SQL Server"
+            # Insertar en lote (executemany) con SQLAlchemy Core
+            records = self._to_sql_records(new_df)
+            with engine.begin() as conn:
+                conn.execute(self.alerts_table.insert(), records)
+                
+            self.invalidate_query_cache()
+            return True, f"Exportados {len(new_df)} registros a SQL"
             
         except Exception as e:
             return False, f"Error exportando a SQL: {str(e)}"
             
     def import_from_sql(self) -> Tuple[bool, str]:
-        """Importa datos de SQL Server a Excel"""
+        """Importa datos de la base de datos SQL a Excel"""
         try:
+            # Asegurar que la tabla tiene todas las columnas esperadas
+            if not self._create_table_if_not_exists():
+                return False, "Error preparando tabla en SQL"
+                
             engine = self._get_engine()
             
             # Verificar que la tabla existe
             with engine.connect() as conn:
                 try:
                     # Cargar todos los datos de SQL
-                    sql_df = pd.read_sql(f"SELECT * FROM {self.table}", conn)
+                    sql_df = self._read_table(conn)
                     
                     if sql_df.empty:
-                        return False, "No hay datos en SQL Server"
+                        return False, "No hay datos en SQL"
                         
-                    # Remover columnas específicas de SQL
-                    columns_to_remove = ['id', 'FechaCreacionSQL']
-                    for col in columns_to_remove:
-                        if col in sql_df.columns:
-                            sql_df = sql_df.drop(col, axis=1)
-                            
+                    # Remover columnas específicas de SQL y volver al formato del Excel
+                    sql_df = self._from_sql_frame(sql_df)
+                    
                 except Exception as e:
                     return False, f"Error leyendo tabla SQL: {str(e)}"
                     
-            # Cargar datos existentes de Excel
-            excel_df = self.excel_manager.load_data()
-            
-            # Combinar datos
-            if excel_df.empty:
-                combined_df = sql_df
-            else:
-                # Evitar duplicados
-                excel_df['temp_hash'] = (
-                    excel_df['FechaHora'] + 
-                    excel_df['TipoAlerta'] + 
-                    excel_df['Observaciones']
-                )
-                sql_df['temp_hash'] = (
-                    sql_df['FechaHora'] + 
-                    sql_df['TipoAlerta'] + 
-                    sql_df['Observaciones']
-                )
-                
-                # Filtrar registros nuevos de SQL
-                new_sql_records = sql_df[~sql_df['temp_hash'].isin(excel_df['temp_hash'])]
-                new_sql_records = new_sql_records.drop('temp_hash', axis=1)
-                excel_df = excel_df.drop('temp_hash', axis=1)
+            with self.excel_manager.write_lock:
+                # Cargar datos existentes de Excel
+                excel_df = self.excel_manager.load_data()
+                excel_df = excel_df.drop(columns=[col for col in DERIVED_COLUMNS if col in excel_df.columns])
                 
-                if new_sql_records.empty:
-                    return True, "No hay registros nuevos en SQL Server"
+                # Combinar datos
+                if excel_df.empty:
+                    combined_df = sql_df
+                    new_sql_records = sql_df
+                else:
+                    # Evitar duplicados
+                    excel_df = self.excel_manager.ensure_alert_ids(excel_df)
+                    new_sql_records = sql_df[~alert_key(sql_df).isin(alert_key(excel_df)) &
+                                             ~sql_df['AlertaId'].isin(excel_df['AlertaId'])]
                     
-                combined_df = pd.concat([excel_df, new_sql_records], ignore_index=True)
-                
-            # Ordenar por fecha
-            if 'FechaHora' in combined_df.columns:
-                combined_df['FechaHora_dt'] = pd.to_datetime(
-                    combined_df['FechaHora'], format='%d/%m/%Y %H:%M:%S', errors='coerce'
-                )
-                combined_df = combined_df.sort_values('FechaHora_dt', ascending=True)
-                combined_df = combined_df.drop('FechaHora_dt', axis=1)
+                    if new_sql_records.empty:
+                        return True, "No hay registros nuevos para importar"
+                        
+                    combined_df = pd.concat([excel_df, new_sql_records], ignore_index=True)
+                    
+                # Ordenar por fecha
+                if 'FechaHora' in combined_df.columns:
+                    combined_df['FechaHora_dt'] = parse_fecha_hora(combined_df['FechaHora'])
+                    combined_df = combined_df.sort_values('FechaHora_dt', ascending=True)
+                    combined_df = combined_df.drop('FechaHora_dt', axis=1)
+                    
+                # Guardar en Excel
+                self.excel_manager._save_formatted_excel(combined_df)
                 
-            # Guardar en Excel
-            self.excel_manager._save_formatted_excel(combined_df)
-            
-            new_records = len(sql_df) if excel_df.empty else len(new_sql_records)
-            return True, f"Importados {new_records} registros desde SQL Server"
+                return True, f"Importados {len(new_sql_records)} registros desde SQL"
             
         except Exception as e:
             return False, f"Error importando desde SQL: {str(e)}"
             
     def sync_bidirectional(self) -> Tuple[bool, str]:
-        """Sincronización bidireccional entre Excel y SQL"""
-        try:
-            # Primero exportar de Excel a SQL
-            export_success, export_msg = self.export_to_sql()
-            
-            if not export_success:
-                return False, f"Error en exportación: {export_msg}"
-                
-            # Luego importar de SQL a Excel
-            import_success, import_msg = self.import_from_sql()
-            
-            if not import_success:
-                return False, f"Error en importación: {import_msg}"
-                
-            return True, f"Sincronización completada. {export_msg}. {import_msg}"
-            
-        except Exception as e:
-            return False, f"Error en sincronización: {str(e)}"
-            
-    def execute_custom_query(self, query: str) -> Tuple[bool, str, pd.DataFrame]:
-        """Ejecuta una consulta personalizada"""
+        """Sincronización bidireccional incremental entre Excel y SQL (ver SyncEngine)"""
+        from src.data.sync_engine import SyncEngine
+        return SyncEngine(self, policy=self.conflict_policy).run()
+        
+    def get_change_token(self) -> Optional[Tuple[int, Optional[str]]]:
+        """Token liviano para detectar cambios remotos: (cantidad de registros, última modificación)
+        
+        Devuelve None si la tabla aún no existe o la consulta falla.
+        """
         try:
             engine = self._get_engine()
-            
+            if not sqlalchemy.inspect(engine).has_table(self.table):
+                return None
+                
+            table = self.alerts_table
             with engine.connect() as conn:
-                df = pd.read_sql(query, conn)
+                total, last_modified = conn.execute(
+                    select(func.count(), func.max(func.coalesce(table.c.ModificadoEn,
+                                                                table.c.FechaCreacionSQL)))
+                ).one()
                 
-            return True, "Consulta ejecutada correctamente", df
+            return int(total), str(last_modified) if last_modified is not None else None
             
         except Exception as e:
-            return False, f"Error ejecutando consulta: {str(e)}", pd.DataFrame()
+            print(f"⚠️ Error obteniendo token de cambios SQL: {str(e)}")
+            return None
             
+    def cache_namespace(self) -> str:
+        """Identifica esta base de datos en la caché de resultados (sin contraseña)"""
+        return self._create_connection_string().render_as_string(hide_password=True)
+        
+    def invalidate_query_cache(self):
+        """Descarta los resultados cacheados de esta base de datos tras escribir en ella"""
+        result_cache.invalidate(self.cache_namespace())
+        
+    def get_query_executor(self) -> QueryExecutor:
+        """Pool de ejecución de consultas (se crea al primer uso)"""
+        if self.query_executor is None:
+            self.query_executor = QueryExecutor(self)
+        return self.query_executor
+        
+    def execute_custom_query(self, query: str, params: Optional[Dict] = None,
+                             max_rows: Optional[int] = None, timeout: Optional[float] = None,
+                             use_cache: bool = True) -> Tuple[bool, str, pd.DataFrame]:
+        """Ejecuta una consulta personalizada (las de solo lectura se cachean)"""
+        return self.get_query_executor().execute(query, params, max_rows=max_rows,
+                                                 timeout=timeout, use_cache=use_cache)
+                                                 
+    def execute_query_async(self, query: str, params: Optional[Dict] = None,
+                            max_rows: Optional[int] = None, timeout: Optional[float] = None,
+                            token: Optional[CancellationToken] = None, on_chunk=None,
+                            use_cache: bool = True):
+        """Ejecuta una consulta en segundo plano; devuelve un Future con (éxito, mensaje, DataFrame)
+        
+        Para abortarla, llamar token.cancel(); on_chunk recibe los resultados parciales.
+        """
+        return self.get_query_executor().submit(query, params, max_rows=max_rows, timeout=timeout,
+                                                token=token, on_chunk=on_chunk, use_cache=use_cache)
+                                                
+    def _month_expression(self):
+        """Expresión numérica YYYYMM a partir de FechaHora (EXTRACT se traduce por dialecto)"""
+        fecha = self.alerts_table.c.FechaHora
+        return extract('year', fecha) * 100 + extract('month', fecha)
+        
+    def _aggregate_statement(self):
+        """Consulta agregada única: un GROUP BY fino sobre las dimensiones de estadísticas
+        
+        Cada fila trae el conteo de una combinación (tipo, condición, usuario, mes) y
+        cuántas de ellas son recientes (suma condicional). Todos los totales se derivan
+        de este resultado pequeño, con un solo recorrido de la tabla.
+        """
+        table = self.alerts_table
+        last_month = datetime.now() - timedelta(days=30)
+        
+        # El mes se calcula en una subconsulta para agrupar por columna y no por una
+        # expresión con parámetros (SQL Server no las considera equivalentes)
+        rows = select(
+            table.c.TipoAlerta,
+            table.c.Condicion,
+            table.c.Usuario,
+            self._month_expression().label('Mes'),
+            case((table.c.FechaCreacionSQL >= last_month, 1), else_=0).label('reciente')
+        ).where(self.active_condition()).subquery('alertas')
+        
+        return (
+            select(
+                rows.c.TipoAlerta,
+                rows.c.Condicion,
+                rows.c.Usuario,
+                rows.c.Mes,
+                func.count().label('total'),
+                func.sum(rows.c.reciente).label('recientes')
+            )
+            .group_by(rows.c.TipoAlerta, rows.c.Condicion, rows.c.Usuario, rows.c.Mes)
+        )
+        
     def get_sql_statistics(self) -> Dict:
-        """Obtiene estadísticas de la base de datos SQL"""
+        """Obtiene estadísticas de la base de datos SQL en una sola consulta"""
         try:
             engine = self._get_engine()
             
             with engine.connect() as conn:
-                # Estadísticas básicas
-                stats = {}
-                
-                # Total de registros
-                total_result = conn.execute(text(f"SELECT COUNT(*) FROM {self.table}"))
-                stats['total_records'] = total_result.scalar()
-                
-                # Por tipo de alerta
-                type_result = conn.execute(text(
-                    f"SELECT TipoAlerta, COUNT(*) as count FROM {self.table} "
-                    f"GROUP BY TipoAlerta"
-                ))
-                stats['by_type'] = {row[0]: row[1] for row in type_result}
-                
-                # Por usuario
-                user_result = conn.execute(text(
-                    f"SELECT Usuario, COUNT(*) as count FROM {self.table} "
-                    f"GROUP BY Usuario ORDER BY count DESC"
-                ))
-                stats['by_user'] = {row[0]: row[1] for row in user_result}
+                grouped = pd.DataFrame(
+                    conn.execute(self._aggregate_statement()).fetchall(),
+                    columns=['TipoAlerta', 'Condicion', 'Usuario', 'Mes', 'total', 'recientes']
+                )
                 
-                # Registros recientes (último mes)
-                recent_result = conn.execute(text(
-                    f"SELECT COUNT(*) FROM {self.table} "
-                    f"WHERE FechaCreacionSQL >= DATEADD(month, -1, GETDATE())"
-                ))
-                stats['recent_records'] = recent_result.scalar()
+            def breakdown(column: str) -> Dict:
+                counts = grouped.groupby(column, dropna=False)['total'].sum()
+                counts = counts.sort_values(ascending=False)
+                return {(None if pd.isna(key) else key): int(value) for key, value in counts.items()}
                 
+            # Meses como 'YYYY-MM' (se descartan alertas sin fecha)
+            valid_months = grouped.dropna(subset=['Mes'])
+            by_month = valid_months.groupby('Mes')['total'].sum().sort_index()
+            
+            stats = {
+                'total_records': int(grouped['total'].sum()),
+                'by_type': breakdown('TipoAlerta'),
+                'by_user': breakdown('Usuario'),
+                'by_condition': breakdown('Condicion'),
+                'by_month': {f"{int(month) // 100:04d}-{int(month) % 100:02d}": int(count)
+                             for month, count in by_month.items()},
+                # Registros recientes (último mes); el corte se calcula en Python
+                # para no depender de funciones de fecha de cada motor
+                'recent_records': int(grouped['recientes'].fillna(0).sum())
+            }
+            
             return stats
             
         except Exception as e:
@@ -304,7 +641,7 @@ class SQLManager:
             engine = self._get_engine()
             
             with engine.connect() as conn:
-                df = pd.read_sql(f"SELECT * FROM {self.table}", conn)
+                df = self._read_table(conn)
                 
             if df.empty:
                 return False, "No hay datos para respaldar"
@@ -313,12 +650,9 @@ class SQLManager:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_file = f"{backup_path}/backup_sql_{timestamp}.xlsx"
             
-            # Remover columnas específicas de SQL si existen
-            columns_to_remove = ['id', 'FechaCreacionSQL']
-            for col in columns_to_remove:
-                if col in df.columns:
-                    df = df.drop(col, axis=1)
-                    
+            # Remover columnas específicas de SQL y volver al formato del Excel
+            df = self._from_sql_frame(df)
+            
             # Usar el método de formateo del ExcelManager
             self.excel_manager._save_formatted_excel_to_path(df, backup_file)
             
@@ -0,0 +1,426 @@
+"""
+Motor de sincronización incremental Excel <-> SQL
+Cada alerta se identifica por AlertaId; los cambios del Excel se detectan por hash de
+contenido y los de SQL por la versión de cada fila. Solo se transfieren las filas
+modificadas y el Excel se reescribe únicamente si llegan cambios desde SQL.
+"""
+
+import json
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+import sqlalchemy
+from sqlalchemy import select
+
+from src.data.excel_manager import ALERT_COLUMNS, parse_fecha_hora
+from src.data.sql_manager import (SQLManager, DERIVED_COLUMNS, DATETIME_COLUMNS,
+                                  NUMERIC_COLUMNS, parse_velocidad)
+
+# Políticas de resolución de conflictos (misma alerta modificada en ambos lados)
+POLICY_LAST_WRITER_WINS = "last_writer_wins"
+POLICY_MANUAL = "manual"
+SUPPORTED_POLICIES = [POLICY_LAST_WRITER_WINS, POLICY_MANUAL]
+
+# Contenido de una alerta (el hash ignora el ID y las columnas derivadas)
+CONTENT_COLUMNS = [col for col in ALERT_COLUMNS if col != 'AlertaId']
+
+# Tamaño de lote para consultas IN (...) (SQL Server admite hasta 2100 parámetros)
+ID_BATCH_SIZE = 500
+
+
+def content_hashes(df: pd.DataFrame) -> pd.Series:
+    """Hash del contenido normalizado de cada fila, indexado por AlertaId
+    
+    Fechas y velocidad se normalizan igual que al guardarlas en SQL, de modo que el
+    hash no cambia cuando la alerta pasa por la base de datos y vuelve al Excel.
+    """
+    normalized = pd.DataFrame(index=df.index)
+    
+    for col in CONTENT_COLUMNS:
+        if col not in df.columns:
+            normalized[col] = ''
+        elif col in DATETIME_COLUMNS:
+            parsed = parse_fecha_hora(df[col])
+            normalized[col] = parsed.dt.strftime('%Y-%m-%d %H:%M:%S').where(parsed.notna(), '')
+        elif col in NUMERIC_COLUMNS:
+            numbers = parse_velocidad(df[col])
+            normalized[col] = numbers.map(lambda value: '' if pd.isna(value) else format(value, 'g'))
+        else:
+            normalized[col] = df[col].map(lambda value: '' if pd.isna(value) else str(value).strip())
+            
+    joined = normalized.astype(str).agg('\x1f'.join, axis=1)
+    hashes = joined.map(lambda text: hashlib.md5(text.encode()).hexdigest())
+    hashes.index = df['AlertaId'].astype(str)
+    return hashes
+
+
+class SyncEngine:
+    """Sincroniza en ambos sentidos solo las alertas que cambiaron desde el último ciclo
+    
+    El estado del último ciclo (hash y versión por AlertaId) se guarda en un archivo
+    JSON junto al Excel, separado por base de datos y tabla, junto con el momento de
+    cada edición local aún no enviada (para "último en escribir gana").
+    """
+    
+    def __init__(self, sql_manager: SQLManager, policy: str = POLICY_LAST_WRITER_WINS,
+                 state_file: Optional[Path] = None):
+        if policy not in SUPPORTED_POLICIES:
+            raise ValueError(f"Política de conflictos no soportada: {policy}")
+            
+        self.sql_manager = sql_manager
+        self.excel_manager = sql_manager.excel_manager
+        self.table = sql_manager.alerts_table
+        self.policy = policy
+        self.state_file = Path(state_file) if state_file else \
+            self.excel_manager.excel_file.with_suffix('.sync.json')
+        self.namespace = f"{sql_manager.cache_namespace()}#{sql_manager.table}"
+        self.conflicts = []
+        
+    # ------------------------------ Estado ------------------------------ #
+    def _load_state(self) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """Hash y versión de cada alerta en la última sincronización y ediciones locales pendientes"""
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f).get(self.namespace, {})
+                return state.get('rows', {}), state.get('edits', {})
+        except Exception as e:
+            print(f"⚠️ Estado de sincronización ilegible, se reconstruye: {str(e)}")
+        return {}, {}
+        
+    def _save_state(self, rows: Dict[str, Dict], edits: Dict[str, Dict]):
+        """Guarda el estado de forma atómica (archivo temporal + reemplazo)"""
+        state = {}
+        if self.state_file.exists():
+            try:
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except Exception:
+                state = {}
+                
+        state[self.namespace] = {
+            'rows': rows,
+            'edits': edits,
+            'conflicts': self.conflicts,
+            'last_sync': datetime.now().isoformat(timespec='seconds')
+        }
+        
+        temp_file = self.state_file.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        temp_file.replace(self.state_file)
+        
+    @staticmethod
+    def _track_edits(edits: Dict[str, Dict], local_hashes: pd.Series, changed: set,
+                     first_seen: datetime) -> Tuple[Dict[str, Dict], Dict[str, datetime]]:
+        """Momento de la edición local de cada alerta cambiada o eliminada
+        
+        Se fija la primera vez que un ciclo ve ese contenido (fecha del Excel en ese
+        momento) y se conserva mientras no vuelva a cambiar: guardados posteriores de
+        otras alertas no lo adelantan. Devuelve (ediciones a guardar, momento por AlertaId).
+        """
+        tracked = {}
+        for alert_id in changed:
+            current = local_hashes.get(alert_id)  # None: eliminada en el Excel
+            entry = edits.get(alert_id)
+            if entry is None or entry['hash'] != current:
+                entry = {'hash': current, 'at': first_seen.isoformat()}
+            tracked[alert_id] = entry
+        return tracked, {alert_id: datetime.fromisoformat(entry['at']) for alert_id, entry in tracked.items()}
+        
+    # ------------------------------ Lectura ------------------------------ #
+    def _load_local(self) -> Tuple[pd.DataFrame, bool]:
+        """Alertas del Excel con AlertaId; indica si hubo que asignar IDs
+        
+        Si dos filas comparten AlertaId (por ejemplo, una fila copiada con su ID) no se
+        sincroniza: descartar una de ellas borraría una alerta del Excel.
+        """
+        df = self.excel_manager.load_data()
+        df = df.drop(columns=[col for col in DERIVED_COLUMNS if col in df.columns])
+        
+        if df.empty:
+            return df, False
+            
+        had_ids = 'AlertaId' in df.columns and df['AlertaId'].notna().all()
+        df = self.excel_manager.ensure_alert_ids(df)
+        df['AlertaId'] = df['AlertaId'].astype(str)
+        duplicated = df['AlertaId'][df['AlertaId'].duplicated()].unique()
+        if len(duplicated):
+            raise ValueError(f"AlertaId repetido en el Excel ({', '.join(duplicated[:5])}); "
+                             f"corrija las filas duplicadas antes de sincronizar")
+        return df.reset_index(drop=True), not had_ids
+        
+    def _read_remote_metadata(self, conn) -> pd.DataFrame:
+        """AlertaId, Version, Eliminado y ModificadoEn de todas las filas (columnas livianas)"""
+        table = self.table
+        metadata = pd.read_sql(
+            select(table.c.AlertaId, table.c.Version, table.c.Eliminado, table.c.ModificadoEn)
+            .where(table.c.AlertaId.is_not(None)),
+            conn
+        )
+        
+        if metadata.empty:
+            return metadata.set_index('AlertaId')
+            
+        metadata['AlertaId'] = metadata['AlertaId'].astype(str)
+        metadata['Eliminado'] = metadata['Eliminado'].fillna(False).astype(bool)
+        # Si una alerta tiene varias filas, prevalece la de mayor versión
+        metadata = metadata.sort_values('Version').drop_duplicates('AlertaId', keep='last')
+        return metadata.set_index('AlertaId')
+        
+    def _read_remote_rows(self, conn, alert_ids: list) -> pd.DataFrame:
+        """Filas completas de las alertas indicadas, en lotes"""
+        frames = []
+        for start in range(0, len(alert_ids), ID_BATCH_SIZE):
+            batch = alert_ids[start:start + ID_BATCH_SIZE]
+            frames.append(pd.read_sql(
+                select(self.table).where(self.table.c.AlertaId.in_(batch)), conn
+            ))
+            
+        if not frames:
+            return pd.DataFrame()
+            
+        rows = pd.concat(frames, ignore_index=True)
+        rows['AlertaId'] = rows['AlertaId'].astype(str)
+        return rows.sort_values('Version').drop_duplicates('AlertaId', keep='last')
+        
+    # ------------------------------ Escritura SQL ------------------------------ #
+    def _insert_remote(self, conn, rows: pd.DataFrame, now: datetime, edit_times: Dict[str, datetime]):
+        """Inserta alertas nuevas con versión 1 (ModificadoEn: momento de la edición local)"""
+        rows = rows.copy()
+        rows['FechaCreacionSQL'] = now
+        rows['ModificadoEn'] = [edit_times.get(alert_id, now) for alert_id in rows['AlertaId']]
+        rows['Version'] = 1
+        rows['Eliminado'] = False
+        conn.execute(self.table.insert(), self.sql_manager._to_sql_records(rows))
+        
+    def _update_remote(self, conn, alert_id: str, values: Dict, expected_version: int) -> bool:
+        """Actualiza una alerta solo si nadie la modificó desde expected_version"""
+        table = self.table
+        result = conn.execute(
+            table.update()
+            .where(table.c.AlertaId == alert_id, table.c.Version == expected_version)
+            .values(**values, Version=expected_version + 1)
+        )
+        return result.rowcount > 0
+        
+    # ------------------------------ Ciclo ------------------------------ #
+    def run(self) -> Tuple[bool, str]:
+        """Ejecuta un ciclo de sincronización incremental"""
+        try:
+            if not self.sql_manager._create_table_if_not_exists():
+                return False, "Error preparando tabla en SQL"
+                
+            engine = self.sql_manager._get_engine()
+            base, edits = self._load_state()
+            
+            local_df, ids_assigned = self._load_local()
+            local_hashes = content_hashes(local_df) if not local_df.empty else pd.Series(dtype=object)
+            local_modified = datetime.fromtimestamp(self.excel_manager.excel_file.stat().st_mtime)
+            
+            base_hash = pd.Series({alert_id: entry['hash'] for alert_id, entry in base.items()}, dtype=object)
+            base_version = pd.Series({alert_id: entry['version'] for alert_id, entry in base.items()},
+                                     dtype=object)
+                                     
+            with engine.connect() as conn:
+                remote_meta = self._read_remote_metadata(conn)
+                
+            # Cambios locales (nuevas o editadas / eliminadas) y remotos (versión distinta)
+            local_changed = set(local_hashes.index[local_hashes.ne(base_hash.reindex(local_hashes.index))])
+            local_deleted = set(base) - set(local_hashes.index)
+            remote_changed = set(
+                remote_meta.index[remote_meta['Version'].ne(base_version.reindex(remote_meta.index))]
+            )
+            
+            # Alertas remotas eliminadas que nunca llegaron a este Excel no requieren acción
+            remote_changed -= {
+                alert_id for alert_id in remote_changed
+                if remote_meta.at[alert_id, 'Eliminado'] and alert_id not in base
+                and alert_id not in local_changed
+            }
+            
+            if not (local_changed or local_deleted or remote_changed or ids_assigned):
+                return True, "Sin cambios para sincronizar"
+                
+            edits, edit_times = self._track_edits(edits, local_hashes, local_changed | local_deleted,
+                                                  local_modified)
+                
+            with engine.connect() as conn:
+                remote_rows = self._read_remote_rows(conn, sorted(remote_changed))
+            remote_converted = self.sql_manager._from_sql_frame(remote_rows) if not remote_rows.empty \
+                else pd.DataFrame(columns=['AlertaId'])
+            remote_hashes = content_hashes(remote_converted) if not remote_converted.empty \
+                else pd.Series(dtype=object)
+                
+            push, tombstone, pull, delete_local = set(), set(), set(), set()
+            
+            for alert_id in local_changed - remote_changed:
+                push.add(alert_id)
+            for alert_id in local_deleted - remote_changed:
+                if alert_id in remote_meta.index and not remote_meta.at[alert_id, 'Eliminado']:
+                    tombstone.add(alert_id)
+                else:
+                    base.pop(alert_id, None)
+            for alert_id in remote_changed - local_changed - local_deleted:
+                if remote_meta.at[alert_id, 'Eliminado']:
+                    delete_local.add(alert_id)
+                else:
+                    pull.add(alert_id)
+                    
+            # Conflictos: la misma alerta cambió en ambos lados
+            for alert_id in (local_changed | local_deleted) & remote_changed:
+                remote_deleted = bool(remote_meta.at[alert_id, 'Eliminado'])
+                locally_deleted = alert_id in local_deleted
+                remote_version = int(remote_meta.at[alert_id, 'Version'])
+                
+                if locally_deleted and remote_deleted:
+                    base.pop(alert_id, None)
+                    continue
+                if not locally_deleted and not remote_deleted and \
+                        remote_hashes.get(alert_id) == local_hashes.get(alert_id):
+                    # Ambos lados llegaron al mismo contenido
+                    base[alert_id] = {'hash': local_hashes[alert_id], 'version': remote_version}
+                    continue
+                    
+                if self.policy == POLICY_MANUAL:
+                    self.conflicts.append(alert_id)
+                    continue
+                    
+                # Último en escribir gana: momento de la edición local vs ModificadoEn de la
+                # fila SQL (que también guarda el momento de la edición, no el del envío)
+                remote_modified = remote_meta.at[alert_id, 'ModificadoEn']
+                local_wins = pd.isna(remote_modified) or edit_times[alert_id] >= pd.Timestamp(remote_modified)
+                
+                if local_wins:
+                    base[alert_id] = {'hash': None, 'version': remote_version}
+                    (tombstone if locally_deleted else push).add(alert_id)
+                else:
+                    (delete_local if remote_deleted else pull).add(alert_id)
+                    
+            pushed, tombstoned, stale = self._apply_remote(engine, local_df, local_hashes, remote_meta,
+                                                           base, push, tombstone, edit_times)
+            received, deferred = self._apply_local(local_hashes, remote_converted, remote_hashes, remote_meta,
+                                                   base, pull, delete_local, ids_assigned)
+                                         
+            # Las ediciones ya enviadas (o bajas ya aplicadas) dejan de estar pendientes
+            edits = {alert_id: entry for alert_id, entry in edits.items()
+                     if base.get(alert_id, {}).get('hash') != entry['hash']}
+            self._save_state(base, edits)
+            
+            if pushed or tombstoned:
+                self.sql_manager.invalidate_query_cache()
+                
+            message = (f"Sincronización completada: {pushed} enviados, {tombstoned} eliminados en SQL, "
+                       f"{received} recibidos, {len(delete_local) - deferred['delete']} eliminados en Excel")
+            if stale or deferred['pull'] or deferred['delete']:
+                message += f", {stale + deferred['pull'] + deferred['delete']} pendientes por cambios concurrentes"
+            if self.conflicts:
+                message += f", {len(self.conflicts)} conflictos sin resolver"
+            return True, message
+            
+        except Exception as e:
+            return False, f"Error en sincronización: {str(e)}"
+            
+    def _apply_remote(self, engine, local_df: pd.DataFrame, local_hashes: pd.Series,
+                      remote_meta: pd.DataFrame, base: Dict, push: set, tombstone: set,
+                      edit_times: Dict[str, datetime]) -> Tuple[int, int, int]:
+        """Envía a SQL las altas, ediciones y bajas locales en una transacción
+        
+        ModificadoEn de cada fila es el momento de su edición local, no el del envío.
+        """
+        if not push and not tombstone:
+            return 0, 0, 0
+            
+        now = datetime.now()
+        local_rows = local_df.set_index('AlertaId', drop=False)
+        inserts = [alert_id for alert_id in push if alert_id not in remote_meta.index]
+        updates = [alert_id for alert_id in push if alert_id in remote_meta.index]
+        pushed, tombstoned, stale = 0, 0, 0
+        
+        with engine.begin() as conn:
+            if inserts:
+                self._insert_remote(conn, local_rows.loc[inserts], now, edit_times)
+                for alert_id in inserts:
+                    base[alert_id] = {'hash': local_hashes[alert_id], 'version': 1}
+                pushed += len(inserts)
+                
+            if updates:
+                records = self.sql_manager._to_sql_records(local_rows.loc[updates])
+                for alert_id, record in zip(updates, records):
+                    expected = int(remote_meta.at[alert_id, 'Version'])
+                    values = dict(record, ModificadoEn=edit_times[alert_id], Eliminado=False)
+                    if self._update_remote(conn, alert_id, values, expected):
+                        base[alert_id] = {'hash': local_hashes[alert_id], 'version': expected + 1}
+                        pushed += 1
+                    else:
+                        stale += 1
+                        
+            for alert_id in tombstone:
+                expected = int(remote_meta.at[alert_id, 'Version'])
+                if self._update_remote(conn, alert_id, {'Eliminado': True, 'ModificadoEn': edit_times[alert_id]},
+                                       expected):
+                    base.pop(alert_id, None)
+                    tombstoned += 1
+                else:
+                    stale += 1
+                    
+        return pushed, tombstoned, stale
+        
+    def _apply_local(self, read_hashes: pd.Series, remote_converted: pd.DataFrame,
+                     remote_hashes: pd.Series, remote_meta: pd.DataFrame, base: Dict,
+                     pull: set, delete_local: set, ids_assigned: bool) -> Tuple[int, Dict[str, int]]:
+        """Aplica al Excel las altas, ediciones y bajas remotas; no reescribe si no hay cambios
+        
+        El Excel se vuelve a leer dentro del lock de escritura: lo guardado por otros
+        (formulario, visor, diario) después de la lectura del ciclo se conserva, y las
+        alertas que cambiaron localmente desde entonces no se pisan ni se eliminan; quedan
+        con su estado anterior para el próximo ciclo (que las verá como conflicto).
+        Devuelve (alertas recibidas, {'pull': omitidas, 'delete': bajas omitidas}).
+        """
+        deferred = {'pull': 0, 'delete': 0}
+        if not pull and not delete_local and not ids_assigned:
+            return 0, deferred
+            
+        with self.excel_manager.write_lock:
+            current_df, _ = self._load_local()
+            current_hashes = content_hashes(current_df) if not current_df.empty else pd.Series(dtype=object)
+            
+            def unchanged(alert_id):
+                # Misma versión local que en la lectura del ciclo (o ausente en ambas)
+                return current_hashes.get(alert_id) == read_hashes.get(alert_id)
+                
+            applied_pull = {alert_id for alert_id in pull if unchanged(alert_id)}
+            applied_delete = {alert_id for alert_id in delete_local if unchanged(alert_id)}
+            deferred = {'pull': len(pull) - len(applied_pull), 'delete': len(delete_local) - len(applied_delete)}
+            
+            if applied_pull or applied_delete or ids_assigned:
+                incoming = remote_converted[remote_converted['AlertaId'].isin(applied_pull)].copy()
+                # Las columnas que solo existen en este Excel conservan su valor local
+                local_values = current_df.set_index('AlertaId') if not current_df.empty else None
+                for col in current_df.columns:
+                    if col not in ALERT_COLUMNS and col not in incoming.columns:
+                        incoming[col] = incoming['AlertaId'].map(local_values[col])
+                kept = current_df[~current_df['AlertaId'].isin(applied_pull | applied_delete)] \
+                    if not current_df.empty else current_df
+                combined = pd.concat([kept, incoming], ignore_index=True)
+                
+                if 'FechaHora' in combined.columns:
+                    combined['FechaHora_dt'] = parse_fecha_hora(combined['FechaHora'])
+                    combined = combined.sort_values('FechaHora_dt', ascending=True, na_position='last')
+                    combined = combined.drop('FechaHora_dt', axis=1)
+                    
+                # Columnas de la alerta en su orden y luego las propias de este Excel
+                ordered_columns = [col for col in ALERT_COLUMNS if col in combined.columns]
+                ordered_columns += [col for col in combined.columns if col not in ordered_columns]
+                self.excel_manager._save_formatted_excel(combined[ordered_columns])
+                
+        for alert_id in applied_delete:
+            base.pop(alert_id, None)
+        for alert_id in applied_pull:
+            base[alert_id] = {'hash': remote_hashes[alert_id],
+                              'version': int(remote_meta.at[alert_id, 'Version'])}
+                              
+        return len(applied_pull), deferred
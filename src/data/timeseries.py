@@ -0,0 +1,179 @@
+"""
+Series temporales de alertas con nivel de detalle según el rango visible
+Los conteos por día, semana y mes de cada tipo de alerta se precalculan una vez
+(pirámide de niveles) y los puntos de velocidad se reducen con LTTB, de modo que
+cualquier rango se dibuja con a lo sumo max_points puntos aunque el historial
+tenga cientos de miles de alertas
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.excel_manager import parse_fecha_hora
+
+# Niveles de la pirámide, del más fino al más grueso
+LEVELS = ['día', 'semana', 'mes']
+# Puntos por serie para un rango visible
+DEFAULT_MAX_POINTS = 500
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: posiciones de los threshold puntos que conservan la forma
+    
+    x debe estar ordenado. Se mantienen el primer y el último punto; de cada
+    intervalo intermedio se elige el punto que forma el triángulo de mayor área
+    con el punto elegido antes y el promedio del intervalo siguiente.
+    """
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+        
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (size - 2) / (threshold - 2)
+    edges = np.minimum((np.arange(threshold) * every).astype(np.int64) + 1, size)
+    
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = max(edges[bucket + 2], end + 1) if bucket + 2 < threshold else size
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+        
+        areas = np.abs((x[previous] - average_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (average_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+class AlertTimeSeries:
+    """Conteos de alertas y velocidades en el tiempo, por tipo de alerta
+    
+    Uso:
+        series = AlertTimeSeries.from_frame(df)
+        edges, counts, level = series.counts(inicio, fin, alert_type='Roja')
+        times, velocities = series.velocities(inicio, fin)
+    """
+    
+    def __init__(self, times: np.ndarray, types: List, velocities: np.ndarray):
+        order = np.argsort(times, kind='stable')
+        self.times = times[order]
+        self.velocity = velocities[order]
+        self.type_names = sorted({value for value in types if value is not None})
+        codes = {name: code for code, name in enumerate(self.type_names)}
+        self.type_codes = np.array([codes.get(value, -1) for value in types], dtype=np.int64)[order]
+        self._levels = {}
+        if len(self.times):
+            self._build_levels()
+            
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'AlertTimeSeries':
+        """Serie de las alertas con fecha válida (VelocidadMmDia admite coma decimal)"""
+        if df.empty or 'FechaHora' not in df.columns:
+            return cls(np.empty(0, dtype='datetime64[ns]'), [], np.empty(0))
+            
+        fechas = parse_fecha_hora(df['FechaHora'])
+        valid = fechas.notna().to_numpy()
+        if 'VelocidadMmDia' in df.columns:
+            text = df['VelocidadMmDia'].astype(str).str.strip().str.replace(',', '.', regex=False)
+            velocities = pd.to_numeric(text, errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            velocities = np.full(len(df), np.nan)
+        if 'TipoAlerta' in df.columns:
+            types = df['TipoAlerta'].astype(object)
+            types = types.where(types.notna(), None).tolist()
+        else:
+            types = [None] * len(df)
+            
+        return cls(fechas.to_numpy(dtype='datetime64[ns]')[valid],
+                   [value for value, keep in zip(types, valid) if keep],
+                   velocities[valid])
+                   
+    def _build_levels(self):
+        """Conteos por día (fila 0: todos los tipos; fila k + 1: tipo k) y sus sumas por semana y mes
+        
+        Cada nivel guarda los bordes de sus intervalos (uno más que conteos).
+        """
+        days = self.times.astype('datetime64[D]')
+        day_starts = np.arange(days[0], days[-1] + np.timedelta64(1, 'D'))
+        day_index = (days - days[0]).astype(np.int64)
+        
+        daily = np.zeros((len(self.type_names) + 1, len(day_starts)), dtype=np.int64)
+        daily[0] = np.bincount(day_index, minlength=len(day_starts))
+        for code in range(len(self.type_names)):
+            daily[code + 1] = np.bincount(day_index[self.type_codes == code], minlength=len(day_starts))
+        self._levels['día'] = (np.append(day_starts, day_starts[-1] + np.timedelta64(1, 'D')), daily)
+        
+        # Semanas desde el lunes (el 01/01/1970 fue jueves) y meses calendario
+        weekday = (day_starts.astype(np.int64) + 3) % 7
+        week_starts = day_starts - weekday.astype('timedelta64[D]')
+        months = day_starts.astype('datetime64[M]')
+        month_starts = months.astype('datetime64[D]')
+        last_ends = {'semana': week_starts[-1] + np.timedelta64(7, 'D'),
+                     'mes': (months[-1] + np.timedelta64(1, 'M')).astype('datetime64[D]')}
+        for level, bucket_starts in (('semana', week_starts), ('mes', month_starts)):
+            starts, first = np.unique(bucket_starts, return_index=True)
+            self._levels[level] = (np.append(starts, last_ends[level]), np.add.reduceat(daily, first, axis=1))
+            
+    @property
+    def empty(self) -> bool:
+        return len(self.times) == 0
+        
+    def span(self) -> Tuple[np.datetime64, np.datetime64]:
+        """Rango completo del historial (desde el primer día hasta el fin del último)"""
+        days = self.times[[0, -1]].astype('datetime64[D]')
+        return days[0], days[1] + np.timedelta64(1, 'D')
+        
+    def _row(self, alert_type: Optional[str]) -> Optional[int]:
+        if alert_type is None:
+            return 0
+        if alert_type not in self.type_names:
+            return None
+        return self.type_names.index(alert_type) + 1
+        
+    def counts(self, start, end, alert_type: Optional[str] = None,
+               max_points: int = DEFAULT_MAX_POINTS) -> Tuple[np.ndarray, np.ndarray, str]:
+        """Conteos del rango en el nivel más fino que no supere max_points intervalos
+        
+        Devuelve (bordes de los intervalos, conteos, nivel); hay un borde más que
+        conteos, de modo que el último intervalo también tiene su fin.
+        """
+        start, end = np.datetime64(start, 'ns'), np.datetime64(end, 'ns')
+        row = self._row(alert_type)
+        for level in LEVELS:
+            if level not in self._levels:
+                break
+            edges, counts = self._levels[level]
+            # Intervalos que se superponen con el rango (incluye el que contiene el inicio)
+            low = min(max(int(np.searchsorted(edges, start, side='right')) - 1, 0), counts.shape[1])
+            high = max(min(int(np.searchsorted(edges, end, side='left')), counts.shape[1]), low)
+            if high - low <= max_points or level == LEVELS[-1]:
+                values = counts[row, low:high] if row is not None else np.zeros(high - low, dtype=np.int64)
+                return (edges[low:high + 1] if high > low else edges[:0]), values, level
+        return np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=np.int64), LEVELS[0]
+        
+    def velocities(self, start, end, alert_type: Optional[str] = None,
+                   max_points: int = DEFAULT_MAX_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+        """Velocidades del rango, reducidas con LTTB a max_points puntos si hay más"""
+        low, high = np.searchsorted(self.times, [np.datetime64(start, 'ns'), np.datetime64(end, 'ns')])
+        times = self.times[low:high]
+        values = self.velocity[low:high]
+        mask = ~np.isnan(values)
+        if alert_type is not None:
+            row = self._row(alert_type)
+            if row is None:
+                # Tipo sin alertas: no debe coincidir con las filas sin tipo (código -1)
+                mask[:] = False
+            else:
+                mask &= self.type_codes[low:high] == row - 1
+        times, values = times[mask], values[mask]
+        
+        if len(times) > max_points:
+            selected = lttb(times.astype(np.int64), values, max_points)
+            times, values = times[selected], values[selected]
+        return times, values
@@ -11,6 +11,7 @@ from datetime import datetime
 
 from src.data.excel_manager import ExcelManager
 from src.auth.login_manager import User
+from src.utils.alert_validation import validate_alert_fields
 from src.gui.styles.form_styles import FormStyles
 
 
@@ -255,49 +256,19 @@ class AlertForm(QWidget):
             QMessageBox.warning(self, "Error", "No hay usuario autenticado")
             return False
         
-        # Validar observaciones (obligatorio)
-        if not self.observations_text.toPlainText().strip():
-            QMessageBox.warning(self, "Error", "Las observaciones son obligatorias")
+        # Observaciones, ubicación, velocidad y fechas (mismas reglas que la edición en el visor)
+        valid, message = validate_alert_fields({
+            'Observaciones': self.observations_text.toPlainText(),
+            'Ubicacion': self.location_edit.text(),
+            'VelocidadMmDia': self.velocity_edit.text(),
+            'FechaHora': self.datetime_edit.dateTime().toPython(),
+            'Colapso': self.collapse_combo.currentText(),
+            'FechaHoraColapso': self.collapse_datetime.dateTime().toPython(),
+        })
+        if not valid:
+            QMessageBox.warning(self, "Error", message)
             return False
         
-        # Validar ubicación (obligatorio)
-        if not self.location_edit.text().strip():
-            QMessageBox.warning(self, "Error", "La ubicación es obligatoria")
-            return False
-        
-        # Validar velocidad (obligatorio y formato numérico)
-        velocity_text = self.velocity_edit.text().strip()
-        if not velocity_text:
-            QMessageBox.warning(self, "Error", "La velocidad (mm/día) es obligatoria")
-            return False
-        
-        try:
-            velocity_value = float(velocity_text.replace(',', '.'))  # Permitir coma como decimal
-            if velocity_value < 0:
-                QMessageBox.warning(self, "Error", "La velocidad no puede ser negativa")
-                return False
-        except ValueError:
-            QMessageBox.warning(self, "Error", 
-                              "La velocidad debe ser un número válido (ej: 15.5, 20,3)")
-            return False
-        
-        # Validar fecha (no puede ser futura más allá del límite razonable)
-        current_datetime = QDateTime.currentDateTime()
-        selected_datetime = self.datetime_edit.dateTime()
-        
-        if selected_datetime > current_datetime.addDays(1):  # Permitir hasta 1 día en el futuro
-            QMessageBox.warning(self, "Error", 
-                              "La fecha no puede estar más de 1 día en el futuro")
-            return False
-        
-        # Validar fecha de colapso si aplica
-        if self.collapse_combo.currentText() == "Sí":
-            collapse_datetime = self.collapse_datetime.dateTime()
-            if collapse_datetime < selected_datetime:
-                QMessageBox.warning(self, "Error", 
-                                  "La fecha de colapso no puede ser anterior a la fecha de la alerta")
-                return False
-        
         # Validar respaldo (opcional pero debe ser un archivo válido si se proporciona)
         backup_path = self.backup_path.text().strip()
         if backup_path:
@@ -5,25 +5,114 @@ Visor de datos de alertas geotécnicas con estilo similar a AlertForm
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
     QLineEdit, QComboBox, QTextEdit, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox, QLabel,
-    QFrame, QGroupBox, QSizePolicy
+    QTableView, QAbstractItemView, QMessageBox, QLabel,
+    QFrame, QGroupBox, QSizePolicy, QProgressDialog
 )
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont, QColor
+from PySide6.QtCore import Qt, QTimer, QThread, Signal
+from PySide6.QtGui import QFont
+import numpy as np
 import pandas as pd
 
 from src.data.excel_manager import ExcelManager
+from src.gui.alerts_table_model import AlertsTableModel
+from src.data.search_index import SearchIndex, alert_ids_for
+from src.data.filter_engine import FilterEngine
+from src.data.alert_statistics import AlertStatistics
+from src.data.change_journal import ChangeJournal
+from src.data.export_service import EXPORT_FORMATS, ExportService, format_for_path
+
+# Filas cuyo texto se mide al ajustar el ancho de las columnas (el resto se estima
+# con el largo máximo en caracteres de cada columna)
+RESIZE_SAMPLE_ROWS = 200
+# Ancho máximo de las columnas y de las de texto largo (el texto se corta con "...")
+MAX_COLUMN_WIDTH = 400
+LONG_TEXT_COLUMNS = ['Observaciones', 'CronologiaAnalisis', 'Ubicacion']
+MAX_LONG_TEXT_WIDTH = 280
+# Margen por celda (padding del estilo y borde)
+CELL_PADDING = 24
+# Columnas internas que no se muestran
+HIDDEN_COLUMNS = ['AlertaId']
+# Pausa de escritura antes de ejecutar la búsqueda
+SEARCH_DEBOUNCE_MS = 150
+# Pausa tras la última edición antes de guardar el lote de cambios en el Excel
+JOURNAL_FLUSH_MS = 2000
+
+
+class ExportThread(QThread):
+    """Exporta la vista o la selección en segundo plano, con progreso y cancelación"""
+    
+    progress = Signal(int)
+    export_finished = Signal(bool, str)
+    
+    def __init__(self, service: ExportService, file_path: str, parent=None):
+        super().__init__(parent)
+        self.service = service
+        self.file_path = file_path
+        self._cancelled = False
+        
+    def cancel(self):
+        self._cancelled = True
+        
+    def run(self):
+        success, message = self.service.export(
+            self.file_path, progress=self.progress.emit, is_cancelled=lambda: self._cancelled)
+        self.export_finished.emit(success, message)
+
+
+class JournalFlushThread(QThread):
+    """Guarda en segundo plano los cambios pendientes del diario (una escritura por lote)"""
+    
+    flushed = Signal(bool, str)
+    
+    def __init__(self, journal: ChangeJournal, excel_manager: ExcelManager, parent=None):
+        super().__init__(parent)
+        self.journal = journal
+        self.excel_manager = excel_manager
+        
+    def run(self):
+        try:
+            success, message = self.journal.flush(self.excel_manager)
+        except Exception as e:
+            success, message = False, f"Error guardando cambios: {e}"
+        self.flushed.emit(success, message)
 
 
 class AlertsDataViewer(QWidget):
     """Visor de datos de alertas geotécnicas"""
 
+    # Datos guardados por cualquier ExcelManager del mismo archivo (se procesa en el thread de la GUI)
+    data_saved = Signal(object)
+
     def __init__(self):
         super().__init__()
         self.excel_manager = ExcelManager()
         self.data_loaded = False  # Flag para controlar carga diferida
+        self.original_df = pd.DataFrame()
+        self.filter_engine = FilterEngine(self.original_df)
+        self.search_index = None  # Se crea en la primera carga
+        self.statistics = None  # Contadores en memoria (se crean en la primera carga)
+        self.journal = None  # Ediciones pendientes de guardar (se crea en la primera carga)
+        self.flush_thread = None
+        self.export_thread = None
+        self._flush_again = False
+        self.current_user = None
+        self.row_ids = pd.Series(dtype=object)
+        self.stats_summary = ""  # Totales de la BD (se recalculan al cambiar los datos)
         self.setup_ui()
         self.apply_styles()
+        
+        # Ediciones: se anotan en el diario y se guardan por lotes en segundo plano
+        self.journal_timer = QTimer(self)
+        self.journal_timer.setSingleShot(True)
+        self.journal_timer.setInterval(JOURNAL_FLUSH_MS)
+        self.journal_timer.timeout.connect(self.flush_journal)
+        self.table_model.cell_edited.connect(self.on_cell_edited)
+        self.table_model.edit_rejected.connect(self.on_edit_rejected)
+        
+        # Altas y eliminaciones llegan como notificaciones: no se relee el Excel
+        self.data_saved.connect(self.apply_saved_data)
+        self._change_listener = self.data_saved.emit
+        self.destroyed.connect(self._remove_change_listener_for(self.excel_manager, self._change_listener))
         # NO cargar datos iniciales - se hace cuando se muestra la pestaña
         
     def ensure_data_loaded(self):
@@ -81,8 +170,14 @@ class AlertsDataViewer(QWidget):
         # Búsqueda
         filter_layout.addWidget(QLabel("Buscar:"))
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Buscar en observaciones...")
+        self.search_input.setPlaceholderText("Buscar en observaciones, cronología y ubicación...")
         self.search_input.textChanged.connect(self.search_data)
+        
+        # La búsqueda se ejecuta cuando se deja de escribir
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_search)
         self.search_input.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
         filter_layout.addWidget(self.search_input)
 
@@ -103,10 +198,17 @@ class AlertsDataViewer(QWidget):
         data_layout.setContentsMargins(12, 10, 12, 12)
         data_layout.setSpacing(12)
 
-        # Tabla
-        self.table = QTableWidget()
+        # Tabla (modelo sobre el DataFrame: solo se formatean las celdas visibles y
+        # las filas se entregan por páginas a medida que se desplaza)
+        self.table_model = AlertsTableModel(self)
+        self.table_model.rows_fetched.connect(self.update_shown_count)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         self.table.setAlternatingRowColors(True)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # Orden por columna al hacer clic en el encabezado (sin orden inicial)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
         self.table.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         data_layout.addWidget(self.table)
 
@@ -125,9 +227,9 @@ class AlertsDataViewer(QWidget):
         buttons_layout.setSpacing(12)
         buttons_layout.addStretch()
 
-        self.export_button = QPushButton("Exportar Selección")
+        # Exporta la selección o, si no hay, toda la vista filtrada
+        self.export_button = QPushButton("Exportar Vista")
         self.export_button.clicked.connect(self.export_selected)
-        self.export_button.setEnabled(False)
 
         self.delete_button = QPushButton("Eliminar Selección")
         self.delete_button.clicked.connect(self.delete_selected)
@@ -138,7 +240,7 @@ class AlertsDataViewer(QWidget):
         layout.addLayout(buttons_layout)
 
         # Conectar señales de selección
-        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.table.selectionModel().selectionChanged.connect(self.on_selection_changed)
 
     # ---------------------------- STYLES ---------------------------- #
     def apply_styles(self):
@@ -155,7 +257,7 @@ class AlertsDataViewer(QWidget):
             QPushButton#delete_button { background-color: #f44336; }
             QPushButton#delete_button:hover { background-color: #da190b; }
             QLabel { font-size: 13px; color: #000000; }
-            QTableWidget { 
+            QTableView { 
                 border: 1px solid #d2d2d2; 
                 border-radius: 6px; 
                 background: #ffffff; 
@@ -163,12 +265,12 @@ class AlertsDataViewer(QWidget):
                 gridline-color: #dee2e6;
                 alternate-background-color: #f8f9fa;
             }
-            QTableWidget::item { 
+            QTableView::item { 
                 padding: 8px; 
                 border-bottom: 1px solid #dee2e6;
                 color: #212529;
             }
-            QTableWidget::item:selected { 
+            QTableView::item:selected { 
                 background-color: #4CAF50; 
                 color: #ffffff; 
             }
@@ -190,152 +292,285 @@ class AlertsDataViewer(QWidget):
     def load_data(self):
         """Carga los datos en la tabla"""
         try:
-            self.df = self.excel_manager.load_data()
-            self.original_df = self.df.copy()  # Mantener copia original para filtros
+            self.original_df = self.excel_manager.load_data()
+            self.row_ids = alert_ids_for(self.original_df)
             
-            if self.df.empty:
-                self.table.setRowCount(0)
-                self.table.setColumnCount(0)
+            # Ediciones que no alcanzaron a guardarse (p. ej. por un cierre inesperado)
+            if self.journal is None:
+                self.journal = ChangeJournal.for_excel(self.excel_manager)
+            if len(self.journal):
+                print(f"✏️ {len(self.journal)} cambios pendientes del diario")
+                self.original_df = self.journal.overlay(self.original_df, self.row_ids)
+                self.journal_timer.start()
+            self.table_model.set_dataframe(self.original_df, self.row_ids.to_numpy())
+            self.filter_engine = FilterEngine(self.original_df)
+            self.update_search_index()
+            if self.statistics is None:
+                self.statistics = AlertStatistics.for_excel(self.excel_manager)
+            self.statistics.update_from_frame(self.original_df)
+            # Se registra después del índice y las estadísticas para que estén al día al aplicar cambios
+            self.excel_manager.add_change_listener(self._change_listener)
+            for column, name in enumerate(self.original_df.columns):
+                self.table.setColumnHidden(column, name in HIDDEN_COLUMNS)
+                
+            if self.original_df.empty:
                 self.stats_label.setText("No hay datos disponibles")
                 return
                 
-            self.populate_table(self.df)
+            self.apply_filters()
+            self.resize_columns()
             self.update_statistics()
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error cargando datos: {e}")
 
-    def populate_table(self, df):
-        """Llena la tabla con los datos del DataFrame"""
-        # Configurar tabla
-        self.table.setRowCount(len(df))
-        self.table.setColumnCount(len(df.columns))
-        self.table.setHorizontalHeaderLabels(df.columns.tolist())
+    def resize_columns(self):
+        """Ajusta el ancho de las columnas sin medir todas las celdas
         
-        # Llenar datos
-        for row in range(len(df)):
-            for col in range(len(df.columns)):
-                value = df.iloc[row, col]
-                
-                # Manejar valores especiales
-                if pd.isna(value) or (isinstance(value, str) and value.lower() in ['nat', 'nan']):
-                    display_value = ""
-                else:
-                    display_value = str(value)
-                
-                item = QTableWidgetItem(display_value)
-                
-                # Colorear filas según tipo de alerta
-                if df.columns[col] == 'TipoAlerta':
-                    if value == 'Roja':
-                        item.setBackground(QColor(220, 53, 69))  # Bootstrap danger
-                        item.setForeground(QColor(255, 255, 255))
-                    elif value == 'Naranja':
-                        item.setBackground(QColor(255, 140, 0))  # Naranja
-                        item.setForeground(QColor(255, 255, 255))
-                    elif value == 'Amarilla':
-                        item.setBackground(QColor(255, 193, 7))  # Bootstrap warning
-                        item.setForeground(QColor(33, 37, 41))
-                else:
-                    # Aplicar colores alternados para mejor contraste
-                    if row % 2 == 0:
-                        item.setBackground(QColor(248, 249, 250))  # Gris muy claro
-                    else:
-                        item.setBackground(QColor(255, 255, 255))  # Blanco
-                    item.setForeground(QColor(33, 37, 41))  # Texto oscuro
-                        
-                self.table.setItem(row, col, item)
+        Se mide una muestra de filas y el encabezado; el largo máximo en caracteres
+        de la columna (guardado en el modelo) completa la estimación. El costo no
+        depende de la cantidad de alertas.
+        """
+        metrics = self.table.fontMetrics()
+        header = self.table.horizontalHeader()
+        char_width = metrics.averageCharWidth()
+        
+        for column, name in enumerate(self.original_df.columns):
+            if self.table.isColumnHidden(column):
+                continue
+            limit = MAX_LONG_TEXT_WIDTH if name in LONG_TEXT_COLUMNS else MAX_COLUMN_WIDTH
+            sample = self.table_model.sample_texts(column, RESIZE_SAMPLE_ROWS)
+            text_width = max((metrics.horizontalAdvance(text) for text in sample), default=0)
+            if text_width + CELL_PADDING < limit:
+                text_width = max(text_width, self.table_model.max_text_length(column) * char_width)
+            width = max(header.sectionSizeHint(column), text_width + CELL_PADDING)
+            self.table.setColumnWidth(column, min(width, limit))
+
+    def apply_saved_data(self, saved_df):
+        """Aplica los datos recién guardados insertando/quitando solo las filas que cambiaron
+        
+        Solo se recibe tras la primera carga (el listener se registra en load_data).
+        """
+        try:
+            df = self.excel_manager.derive_date_columns(saved_df)
+            row_ids = alert_ids_for(df)
+            if self.journal is not None:
+                # Las ediciones aún no guardadas se mantienen en la tabla
+                df = self.journal.overlay(df, row_ids)
+            
+            if self.original_df.empty or df.empty:
+                self.load_data()
+                return
                 
-        # Ajustar columnas
-        self.table.resizeColumnsToContents()
+            # Alertas que siguen existiendo pero cuyo contenido cambió (p. ej. por sincronización)
+            common_columns = [col for col in df.columns if col in self.original_df.columns]
+            old_hashes = pd.Series(
+                pd.util.hash_pandas_object(self.original_df[common_columns].astype(str), index=False).to_numpy(),
+                index=self.row_ids.to_numpy())
+            new_hashes = pd.Series(
+                pd.util.hash_pandas_object(df[common_columns].astype(str), index=False).to_numpy(),
+                index=row_ids.to_numpy())
+            old_hashes = old_hashes[~old_hashes.index.duplicated()]
+            new_hashes = new_hashes[~new_hashes.index.duplicated()]
+            common_ids = new_hashes.index.intersection(old_hashes.index)
+            changed_ids = common_ids[new_hashes[common_ids].to_numpy() != old_hashes[common_ids].to_numpy()]
+            
+            self.original_df = df
+            self.row_ids = row_ids
+            self.filter_engine = FilterEngine(df)
+            self.table_model.apply_changes(df, row_ids.to_numpy(), self.filtered_positions(),
+                                           changed_ids=changed_ids.tolist())
+            self.update_statistics()
+            
+        except Exception as e:
+            print(f"⚠️ Error aplicando cambios al visor, se recargan los datos: {e}")
+            self.load_data()
 
-    def update_statistics(self):
-        """Actualiza las estadísticas mostradas"""
+    def on_cell_edited(self, position, column, old_value, new_value):
+        """Anota la edición en el diario y programa el guardado del lote"""
         try:
-            stats = self.excel_manager.get_statistics()
-            current_total = len(self.df)
+            user = self.current_user.username if self.current_user else None
+            self.journal.record(self.row_ids.iat[position], column, old_value, new_value, user)
+            # Los índices de filtros se reconstruyen al primer uso con el valor nuevo
+            self.filter_engine = FilterEngine(self.original_df)
+            self.journal_timer.start()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"No se pudo registrar el cambio: {e}")
+
+    def on_edit_rejected(self, message):
+        """Muestra por qué no se aceptó una edición"""
+        QMessageBox.warning(self, "Error", message)
+
+    def flush_journal(self):
+        """Guarda los cambios pendientes en el Excel en un thread (no bloquea la tabla)"""
+        if self.journal is None or not len(self.journal):
+            return
+        if self.flush_thread is not None and self.flush_thread.isRunning():
+            self._flush_again = True  # Las ediciones nuevas van en el próximo lote
+            return
             
-            self.stats_label.setText(
-                f"Mostrando: {current_total} alertas | "
+        self._flush_again = False
+        self.flush_thread = JournalFlushThread(self.journal, self.excel_manager, self)
+        self.flush_thread.flushed.connect(self.on_journal_flushed)
+        self.flush_thread.start()
+
+    def on_journal_flushed(self, success, message):
+        """Resultado del guardado de un lote de ediciones"""
+        if success:
+            print(f"💾 {message}")
+        else:
+            # Los cambios siguen en el diario; se reintenta en el próximo lote
+            print(f"⚠️ {message}")
+            self.journal_timer.start()
+        if self._flush_again:
+            self.flush_journal()
+
+    def stop_background_work(self):
+        """Cancela la exportación y espera el guardado en curso (al cerrar la aplicación)
+        
+        Las ediciones aún no guardadas quedan en el diario.
+        """
+        self.journal_timer.stop()
+        if self.export_thread is not None:
+            self.export_thread.cancel()
+            self.export_thread.wait()
+        if self.flush_thread is not None:
+            self.flush_thread.wait()
+
+    @staticmethod
+    def _remove_change_listener_for(excel_manager, listener):
+        """Callback para quitar el listener cuando se destruye el visor"""
+        return lambda *args: excel_manager.remove_change_listener(listener)
+
+    def update_statistics(self):
+        """Actualiza las estadísticas mostradas (contadores en memoria, sin leer el Excel)"""
+        try:
+            stats = self.statistics.snapshot()
+            self.stats_summary = (
                 f"Total en BD: {stats['total_alerts']} | "
                 f"Rojas: {stats['alert_by_type'].get('Roja', 0)} | "
                 f"Naranjas: {stats['alert_by_type'].get('Naranja', 0)} | "
                 f"Amarillas: {stats['alert_by_type'].get('Amarilla', 0)}"
             )
         except Exception:
-            self.stats_label.setText(f"Mostrando: {len(self.df)} alertas")
+            self.stats_summary = ""
+        self.update_shown_count()
+
+    def update_shown_count(self, *args):
+        """Actualiza "Mostrando X de Y" a medida que la tabla carga páginas"""
+        shown = f"Mostrando: {self.table_model.rowCount()} de {self.table_model.total_rows()} alertas"
+        self.stats_label.setText(f"{shown} | {self.stats_summary}" if self.stats_summary else shown)
 
     # ---------------------------- FILTERS AND SEARCH ---------------------------- #
-    def filter_data(self, filter_type):
-        """Aplica filtro por tipo de alerta"""
-        if filter_type == "Todas":
-            filtered_df = self.original_df.copy()
-        else:
-            filtered_df = self.original_df[self.original_df['TipoAlerta'] == filter_type].copy()
+    def apply_filters(self):
+        """Muestra las filas que cumplen el filtro por tipo y la búsqueda actuales"""
+        self.table_model.set_rows(self.filtered_positions())
+
+    def filtered_positions(self) -> np.ndarray:
+        """Posiciones (en original_df) de las filas que cumplen el filtro y la búsqueda"""
+        filter_type = self.filter_combo.currentText()
+        mask = self.filter_engine.mask({'TipoAlerta': None if filter_type == "Todas" else filter_type})
         
-        # Aplicar búsqueda si hay texto
         search_text = self.search_input.text().strip()
-        if search_text:
-            mask = filtered_df['Observaciones'].str.contains(search_text, case=False, na=False)
-            filtered_df = filtered_df[mask]
-        
-        self.df = filtered_df
-        self.populate_table(self.df)
+        if search_text and self.search_index is not None:
+            # La última palabra se busca como prefijo mientras se escribe
+            prefix_last = not self.search_input.text().endswith((' ', '"'))
+            matches = self.search_index.search(search_text, prefix_last=prefix_last)
+            mask &= self.row_ids.isin(matches).to_numpy()
+            
+        return np.flatnonzero(mask)
+
+    def update_search_index(self):
+        """Actualiza el índice de texto con las alertas nuevas o modificadas"""
+        try:
+            if self.search_index is None:
+                self.search_index = SearchIndex.for_excel(self.excel_manager)
+            added, updated, removed = self.search_index.update_from_frame(self.original_df)
+            if added or updated or removed:
+                print(f"🔎 Índice de búsqueda: {added} nuevas, {updated} actualizadas, {removed} eliminadas")
+            self.search_index.save()
+        except Exception as e:
+            print(f"⚠️ Error actualizando índice de búsqueda: {e}")
+
+    def filter_data(self, filter_type):
+        """Aplica filtro por tipo de alerta"""
+        self.apply_filters()
         self.update_statistics()
 
     def search_data(self, search_text):
-        """Aplica búsqueda en observaciones"""
-        # Comenzar con filtro actual
-        filter_type = self.filter_combo.currentText()
-        if filter_type == "Todas":
-            filtered_df = self.original_df.copy()
-        else:
-            filtered_df = self.original_df[self.original_df['TipoAlerta'] == filter_type].copy()
-        
-        # Aplicar búsqueda
-        if search_text.strip():
-            mask = filtered_df['Observaciones'].str.contains(search_text, case=False, na=False)
-            filtered_df = filtered_df[mask]
-        
-        self.df = filtered_df
-        self.populate_table(self.df)
+        """Programa la búsqueda; cada tecla reinicia la espera"""
+        self.search_timer.start()
+
+    def run_search(self):
+        """Aplica la búsqueda en observaciones, cronología y ubicación"""
+        self.apply_filters()
         self.update_statistics()
 
     # ---------------------------- ACTIONS ---------------------------- #
     def on_selection_changed(self):
         """Maneja cambios en la selección de la tabla"""
         selected_rows = len(self.table.selectionModel().selectedRows())
-        self.export_button.setEnabled(selected_rows > 0)
+        self.export_button.setText("Exportar Selección" if selected_rows > 0 else "Exportar Vista")
         self.delete_button.setEnabled(selected_rows > 0)
 
     def export_selected(self):
-        """Exporta las filas seleccionadas"""
-        selected_rows = [item.row() for item in self.table.selectionModel().selectedRows()]
-        
-        if not selected_rows:
-            QMessageBox.warning(self, "Advertencia", "Seleccione al menos una fila para exportar")
+        """Exporta las filas seleccionadas o, si no hay selección, toda la vista filtrada"""
+        if self.export_thread is not None and self.export_thread.isRunning():
+            QMessageBox.warning(self, "Advertencia", "Ya hay una exportación en curso")
+            return
+            
+        selected_rows = sorted(item.row() for item in self.table.selectionModel().selectedRows())
+        # La vista incluye las filas de páginas que la tabla aún no cargó
+        positions = self.table_model.visible_positions()
+        if selected_rows:
+            positions = positions[selected_rows]
+        if len(positions) == 0:
+            QMessageBox.warning(self, "Advertencia", "No hay alertas para exportar")
             return
         
         try:
-            # Crear DataFrame con filas seleccionadas
-            selected_data = self.df.iloc[selected_rows]
-            
-            # Preguntar ubicación del archivo
+            # Preguntar ubicación y formato del archivo
             from PySide6.QtWidgets import QFileDialog
-            file_path, _ = QFileDialog.getSaveFileName(
+            file_path, selected_filter = QFileDialog.getSaveFileName(
                 self,
-                "Exportar alertas seleccionadas",
-                f"alertas_seleccionadas_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                "Excel Files (*.xlsx);;All Files (*)"
+                "Exportar alertas seleccionadas" if selected_rows else "Exportar alertas de la vista",
+                f"alertas_{'seleccionadas' if selected_rows else 'vista'}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                ";;".join(EXPORT_FORMATS.values())
             )
+            if not file_path:
+                return
+            if format_for_path(file_path) is None:
+                # Sin extensión conocida: se usa la del filtro elegido
+                extension = next((ext for ext, name in EXPORT_FORMATS.items() if name == selected_filter), 'xlsx')
+                file_path = f"{file_path}.{extension}"
+                
+            columns = [col for col in self.original_df.columns if col not in HIDDEN_COLUMNS]
+            service = ExportService(self.table_model.dataframe(), positions, columns)
+            
+            self.export_progress = QProgressDialog(f"Exportando {len(service)} alertas...", "Cancelar", 0, 100, self)
+            self.export_progress.setWindowTitle("Exportar")
+            self.export_progress.setWindowModality(Qt.WindowModal)
+            self.export_progress.setMinimumDuration(500)
             
-            if file_path:
-                selected_data.to_excel(file_path, index=False)
-                QMessageBox.information(self, "Éxito", f"Se exportaron {len(selected_rows)} alertas correctamente")
+            self.export_thread = ExportThread(service, file_path, self)
+            self.export_thread.progress.connect(self.export_progress.setValue)
+            self.export_thread.export_finished.connect(self.on_export_finished)
+            self.export_progress.canceled.connect(self.export_thread.cancel)
+            self.export_thread.start()
                 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al exportar: {e}")
 
+    def on_export_finished(self, success, message):
+        """Resultado de la exportación en segundo plano"""
+        self.export_progress.reset()
+        if success:
+            QMessageBox.information(self, "Éxito", message)
+        elif message == "Exportación cancelada":
+            print(f"ℹ️ {message}")
+        else:
+            QMessageBox.critical(self, "Error", message)
+
     def delete_selected(self):
         """Elimina las filas seleccionadas"""
         selected_rows = [item.row() for item in self.table.selectionModel().selectedRows()]
@@ -354,25 +589,35 @@ class AlertsDataViewer(QWidget):
         
         if reply == QMessageBox.Yes:
             try:
-                # Obtener índices originales para eliminar del Excel
-                original_indices = self.df.iloc[selected_rows].index.tolist()
+                # AlertaId de las filas seleccionadas (las posiciones no sirven para el Excel releído)
+                positions = self.table_model.visible_positions()[selected_rows]
+                alert_ids = self.row_ids.iloc[positions].tolist()
                 
-                # Eliminar del Excel (esto requiere implementar método en ExcelManager)
-                success = self.excel_manager.delete_alerts_by_index(original_indices)
+                # Eliminar del Excel
+                success = self.excel_manager.delete_alerts_by_id(alert_ids)
                 
                 if success:
+                    # La tabla ya se actualizó con la notificación de cambios del Excel
                     QMessageBox.information(self, "Éxito", f"Se eliminaron {len(selected_rows)} alertas correctamente")
-                    self.load_data()  # Recargar datos
                 else:
                     QMessageBox.critical(self, "Error", "No se pudieron eliminar las alertas")
                     
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error al eliminar: {e}")
 
+    def set_current_user(self, user):
+        """Establece el usuario que edita (queda registrado en el diario) y sus permisos"""
+        self.current_user = user
+        
+        from src.auth.login_manager import AuthManager
+        if user is not None and not AuthManager().has_permission(user, "write"):
+            self.set_read_only(True)
+
     def set_read_only(self, read_only=True):
         """Configura la vista de datos en modo solo lectura"""
-        # Deshabilitar botón de eliminar
+        # Deshabilitar botón de eliminar y la edición de celdas
         self.delete_button.setEnabled(not read_only)
+        self.table_model.set_editable(not read_only)
         
         # Los botones de exportar y actualizar siempre deben estar habilitados
         self.export_button.setEnabled(True)
@@ -0,0 +1,428 @@
+"""
+Modelo de tabla para el visor de alertas
+Expone un DataFrame a QTableView formateando solo las celdas visibles; filtrar
+equivale a reemplazar el arreglo de posiciones de filas mostradas y ordenar, a
+reordenarlo con un orden precalculado por columna. Las filas se entregan a la
+vista por páginas (canFetchMore/fetchMore), empezando por las alertas más recientes
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+from PySide6.QtGui import QBrush, QColor
+
+from src.data.excel_manager import parse_fecha_hora
+from src.utils.alert_validation import normalize_velocity, validate_alert_fields
+
+# Colores por tipo de alerta (fondo, texto); se crean una sola vez
+ALERT_TYPE_BRUSHES = {
+    'Roja': (QBrush(QColor(220, 53, 69)), QBrush(QColor(255, 255, 255))),      # Bootstrap danger
+    'Naranja': (QBrush(QColor(255, 140, 0)), QBrush(QColor(255, 255, 255))),   # Naranja
+    'Amarilla': (QBrush(QColor(255, 193, 7)), QBrush(QColor(33, 37, 41))),     # Bootstrap warning
+}
+DEFAULT_TEXT_BRUSH = QBrush(QColor(33, 37, 41))
+
+# Columnas que se ordenan como fecha o como número (el resto, como texto sin mayúsculas)
+DATE_SORT_COLUMNS = ['FechaHora', 'FechaHoraColapso', 'FechaRegistro']
+NUMERIC_SORT_COLUMNS = ['VelocidadMmDia', 'Año', 'Mes']
+# Criterios de orden que se conservan (el último clic es el principal)
+MAX_SORT_KEYS = 3
+# Orden sin criterios elegidos: alertas más recientes primero
+DEFAULT_SORT_KEYS = [('FechaHora', False)]
+# Filas que se entregan a la vista en cada página
+PAGE_SIZE = 500
+# Columnas que se pueden corregir en la tabla (el resto identifica o describe el registro)
+EDITABLE_COLUMNS = [
+    'TipoAlerta', 'Condicion', 'Ubicacion', 'VelocidadMmDia', 'Respaldo', 'Colapso',
+    'FechaHoraColapso', 'Evacuacion', 'CronologiaAnalisis', 'Observaciones'
+]
+# Columnas que se validan juntas (la fecha de colapso depende de la alerta)
+RELATED_FIELDS = {
+    'Colapso': ['FechaHora', 'FechaHoraColapso'],
+    'FechaHoraColapso': ['FechaHora', 'Colapso'],
+}
+
+
+def format_cell(value) -> str:
+    """Texto a mostrar para un valor del DataFrame"""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return "" if value.lower() in ('nat', 'nan') else value
+    if pd.isna(value):
+        return ""
+    return str(value)
+
+
+def _max_text_length(values: np.ndarray) -> int:
+    """Largo del texto más largo entre los valores (tal como se muestran)"""
+    if len(values) == 0:
+        return 0
+    return int(pd.Series(values, dtype=object).map(format_cell).str.len().max())
+
+
+def _blocks(rows: np.ndarray) -> List[Tuple[int, int]]:
+    """Agrupa filas ordenadas en bloques contiguos [(primera, última)]"""
+    if len(rows) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) > 1)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]]))
+    return [(int(first), int(last)) for first, last in zip(starts, ends)]
+
+
+class AlertsTableModel(QAbstractTableModel):
+    """Modelo sobre un DataFrame de alertas, editable en las columnas de EDITABLE_COLUMNS
+    
+    Las columnas se guardan como arreglos de objetos para acceder a cada celda
+    sin pasar por iloc; rows contiene las posiciones (en el DataFrame) de las
+    filas visibles, en el orden en que se muestran. La vista solo conoce las
+    primeras fetched filas; el resto se entrega con fetchMore al desplazarse.
+    Las ediciones se validan en setData y se anuncian con cell_edited (quien la
+    escucha las guarda); set_editable(False) deja el modelo en solo lectura.
+    """
+    
+    # Filas entregadas a la vista y total de filas que cumplen los filtros
+    rows_fetched = Signal(int, int)
+    # Celda editada: (posición en el DataFrame, columna, valor anterior, valor nuevo)
+    cell_edited = Signal(int, str, object, object)
+    # Edición rechazada por la validación (mensaje)
+    edit_rejected = Signal(str)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._df = pd.DataFrame()
+        self._columns: List[str] = []
+        self._values: List[np.ndarray] = []
+        self._rows = np.arange(0)
+        self._filtered = np.arange(0)  # Filas que cumplen los filtros, en orden del DataFrame
+        self._fetched = 0  # Filas de _rows ya entregadas a la vista
+        self._type_column: Optional[int] = None
+        self._ids: Optional[np.ndarray] = None  # AlertaId por posición (para apply_changes)
+        self._max_lengths: Dict[int, int] = {}  # Largo máximo del texto por columna (ancho de columnas)
+        self._editable = True
+        
+        # Orden: [(columna, ascendente)], rangos por columna y órdenes completos ya calculados
+        self._sort_keys: List[Tuple[str, bool]] = []
+        self._rank_cache: Dict[str, Tuple[np.ndarray, int]] = {}
+        self._order_cache: Dict[tuple, np.ndarray] = {}
+        
+    # ---------------------------- Datos ---------------------------- #
+    def _install(self, df: pd.DataFrame, row_ids: Optional[Sequence[str]]):
+        """Reemplaza los datos internos (sin notificar a la vista)"""
+        self._df = df
+        self._ids = np.asarray(row_ids, dtype=object) if row_ids is not None else None
+        self._columns = [str(col) for col in df.columns]
+        self._values = [df[col].to_numpy(dtype=object) for col in df.columns]
+        self._type_column = self._columns.index('TipoAlerta') if 'TipoAlerta' in self._columns else None
+        self._sort_keys = [key for key in self._sort_keys if key[0] in self._columns]
+        self._rank_cache = {}
+        self._order_cache = {}
+        self._max_lengths = {}
+        
+    def _state(self) -> tuple:
+        return (self._df, self._ids, self._columns, self._values, self._type_column,
+                self._rank_cache, self._order_cache, self._max_lengths)
+                
+    def _restore(self, state: tuple):
+        (self._df, self._ids, self._columns, self._values, self._type_column,
+         self._rank_cache, self._order_cache, self._max_lengths) = state
+         
+    def set_dataframe(self, df: pd.DataFrame, row_ids: Optional[Sequence[str]] = None):
+        """Reemplaza los datos; todas las filas quedan visibles y se conserva el orden elegido
+        
+        row_ids (AlertaId por fila) permite actualizar luego con apply_changes.
+        """
+        self.beginResetModel()
+        self._install(df, row_ids)
+        self._filtered = np.arange(len(df))
+        self._rows = self._sorted(self._filtered)
+        self._fetched = min(PAGE_SIZE, len(self._rows))
+        self.endResetModel()
+        self.rows_fetched.emit(self._fetched, len(self._rows))
+        
+    def apply_changes(self, df: pd.DataFrame, row_ids: Sequence[str], positions: Sequence[int],
+                      changed_ids=()):
+        """Reemplaza los datos notificando solo las filas quitadas e insertadas
+        
+        Las filas se identifican por row_ids; las de changed_ids (contenido modificado)
+        se quitan y se vuelven a insertar. positions son las filas visibles del nuevo
+        DataFrame. La vista conserva selección y desplazamiento; los cambios en filas
+        aún no entregadas no se notifican.
+        """
+        if self._ids is None or len(self._columns) != len(df.columns) or \
+                self._columns != [str(col) for col in df.columns]:
+            self.set_dataframe(df, row_ids)
+            self.set_rows(positions)
+            return
+            
+        # Filas visibles del estado nuevo (se calculan antes de tocar la vista)
+        old_state = self._state()
+        self._install(df, row_ids)
+        new_rows = self._sorted(np.asarray(positions, dtype=np.int64))
+        new_state = self._state()
+        self._restore(old_state)
+        
+        # Los largos máximos se conservan sumando solo las alertas nuevas o modificadas
+        # (al eliminar quedan como cota superior)
+        added_positions = np.flatnonzero(
+            np.isin(new_state[1], self._ids, invert=True) | np.isin(new_state[1], list(changed_ids)))
+        for column, length in self._max_lengths.items():
+            new_state[-1][column] = max(length, _max_text_length(new_state[3][column][added_positions]))
+            
+        new_view_ids = new_state[1][new_rows]
+        old_view_ids = self._ids[self._rows]
+        changed = set(changed_ids)
+        removed = np.isin(old_view_ids, new_view_ids, invert=True)
+        if changed:
+            removed |= np.isin(old_view_ids, list(changed))
+            
+        # 1) Quitar filas (bloques contiguos, de abajo hacia arriba)
+        for first, last in reversed(_blocks(np.flatnonzero(removed))):
+            if first >= self._fetched:
+                self._rows = np.delete(self._rows, np.s_[first:last + 1])
+                continue
+            last_fetched = min(last, self._fetched - 1)
+            self.beginRemoveRows(QModelIndex(), first, last_fetched)
+            self._rows = np.delete(self._rows, np.s_[first:last + 1])
+            self._fetched -= last_fetched - first + 1
+            self.endRemoveRows()
+            
+        # 2) Pasar al estado nuevo; las filas restantes deben conservar su orden relativo
+        kept_ids = old_view_ids[~removed]
+        self._restore(new_state)
+        target_of = {alert_id: row for row, alert_id in enumerate(new_view_ids)}
+        kept_targets = np.array([target_of[alert_id] for alert_id in kept_ids], dtype=np.int64)
+        if len(kept_targets) and np.any(np.diff(kept_targets) <= 0):
+            self.beginResetModel()
+            self._filtered = np.asarray(positions, dtype=np.int64)
+            self._rows = new_rows
+            self._fetched = min(max(self._fetched, PAGE_SIZE), len(self._rows))
+            self.endResetModel()
+            self.rows_fetched.emit(self._fetched, len(self._rows))
+            return
+        self._rows = new_rows[kept_targets]
+        
+        # 3) Insertar filas nuevas en su posición final (de arriba hacia abajo); las que
+        #    caen después de la última página entregada llegarán con fetchMore
+        inserted = np.setdiff1d(np.arange(len(new_rows)), kept_targets)
+        for first, last in _blocks(inserted):
+            if first >= self._fetched and self._fetched < len(self._rows):
+                self._rows = np.insert(self._rows, first, new_rows[first:last + 1])
+                continue
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._rows = np.insert(self._rows, first, new_rows[first:last + 1])
+            self._fetched += last - first + 1
+            self.endInsertRows()
+            
+        self._filtered = np.asarray(positions, dtype=np.int64)
+        self.rows_fetched.emit(self._fetched, len(self._rows))
+        
+    def set_rows(self, positions: Sequence[int]):
+        """Muestra solo las filas indicadas (posiciones en el DataFrame), respetando el orden"""
+        self.beginResetModel()
+        self._filtered = np.asarray(positions, dtype=np.int64)
+        self._rows = self._sorted(self._filtered)
+        self._fetched = min(PAGE_SIZE, len(self._rows))
+        self.endResetModel()
+        self.rows_fetched.emit(self._fetched, len(self._rows))
+        
+    def total_rows(self) -> int:
+        """Filas que cumplen los filtros (entregadas o no a la vista)"""
+        return len(self._rows)
+        
+    def dataframe(self) -> pd.DataFrame:
+        """DataFrame completo (sin filtrar)"""
+        return self._df
+        
+    def visible_positions(self) -> np.ndarray:
+        """Posiciones en el DataFrame de las filas visibles (incluye las aún no entregadas)"""
+        return self._rows
+        
+    def rows_frame(self, view_rows: Sequence[int]) -> pd.DataFrame:
+        """Filas del DataFrame correspondientes a filas de la vista"""
+        return self._df.iloc[self._rows[list(view_rows)]]
+        
+    def max_text_length(self, column: int) -> int:
+        """Largo del texto más largo de la columna en todos los datos (en caché)"""
+        if column not in self._max_lengths:
+            self._max_lengths[column] = _max_text_length(self._values[column])
+        return self._max_lengths[column]
+        
+    def sample_texts(self, column: int, count: int) -> List[str]:
+        """Textos de las primeras filas de la vista en la columna (muestra para el ancho)"""
+        return [format_cell(value) for value in self._values[column][self._rows[:count]]]
+        
+    # ---------------------------- Orden ---------------------------- #
+    def _ranks(self, column: str) -> Tuple[np.ndarray, int]:
+        """Rango denso de cada fila según la columna (vacíos = -1) y cantidad de valores"""
+        if column not in self._rank_cache:
+            series = self._df[column]
+            if column in DATE_SORT_COLUMNS:
+                values = parse_fecha_hora(series)
+            elif column in NUMERIC_SORT_COLUMNS:
+                values = pd.to_numeric(series.astype(str).str.replace(',', '.'), errors='coerce')
+            else:
+                values = series.where(series.isna(), series.astype(str).str.lower())
+            codes, uniques = pd.factorize(values, sort=True)
+            self._rank_cache[column] = (codes, len(uniques))
+        return self._rank_cache[column]
+        
+    def _effective_sort_keys(self) -> List[Tuple[str, bool]]:
+        """Criterios elegidos o, si no hay, el orden por defecto (más recientes primero)"""
+        if self._sort_keys:
+            return self._sort_keys
+        return [key for key in DEFAULT_SORT_KEYS if key[0] in self._columns]
+        
+    def _full_order(self) -> np.ndarray:
+        """Orden de todas las filas del DataFrame según los criterios actuales (en caché)"""
+        sort_keys = self._effective_sort_keys()
+        spec = tuple(sort_keys)
+        if spec not in self._order_cache:
+            keys = []
+            # lexsort usa la última clave como principal: se recorren del menos al más reciente
+            for column, ascending in sort_keys:
+                codes, count = self._ranks(column)
+                key = codes if ascending else count - 1 - codes
+                keys.append(np.where(codes < 0, count, key))  # Vacíos siempre al final
+            self._order_cache[spec] = np.lexsort(keys)
+        return self._order_cache[spec]
+        
+    def _sorted(self, positions: np.ndarray) -> np.ndarray:
+        """Posiciones ordenadas; filtrar no requiere volver a ordenar"""
+        if not self._effective_sort_keys() or len(positions) == 0:
+            return positions
+        order = self._full_order()
+        if len(positions) == len(order):
+            return order
+        visible = np.zeros(len(order), dtype=bool)
+        visible[positions] = True
+        return order[visible[order]]
+        
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        """Ordena por una columna; los criterios anteriores desempatan (orden estable)"""
+        self.layoutAboutToBeChanged.emit()
+        
+        if column < 0 or column >= len(self._columns):
+            self._sort_keys = []
+        else:
+            name = self._columns[column]
+            previous = [key for key in self._sort_keys if key[0] != name]
+            self._sort_keys = (previous + [(name, order == Qt.AscendingOrder)])[-MAX_SORT_KEYS:]
+            
+        old_rows = self._rows
+        self._rows = self._sorted(self._filtered)
+        self._update_persistent_indexes(old_rows)
+        self.layoutChanged.emit()
+        
+    def _update_persistent_indexes(self, old_rows: np.ndarray):
+        """Mantiene la selección sobre las mismas alertas tras reordenar"""
+        persistent = self.persistentIndexList()
+        if not persistent:
+            return
+        new_row_of = np.empty(len(self._df), dtype=np.int64)
+        new_row_of[self._rows] = np.arange(len(self._rows))
+        # Las filas que pasan a una página no entregada quedan fuera de la selección
+        self.changePersistentIndexList(
+            persistent,
+            [self.index(int(new_row_of[old_rows[index.row()]]), index.column()) for index in persistent]
+        )
+        
+    # ---------------------------- Edición ---------------------------- #
+    def set_editable(self, editable: bool):
+        """Habilita o deshabilita la edición de celdas (modo solo lectura)"""
+        self._editable = editable
+        
+    def flags(self, index: QModelIndex):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if self._editable and index.isValid() and self._columns[index.column()] in EDITABLE_COLUMNS:
+            flags |= Qt.ItemIsEditable
+        return flags
+        
+    def setData(self, index: QModelIndex, value, role=Qt.EditRole) -> bool:
+        """Valida y aplica la edición de una celda; el guardado lo hace quien escucha cell_edited"""
+        if role != Qt.EditRole or not index.isValid() or not (self.flags(index) & Qt.ItemIsEditable):
+            return False
+            
+        column = index.column()
+        name = self._columns[column]
+        position = int(self._rows[index.row()])
+        old_value = self._values[column][position]
+        text = '' if value is None else str(value).strip()
+        if text == format_cell(old_value):
+            return False
+            
+        fields = {related: format_cell(self._values[self._columns.index(related)][position])
+                  for related in RELATED_FIELDS.get(name, []) if related in self._columns}
+        fields[name] = text
+        valid, message = validate_alert_fields(fields)
+        if not valid:
+            self.edit_rejected.emit(message)
+            return False
+            
+        new_value = normalize_velocity(text) if name == 'VelocidadMmDia' else (text or None)
+        if self._df[name].dtype != object:
+            self._df[name] = self._df[name].astype(object)
+        self._df.iat[position, column] = new_value
+        self._values[column][position] = new_value
+        
+        # Los órdenes y largos en caché dependen del valor editado
+        self._rank_cache.pop(name, None)
+        self._order_cache = {}
+        if column in self._max_lengths:
+            self._max_lengths[column] = max(self._max_lengths[column], len(text))
+            
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self.cell_edited.emit(position, name, old_value, new_value)
+        return True
+        
+    # ---------------------------- QAbstractTableModel ---------------------------- #
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._fetched
+        
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._fetched < len(self._rows)
+        
+    def fetchMore(self, parent=QModelIndex()):
+        """Entrega a la vista la siguiente página de filas"""
+        if parent.isValid():
+            return
+        count = min(PAGE_SIZE, len(self._rows) - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+        self.rows_fetched.emit(self._fetched, len(self._rows))
+        
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+        
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+            
+        column = index.column()
+        
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return format_cell(self._values[column][self._rows[index.row()]])
+            
+        if column == self._type_column and role in (Qt.BackgroundRole, Qt.ForegroundRole):
+            brushes = ALERT_TYPE_BRUSHES.get(self._values[column][self._rows[index.row()]])
+            if brushes is None:
+                return DEFAULT_TEXT_BRUSH if role == Qt.ForegroundRole else None
+            return brushes[0] if role == Qt.BackgroundRole else brushes[1]
+            
+        if role == Qt.ForegroundRole:
+            return DEFAULT_TEXT_BRUSH
+            
+        return None
+        
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._columns[section] if section < len(self._columns) else None
+        return str(section + 1)
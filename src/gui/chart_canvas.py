@@ -0,0 +1,76 @@
+"""
+Canvas de matplotlib para los gráficos del dashboard
+La figura se puede actualizar y dibujar (Agg) en un thread de trabajo; el thread
+de la interfaz solo copia a pantalla el buffer ya renderizado; el pan/zoom con el
+mouse y la barra de navegación modifican la figura dentro del mismo lock
+"""
+
+import threading
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg, NavigationToolbar2QT
+
+
+class ChartCanvas(FigureCanvasQTAgg):
+    """FigureCanvasQTAgg con un lock por figura
+    
+    Quien modifique la figura fuera del thread de la interfaz debe hacerlo dentro de
+    render_lock; el redimensionado y el pintado del widget lo respetan.
+    """
+    
+    def __init__(self, figure):
+        super().__init__(figure)
+        self.render_lock = threading.RLock()
+        
+    def render_offscreen(self):
+        """Dibuja la figura en el buffer Agg sin tocar el widget (válido desde cualquier thread)"""
+        with self.render_lock:
+            FigureCanvasAgg.draw(self)
+            
+    def draw(self):
+        with self.render_lock:
+            super().draw()
+            
+    def resizeEvent(self, event):
+        # Cambia el tamaño de la figura: se espera a que termine el dibujo en curso
+        with self.render_lock:
+            super().resizeEvent(event)
+            
+    # Pan y zoom con el mouse cambian los límites de los ejes: mismo lock que el render
+    def mousePressEvent(self, event):
+        with self.render_lock:
+            super().mousePressEvent(event)
+            
+    def mouseMoveEvent(self, event):
+        with self.render_lock:
+            super().mouseMoveEvent(event)
+            
+    def mouseReleaseEvent(self, event):
+        with self.render_lock:
+            super().mouseReleaseEvent(event)
+            
+    def wheelEvent(self, event):
+        with self.render_lock:
+            super().wheelEvent(event)
+            
+    def paintEvent(self, event):
+        # Si otro thread está dibujando se omite; al terminar se pide un nuevo pintado
+        if not self.render_lock.acquire(blocking=False):
+            return
+        try:
+            super().paintEvent(event)
+        finally:
+            self.render_lock.release()
+
+
+class ChartToolbar(NavigationToolbar2QT):
+    """Barra de navegación (inicio, atrás, adelante, pan, zoom, guardar) de un ChartCanvas"""
+    
+    # Sin ajuste de márgenes ni edición de ejes: cambiarían la figura fuera del lock
+    toolitems = [item for item in NavigationToolbar2QT.toolitems
+                 if item[0] in ('Home', 'Back', 'Forward', 'Pan', 'Zoom', 'Save', None)]
+    
+    def _update_view(self):
+        # Inicio/atrás/adelante restauran límites guardados
+        with self.canvas.render_lock:
+            super()._update_view()
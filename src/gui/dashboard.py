@@ -4,11 +4,12 @@ Proporciona una vista de dashboard con KPIs, gráficos y filtros de datos
 """
 
 import sys
+import time
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                                QPushButton, QFrame, QScrollArea, QGridLayout,
                                QComboBox, QGroupBox, QSizePolicy)
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QFont, QPalette, QPixmap
+from PySide6.QtCore import Qt, Signal, QThread, QTimer
+from PySide6.QtGui import QFont, QPalette
 import pandas as pd
 import numpy as np
 
@@ -19,10 +20,12 @@ plt = None
 Figure = None
 sns = None
 FigureCanvas = None
+NavigationToolbar = None
+mdates = None
 
 def _load_matplotlib():
     """Carga matplotlib - optimizado para librerías precargadas"""
-    global MATPLOTLIB_AVAILABLE, matplotlib, plt, Figure, sns, FigureCanvas
+    global MATPLOTLIB_AVAILABLE, matplotlib, plt, Figure, sns, FigureCanvas, NavigationToolbar, mdates
     
     if MATPLOTLIB_AVAILABLE is not None:
         return MATPLOTLIB_AVAILABLE
@@ -31,14 +34,17 @@ def _load_matplotlib():
         # Las librerías ya están precargadas, solo necesitamos importarlas
         import matplotlib as mpl
         import matplotlib.pyplot as pyplot
+        import matplotlib.dates as matplotlib_dates
         from matplotlib.figure import Figure as MatplotlibFigure
-        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from src.gui.chart_canvas import ChartCanvas, ChartToolbar
         
         # Asignar a variables globales (configuración ya hecha en main.py)
         matplotlib = mpl
         plt = pyplot
         Figure = MatplotlibFigure
-        FigureCanvas = FigureCanvasAgg
+        FigureCanvas = ChartCanvas  # Canvas Qt que pinta directo desde el buffer Agg
+        NavigationToolbar = ChartToolbar
+        mdates = matplotlib_dates
         
         # Importar seaborn opcionalmente (también precargado)
         try:
@@ -57,9 +63,78 @@ def _load_matplotlib():
     return MATPLOTLIB_AVAILABLE
 
 # Importar módulos adicionales
-import io
 from datetime import datetime, timedelta
 from src.data.excel_manager import ExcelManager
+from src.data.query_provider import (create_query_provider, empty_aggregates,
+                                     DataFrameQueryProvider, SQLQueryProvider)
+from src.data.timeseries import AlertTimeSeries
+from src.gui.render_cache import RenderCache
+
+# Pausa tras el último cambio de filtros antes de actualizar KPIs y gráficos
+REFRESH_DEBOUNCE_MS = 200
+
+# Colores para cada tipo de alerta (más opciones)
+ALERT_COLORS = {
+    'Amarilla': '#FFD600',      # Amarillo brillante
+    'Amarillo': '#FFD600',      # Por si viene como "Amarillo"
+    'Naranja': '#FF9040',       # Naranja corporativo Teck
+    'Roja': '#FF4040',          # Rojo vibrante
+    'Rojo': '#FF4040',          # Por si viene como "Rojo"
+    'Verde': '#00A26A',         # Verde corporativo Teck
+    'Azul': '#3153E4',          # Azul corporativo Teck
+    'Alta': '#FF4040',          # Roja para "Alta"
+    'Media': '#FF9040',         # Naranja para "Media"
+    'Baja': '#FFD600',          # Amarillo para "Baja"
+    'Crítica': '#8B0000',       # Rojo oscuro para "Crítica"
+}
+# Colores de fondo suaves para cada alerta
+ALERT_BACKGROUNDS = {
+    'Amarilla': '#FFFDE7',     'Amarillo': '#FFFDE7',
+    'Naranja': '#FFF3E0',
+    'Roja': '#FFEBEE',         'Rojo': '#FFEBEE',
+    'Verde': '#E8F5E8',
+    'Azul': '#E3F2FD',
+    'Alta': '#FFEBEE',
+    'Media': '#FFF3E0',
+    'Baja': '#FFFDE7',
+    'Crítica': '#FFCDD2'
+}
+# Tipos con color claro: porcentaje en negro para mantener el contraste
+LIGHT_ALERT_TYPES = ['Amarilla', 'Amarillo', 'Verde', 'Baja']
+# Colores para las diferentes condiciones
+CONDITION_COLORS = {
+    'Crítica': '#F44336',
+    'Progresiva': '#FF9800',
+    'Transgresiva': '#FFEB3B',
+    'Progresiva-Crítica': '#E91E63',
+    'Transgresiva-Progresiva': '#FF5722',
+    'Regresiva': '#4CAF50'
+}
+MONTH_NAMES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun',
+               'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+
+def _value_digits(values) -> int:
+    """Dígitos del mayor valor (el ancho de las etiquetas del eje influye en los márgenes)"""
+    return len(str(int(max(values, default=0))))
+
+
+def _update_pie(wedges, texts, autotexts, values, startangle=90, labeldistance=1.1, pctdistance=0.6):
+    """Actualiza porciones y textos de un gráfico de pie con nuevos valores (misma geometría que ax.pie)"""
+    total = float(sum(values))
+    theta1 = startangle / 360.0
+    for wedge, text, autotext, value in zip(wedges, texts, autotexts, values):
+        theta2 = theta1 + value / total
+        wedge.set_theta1(360.0 * theta1)
+        wedge.set_theta2(360.0 * theta2)
+        
+        angle = np.pi * (theta1 + theta2)  # Ángulo medio de la porción
+        x, y = np.cos(angle), np.sin(angle)
+        text.set_position((labeldistance * x, labeldistance * y))
+        text.set_horizontalalignment('left' if x > 0 else 'right')
+        autotext.set_position((pctdistance * x, pctdistance * y))
+        autotext.set_text(f'{100.0 * value / total:1.1f}%')
+        theta1 = theta2
 
 class KPIWidget(QFrame):
     """Widget para mostrar un KPI individual"""
@@ -102,9 +177,10 @@ class KPIWidget(QFrame):
 class ChartWidget(QFrame):
     """Widget para mostrar gráficos"""
     
-    def __init__(self, title):
+    def __init__(self, title, interactive=False):
         super().__init__()
         self.title = title
+        self.interactive = interactive  # Con barra de navegación (pan/zoom)
         self.setFrameStyle(QFrame.Box)
         # Container principal con altura más moderada
         self.setMinimumHeight(700)  # Reducido para mejor proporción
@@ -128,72 +204,155 @@ class ChartWidget(QFrame):
         title_label.setStyleSheet("font-weight: bold; font-size: 14px; color: #333; margin-bottom: 10px;")
         layout.addWidget(title_label)
         
-        # Inicializar canvas sin cargar matplotlib aún
-        self.canvas = QLabel()
-        self.canvas.setAlignment(Qt.AlignCenter)
-        self.canvas.setMinimumSize(900, 600)  # Canvas menos alto pero mismo ancho
-        self.canvas.setStyleSheet("border: 1px solid #ddd; background: white;")
-        self.canvas.setText("Cargando gráfico...")
-        layout.addWidget(self.canvas)
+        # Mensaje mientras no hay gráfico (el canvas se crea al cargar matplotlib)
+        self.message_label = QLabel("Cargando gráfico...")
+        self.message_label.setAlignment(Qt.AlignCenter)
+        self.message_label.setMinimumSize(900, 600)  # Canvas menos alto pero mismo ancho
+        self.message_label.setStyleSheet("border: 1px solid #ddd; background: white;")
+        layout.addWidget(self.message_label)
         
-        # Figura se creará cuando se necesite
+        # Figura y canvas se crearán cuando se necesiten
         self.figure = None
+        self.canvas = None
+        self.toolbar = None
+        self.layout_pad = None  # Padding de tight_layout, se reaplica al redimensionar
+        
+        # Ejes y artistas reutilizados entre actualizaciones
+        self.ax = None
+        self.artists = {}
+        self.layout_key = None  # Categorías dibujadas; si cambian se reconstruye el gráfico
         
         self.setLayout(layout)
         
+    def ensure_figure(self):
+        """Crea la figura y su canvas embebido la primera vez; devuelve la figura (None sin matplotlib)"""
+        if self.figure is not None:
+            return self.figure
+        if not _load_matplotlib():
+            self.show_message("📊 Gráficos no disponibles")
+            return None
+            
+        self.figure = Figure(figsize=(12, 8), dpi=75)
+        self.figure.patch.set_facecolor('white')
+        
+        # El canvas Qt ajusta la figura al tamaño real del widget (y a su device
+        # pixel ratio) y pinta el buffer Agg directamente, sin PNG ni escalado
+        self.canvas = FigureCanvas(self.figure)
+        self.canvas.setMinimumSize(900, 600)
+        self.canvas.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.canvas.mpl_connect('resize_event', self._on_canvas_resized)
+        self.canvas.hide()
+        if self.interactive:
+            self.toolbar = NavigationToolbar(self.canvas, self)
+            self.toolbar.hide()
+            self.layout().addWidget(self.toolbar)
+        self.layout().addWidget(self.canvas)
+        return self.figure
+        
+    def show_message(self, text):
+        """Muestra un texto en lugar del gráfico"""
+        self.message_label.setText(text)
+        self.message_label.show()
+        if self.canvas is not None:
+            self.canvas.hide()
+        if self.toolbar is not None:
+            self.toolbar.hide()
+            
+    def apply_layout(self, pad=6.0):
+        """Ajusta los márgenes de la figura a su tamaño actual (tight_layout)"""
+        self.layout_pad = pad
+        if self.figure is not None:
+            self.figure.tight_layout(pad=pad)
+            
+    def _on_canvas_resized(self, event):
+        # Solo se recalculan los márgenes; los artistas se conservan y el canvas
+        # programa su propio redibujado
+        if self.layout_pad is not None:
+            self.figure.tight_layout(pad=self.layout_pad)
+            
+    def reset_axes(self, layout_key):
+        """Limpia la figura y crea ejes nuevos para reconstruir el gráfico"""
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+        self.artists = {}
+        self.layout_key = layout_key
+        return self.ax
+        
+    def show_no_data(self):
+        """Muestra el texto 'Sin datos para mostrar' en lugar del gráfico"""
+        if self.ensure_figure() is None:
+            return
+        if self.layout_key != 'empty':
+            ax = self.reset_axes('empty')
+            ax.text(0.5, 0.5, 'Sin datos para mostrar', 
+                   horizontalalignment='center', verticalalignment='center',
+                   transform=ax.transAxes, fontsize=14, color='gray')
+            ax.set_xticks([])
+            ax.set_yticks([])
+            for spine in ax.spines.values():
+                spine.set_visible(False)
+            self.figure.subplots_adjust(left=0.2, right=0.8, top=0.8, bottom=0.3)  # Márgenes extremos
+            self.apply_layout(pad=6.0)  # Padding extremo para etiquetas
+        
     def update_chart(self, data):
         """Actualiza el gráfico con nuevos datos"""
-        if MATPLOTLIB_AVAILABLE and hasattr(self, 'figure'):
-            self.figure.clear()
+        if self.ensure_figure() is not None:
+            self.reset_axes(None)
             # Implementación específica en subclases
-            self._render_to_label()
-        else:
-            # No hacer nada si matplotlib no está disponible
-            pass
-            
-    def _render_to_label(self):
-        """Convierte la figura de matplotlib a imagen y la muestra en el QLabel"""
-        # Cargar matplotlib dinámicamente si no está cargado
-        if not _load_matplotlib() or not hasattr(self, 'canvas'):
-            self.canvas.setText("📊 Gráficos no disponibles")
-            return
+            self.redraw()
             
-        # Crear figura si no existe
-        if self.figure is None:
-            self.figure = Figure(figsize=(12, 8), dpi=75)
-            self.figure.patch.set_facecolor('white')
-            # Crear canvas de matplotlib para asegurar renderizado correcto
-            self.figure.set_canvas(FigureCanvas(self.figure))
+    def redraw(self):
+        """Dibuja la figura en el buffer del canvas (puede ejecutarse en el thread de render)"""
+        if self.canvas is not None:
+            self.canvas.render_offscreen()
             
-        try:
-            # Asegurar que la figura esté completamente renderizada
-            self.figure.canvas.draw()
-            
-            # Guardar la figura en un buffer de memoria con padding máximo para mostrar todo
-            buf = io.BytesIO()
-            self.figure.savefig(buf, format='png', dpi=90, bbox_inches='tight', 
-                               pad_inches=0.8, facecolor='white', edgecolor='none',
-                               transparent=False)  # Configuraciones específicas para ejecutables
-            buf.seek(0)
-            
-            # Crear QPixmap desde el buffer
-            pixmap = QPixmap()
-            success = pixmap.loadFromData(buf.getvalue())
-            
-            if success and not pixmap.isNull():
-                # Escalar imagen para ajustar al contenedor manteniendo proporción
-                canvas_size = self.canvas.size()
-                scaled_pixmap = pixmap.scaled(canvas_size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self.canvas.setPixmap(scaled_pixmap)
-                print(f"✓ Gráfico renderizado exitosamente ({pixmap.width()}x{pixmap.height()})")
-            else:
-                print("✗ Error: No se pudo cargar la imagen del gráfico")
-                self.canvas.setText("Error: Imagen no válida")
+    def pixel_size(self):
+        """Tamaño del gráfico en píxeles físicos (None si aún no hay canvas)"""
+        if self.canvas is None:
+            return None
+        return self.canvas.get_width_height(physical=True)
+        
+    def snapshot(self):
+        """Copia de la imagen dibujada (para la caché de renders)"""
+        with self.canvas.render_lock:
+            return self.canvas.copy_from_bbox(self.figure.bbox)
             
-            buf.close()
-        except Exception as e:
-            print(f"✗ Error renderizando gráfico: {e}")
-            self.canvas.setText(f"Error al renderizar: {str(e)}")
+    def restore(self, image):
+        """Copia al canvas una imagen guardada con snapshot()"""
+        with self.canvas.render_lock:
+            self.canvas.restore_region(image)
+            
+    def present(self):
+        """Muestra en pantalla el último dibujo de la figura (thread de la interfaz)"""
+        if self.canvas is None:
+            return
+        self.message_label.hide()
+        self.canvas.show()
+        if self.toolbar is not None:
+            self.toolbar.update()  # El historial de vistas empieza en la vista recién dibujada
+            self.toolbar.show()
+        self.canvas.update()
+
+class ChartRenderThread(QThread):
+    """Calcula los agregados y dibuja los gráficos del dashboard fuera del thread de la interfaz"""
+    
+    render_finished = Signal(object, object, object, float)  # (filtros, agregados, clave de caché, segundos)
+    
+    def __init__(self, render, filters, cache_key=None, parent=None):
+        super().__init__(parent)
+        self.render = render
+        self.filters = filters
+        self.cache_key = cache_key
+        self._cancelled = False
+        
+    def cancel(self):
+        self._cancelled = True
+        
+    def run(self):
+        started = time.perf_counter()
+        aggregates = self.render(self.filters, lambda: self._cancelled)
+        if aggregates is not None and not self._cancelled:
+            self.render_finished.emit(self.filters, aggregates, self.cache_key, time.perf_counter() - started)
 
 class Dashboard(QWidget):
     """
@@ -203,13 +362,36 @@ class Dashboard(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.excel_manager = ExcelManager()
-        self.current_data = pd.DataFrame()
+        self.query_provider = None  # Excel en memoria o SQL (GROUP BY), según configuración
         self.data_loaded = False  # Flag para controlar carga diferida
-        self.refresh_in_progress = False  # Flag para evitar refresh múltiples
+        self.render_thread = None  # Render de KPIs y gráficos en segundo plano
+        self._render_again = False  # Los filtros cambiaron durante el render en curso
+        # Renders ya dibujados por (versión de datos, filtros, tamaño); se vacía al cambiar el Excel
+        self.render_cache = RenderCache()
+        self.data_generation = 0  # Aumenta en cada recarga del proveedor (Excel o SQL)
+        self.excel_manager.add_change_listener(self.render_cache.invalidate)
+        self.destroyed.connect(self._remove_change_listener_for(self.excel_manager, self.render_cache.invalidate))
+        # Serie temporal completa (pirámide día/semana/mes); se rehace al guardar el Excel
+        self.timeseries = None
+        self.excel_manager.add_change_listener(self.update_timeseries)
+        self.destroyed.connect(self._remove_change_listener_for(self.excel_manager, self.update_timeseries))
         self.setup_ui()
         self.apply_styles()
+        
+        # Los cambios de filtros seguidos se agrupan en un solo refresh con los filtros finales
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_DEBOUNCE_MS)
+        self.refresh_timer.timeout.connect(self.refresh_charts)
+        self._filters_changed_at = None  # Momento del último cambio de filtros (para medir la demora)
+        self.last_render_timings = {}
         # NO cargar datos iniciales aquí - se hace cuando se muestra la pestaña
         
+    @staticmethod
+    def _remove_change_listener_for(excel_manager, listener):
+        """Callback para quitar el listener cuando se destruye el dashboard"""
+        return lambda *args: excel_manager.remove_change_listener(listener)
+        
     def ensure_data_loaded(self):
         """Cargar datos solo cuando se necesiten (lazy loading optimizado)"""
         if not self.data_loaded:
@@ -320,11 +502,13 @@ class Dashboard(QWidget):
         self.condition_chart = ChartWidget("Distribución por Condición")
         self.users_chart = ChartWidget("Usuarios Más Activos")
         self.monthly_chart = ChartWidget("Alertas por Mes")
+        self.timeline_chart = ChartWidget("Serie Temporal de Alertas", interactive=True)
         
         self.charts_layout.addWidget(self.alert_type_chart, 0, 0)
         self.charts_layout.addWidget(self.condition_chart, 0, 1)
         self.charts_layout.addWidget(self.users_chart, 1, 0)
         self.charts_layout.addWidget(self.monthly_chart, 1, 1)
+        self.charts_layout.addWidget(self.timeline_chart, 2, 0, 1, 2)
         
     def apply_styles(self):
         """Aplica estilos consistentes"""
@@ -385,121 +569,65 @@ class Dashboard(QWidget):
         """)
         
     def on_filter_changed(self):
-        """Maneja cambios en los filtros"""
-        self.refresh_charts()
+        """Maneja cambios en los filtros: el refresh se hace al terminar de cambiarlos"""
+        self._filters_changed_at = time.perf_counter()
+        self.refresh_timer.start()
         
     def reload_data(self):
         """Recarga los datos desde Excel"""
         self.update_data(self.excel_manager)
         
-    def get_filtered_data(self):
-        """Obtiene datos filtrados según los controles con validación mejorada"""
-        if self.current_data.empty:
-            return pd.DataFrame()
-        
-        filtered_data = self.current_data.copy()
-        original_count = len(filtered_data)
+    def get_current_filters(self) -> dict:
+        """Lee los filtros seleccionados (None = sin filtro)"""
+        filters = {'year': None, 'month': None, 'alert_type': None}
         
         # Filtro por año
         year_filter = self.year_combo.currentText().strip()
         if year_filter and year_filter != "Todos los años":
             try:
-                year = int(year_filter)
-                filtered_data = filtered_data[filtered_data['Año'] == year]
-                print(f"Filtro año {year}: {len(filtered_data)} alertas")
+                filters['year'] = int(year_filter)
             except (ValueError, TypeError):
                 print(f"⚠️ Error al filtrar año: '{year_filter}' no es válido")
         
         # Filtro por mes
-        month_filter = self.month_combo.currentText().strip()
-        if month_filter and month_filter != "Todos":
-            month_num = self.month_combo.currentIndex()  # 0=Todos, 1=Enero, etc.
-            if month_num > 0:  # No filtrar si es "Todos"
-                # Primero verificar si hay datos para este mes en el año seleccionado
-                before_month_filter = len(filtered_data)
-                filtered_data = filtered_data[filtered_data['Mes'] == month_num]
-                after_month_filter = len(filtered_data)
-                
-                print(f"Filtro mes {month_filter} ({month_num}): {after_month_filter} alertas")
-                
-                # Si no hay datos para el mes seleccionado, mostrar mensaje
-                if before_month_filter > 0 and after_month_filter == 0:
-                    year_text = f"del año {year_filter}" if year_filter and year_filter != "Todos los años" else ""
-                    print(f"⚠️ No se encontraron alertas para {month_filter} {year_text}")
+        month_num = self.month_combo.currentIndex()  # 0=Todos, 1=Enero, etc.
+        if month_num > 0:
+            filters['month'] = month_num
         
         # Filtro por tipo
         type_filter = self.type_combo.currentText().strip()
         if type_filter and type_filter != "Todos":
-            before_type_filter = len(filtered_data)
-            filtered_data = filtered_data[filtered_data['TipoAlerta'] == type_filter]
-            after_type_filter = len(filtered_data)
-            
-            print(f"Filtro tipo {type_filter}: {after_type_filter} alertas")
-            
-            # Si no hay datos para el tipo seleccionado, mostrar mensaje
-            if before_type_filter > 0 and after_type_filter == 0:
-                filters_text = []
-                if year_filter and year_filter != "Todos los años":
-                    filters_text.append(f"año {year_filter}")
-                if month_filter and month_filter != "Todos":
-                    filters_text.append(f"mes {month_filter}")
-                
-                context = " para " + " y ".join(filters_text) if filters_text else ""
-                print(f"⚠️ No se encontraron alertas {type_filter.lower()}s{context}")
-        
-        # Resumen final del filtrado
-        if len(filtered_data) == 0 and original_count > 0:
-            print(f"🔍 Filtros aplicados no encontraron resultados. Total disponible: {original_count} alertas")
-        elif len(filtered_data) < original_count:
-            print(f"📊 Mostrando {len(filtered_data)} de {original_count} alertas totales")
+            filters['alert_type'] = type_filter
+            
+        return filters
         
-        return filtered_data
+    def get_filtered_data(self):
+        """Obtiene las filas filtradas según los controles (desde Excel o SQL)"""
+        if self.query_provider is None:
+            return pd.DataFrame()
+            
+        return self.query_provider.filter_data(**self.get_current_filters())
         
     def update_data(self, excel_manager):
-        """Actualiza los datos del dashboard"""
+        """Actualiza los datos del dashboard desde el proveedor configurado (Excel o SQL)"""
         try:
-            # Cargar datos del Excel
-            data = excel_manager.load_data()
-            print(f"Dashboard: Datos cargados desde Excel: {len(data)} filas")
-            
-            if data.empty:
-                self.current_data = pd.DataFrame()
-                self.update_filters(refresh_charts=False)
-                self.refresh_charts()  # Un solo refresh
-                return
-            
-            # Los datos ya vienen procesados del ExcelManager con Año y Mes
-            data_processed = data.copy()
-            
-            # Verificar que las columnas necesarias están presentes
-            required_columns = ['FechaHora', 'TipoAlerta', 'Año', 'Mes', 'Usuario']
-            missing_columns = [col for col in required_columns if col not in data_processed.columns]
-            
-            if missing_columns:
-                print(f"⚠️ Columnas faltantes: {missing_columns}")
-                # Si faltan Año o Mes, el ExcelManager no las creó correctamente
-                print(f"📋 Columnas disponibles: {list(data_processed.columns)}")
-            
-            # Solo procesar FechaHoraColapso si existe
-            if 'FechaHoraColapso' in data_processed.columns:
-                data_processed['FechaHoraColapso'] = pd.to_datetime(
-                    data_processed['FechaHoraColapso'], errors='coerce'
-                )
-                
-            # Mostrar estadísticas de procesamiento
-            print(f"Dashboard: Datos procesados:")
-            print(f"  - Total filas: {len(data_processed)}")
-            if 'Año' in data_processed.columns:
-                years = sorted([int(year) for year in data_processed['Año'].dropna().unique()])
-                print(f"  - Años disponibles: {years}")
-            if 'TipoAlerta' in data_processed.columns:
-                tipos = data_processed['TipoAlerta'].value_counts().head(10).to_dict()
-                print(f"  - Tipos de alerta: {tipos}")
-            if 'Condicion' in data_processed.columns:
-                condiciones = data_processed['Condicion'].value_counts().head(10).to_dict()
-                print(f"  - Condiciones: {condiciones}")
+            self.query_provider = create_query_provider(excel_manager)
+            
+            try:
+                row_count = self.query_provider.reload()
+            except Exception as e:
+                if not isinstance(self.query_provider, SQLQueryProvider):
+                    raise
+                # Sin conexión SQL: continuar con los datos del Excel
+                print(f"⚠️ Dashboard: error consultando SQL ({e}), usando Excel")
+                self.query_provider = DataFrameQueryProvider(excel_manager)
+                row_count = self.query_provider.reload()
                 
-            self.current_data = data_processed
+            print(f"Dashboard: {row_count} alertas disponibles ({self.query_provider.source_name})")
+            self.data_generation += 1
+            self.render_cache.invalidate()
+            self.update_timeseries(self.query_provider.filter_data())
+            
             print("🔄 Actualizando filtros y gráficos...")
             self.update_filters(refresh_charts=False)  # No refresh automático
             self.refresh_charts()  # Un solo refresh al final
@@ -508,7 +636,15 @@ class Dashboard(QWidget):
             print(f"Error actualizando dashboard: {e}")
             import traceback
             traceback.print_exc()
-            self.current_data = pd.DataFrame()
+            self.query_provider = None
+            
+    def update_timeseries(self, df):
+        """Rehace la serie temporal (conteos por día/semana/mes y velocidades) de todas las alertas"""
+        try:
+            self.timeseries = AlertTimeSeries.from_frame(df)
+        except Exception as e:
+            print(f"⚠️ Dashboard: error construyendo la serie temporal: {e}")
+            self.timeseries = None
             
     def update_filters(self, refresh_charts=True):
         """Actualiza las opciones de los filtros"""
@@ -522,8 +658,8 @@ class Dashboard(QWidget):
             self.year_combo.clear()
             self.year_combo.addItem("Todos los años")
             
-            if not self.current_data.empty and 'Año' in self.current_data.columns:
-                years = sorted([int(year) for year in self.current_data['Año'].dropna().unique()])
+            if self.query_provider is not None:
+                years = self.query_provider.available_years()
                 for year in years:
                     self.year_combo.addItem(str(year))
                 print(f"✅ Años cargados en filtro: {years}")
@@ -532,8 +668,8 @@ class Dashboard(QWidget):
             self.type_combo.clear()
             self.type_combo.addItem("Todos")
             
-            if not self.current_data.empty and 'TipoAlerta' in self.current_data.columns:
-                types = sorted(self.current_data['TipoAlerta'].dropna().unique())
+            if self.query_provider is not None:
+                types = self.query_provider.available_types()
                 for alert_type in types:
                     self.type_combo.addItem(str(alert_type))
                 print(f"✅ Tipos cargados en filtro: {types}")
@@ -554,29 +690,146 @@ class Dashboard(QWidget):
             print(f"❌ Error actualizando filtros: {e}")
             import traceback
             traceback.print_exc()
-            types = sorted(self.current_data['TipoAlerta'].dropna().unique())
-            for alert_type in types:
-                self.type_combo.addItem(str(alert_type))
                 
+    def charts(self):
+        """Widgets de gráficos del dashboard"""
+        return [self.alert_type_chart, self.condition_chart, 
+                self.users_chart, self.monthly_chart, self.timeline_chart]
+        
     def refresh_charts(self):
-        """Actualiza todos los gráficos y KPIs con protección anti-spam"""
-        if self.refresh_in_progress:
-            print("🚫 Refresh ya en progreso, evitando render duplicado")
+        """Actualiza todos los gráficos y KPIs en segundo plano
+        
+        Si ya hay un render en curso se cancela y, cuando termina, se lanza uno
+        nuevo con los filtros vigentes.
+        """
+        if self.render_thread is not None and self.render_thread.isRunning():
+            self.render_thread.cancel()
+            self._render_again = True
             return
+        self._render_again = False
+        
+        # Cargar matplotlib dinámicamente cuando se necesite
+        if _load_matplotlib():
+            # Figuras y canvas se crean aquí: el thread de render no toca widgets
+            for chart in self.charts():
+                chart.ensure_figure()
+        else:
+            # Si matplotlib no está disponible, mostrar mensaje en todos los gráficos
+            for chart in self.charts():
+                chart.show_message("📊 Gráficos no disponibles\n\nInstalando matplotlib...")
+                
+        filters = self.get_current_filters()
+        cache_key = self.render_cache_key(filters)
+        cached = self.render_cache.get(cache_key) if cache_key is not None else None
+        if cached is None:
+            print("🎨 Iniciando refresh de gráficos...")
+            render = self.render_charts
+        else:
+            aggregates, images = cached
+            self.show_cached_render(aggregates, images)
+            # Las figuras se ponen al día en segundo plano (sin dibujar) para que un
+            # redimensionado las redibuje con los datos mostrados
+            render = lambda filters, is_cancelled: self.render_charts(filters, is_cancelled, aggregates, draw=False)
+            cache_key = None
             
-        self.refresh_in_progress = True
+        self.render_thread = ChartRenderThread(render, filters, cache_key, self)
+        if cached is None:
+            # La puesta al día tras un acierto de caché no publica nada: KPIs, imágenes y
+            # tiempos ya se mostraron en show_cached_render
+            self.render_thread.render_finished.connect(self.on_render_finished)
+        self.render_thread.finished.connect(self.on_render_thread_finished)
+        self.render_thread.start()
+        
+    def compute_aggregates(self, filters):
+        """Agregados (KPIs y series de los gráficos) para los filtros indicados"""
+        query_provider = self.query_provider
+        if query_provider is None:
+            return empty_aggregates()
         try:
-            print("🎨 Iniciando refresh de gráficos...")
-            filtered_data = self.get_filtered_data()
-            self.update_kpis(filtered_data)
-            self.update_charts(filtered_data)
-            print("✅ Refresh de gráficos completado")
-        finally:
-            self.refresh_in_progress = False
-        
-    def update_kpis(self, data):
-        """Actualiza los valores de los KPIs"""
-        if data.empty:
+            return query_provider.aggregates(**filters)
+        except Exception as e:
+            print(f"❌ Error calculando agregados ({query_provider.source_name}): {e}")
+            return empty_aggregates()
+            
+    def render_cache_key(self, filters):
+        """Clave de la caché de renders para los filtros y el tamaño actual de los gráficos"""
+        sizes = tuple(chart.pixel_size() for chart in self.charts())
+        if None in sizes:
+            return None
+        data_version = (self.excel_manager.data_version, self.data_generation)
+        return RenderCache.make_key(data_version, filters, sizes)
+        
+    def render_charts(self, filters, is_cancelled, aggregates=None, draw=True):
+        """Calcula los agregados y dibuja los gráficos (se ejecuta en ChartRenderThread)
+        
+        Solo modifica las figuras de matplotlib; los widgets se actualizan en
+        on_render_finished. Devuelve los agregados, o None si se canceló.
+        """
+        if aggregates is None:
+            aggregates = self.compute_aggregates(filters)
+        if MATPLOTLIB_AVAILABLE and not self.update_charts(aggregates, is_cancelled, draw, filters):
+            return None
+        return None if is_cancelled() else aggregates
+        
+    def on_render_finished(self, filters, aggregates, cache_key, render_seconds):
+        """Publica en pantalla los KPIs y gráficos de un render terminado"""
+        if self._render_again:
+            return  # Hay un render más reciente en camino
+            
+        active_filters = {key: value for key, value in filters.items() if value is not None}
+        if active_filters:
+            print(f"📊 Filtros {active_filters}: {aggregates['total']} alertas")
+            
+        self.update_kpis(aggregates)
+        for chart in self.charts():
+            chart.present()
+            
+        # Se guarda solo si los datos y el tamaño no cambiaron durante el render
+        if cache_key is not None and cache_key == self.render_cache_key(filters):
+            self.render_cache.put(cache_key, aggregates, {chart.title: chart.snapshot() for chart in self.charts()})
+        self.report_render_timing(render_seconds)
+        print("✅ Refresh de gráficos completado")
+        
+    def show_cached_render(self, aggregates, images):
+        """Muestra de inmediato KPIs e imágenes guardadas en la caché de renders"""
+        print("⚡ KPIs y gráficos desde la caché de renders")
+        self.update_kpis(aggregates)
+        for chart in self.charts():
+            chart.restore(images[chart.title])
+            chart.present()
+        self.report_render_timing(0.0, cached=True)
+        
+    def report_render_timing(self, render_seconds, cached=False):
+        """Registra cuánto tardó el render y la demora desde el último cambio de filtros"""
+        timings = {'render_ms': render_seconds * 1000, 'cached': cached}
+        if self._filters_changed_at is not None:
+            timings['since_change_ms'] = (time.perf_counter() - self._filters_changed_at) * 1000
+            self._filters_changed_at = None
+        self.last_render_timings = timings
+        
+        message = "caché" if cached else f"render {timings['render_ms']:.0f} ms"
+        if 'since_change_ms' in timings:
+            message += f", {timings['since_change_ms']:.0f} ms desde el último cambio de filtros"
+        print(f"⏱️ Dashboard actualizado ({message})")
+        
+    def on_render_thread_finished(self):
+        """Lanza el render pendiente si los filtros cambiaron mientras se dibujaba"""
+        self.render_thread.wait()
+        self.render_thread = None
+        if self._render_again:
+            self.refresh_charts()
+            
+    def stop_background_work(self):
+        """Cancela y espera el render en curso (al cerrar la aplicación)"""
+        self.refresh_timer.stop()
+        self._render_again = False
+        if self.render_thread is not None:
+            self.render_thread.cancel()
+            self.render_thread.wait()
+        
+    def update_kpis(self, aggregates):
+        """Actualiza los valores de los KPIs a partir de los agregados"""
+        if aggregates['total'] == 0:
             self.total_kpi.update_value("0")
             self.red_kpi.update_value("0")
             self.orange_kpi.update_value("0")
@@ -586,357 +839,354 @@ class Dashboard(QWidget):
             return
         
         # Total de alertas
-        total = len(data)
-        self.total_kpi.update_value(str(total))
+        self.total_kpi.update_value(str(aggregates['total']))
         
         # Alertas por tipo
-        if 'TipoAlerta' in data.columns:
-            red_count = len(data[data['TipoAlerta'] == 'Roja'])
-            orange_count = len(data[data['TipoAlerta'] == 'Naranja'])
-            yellow_count = len(data[data['TipoAlerta'] == 'Amarilla'])
-            
-            self.red_kpi.update_value(str(red_count))
-            self.orange_kpi.update_value(str(orange_count))
-            self.yellow_kpi.update_value(str(yellow_count))
+        type_counts = aggregates['by_type']
+        self.red_kpi.update_value(str(int(type_counts.get('Roja', 0))))
+        self.orange_kpi.update_value(str(int(type_counts.get('Naranja', 0))))
+        self.yellow_kpi.update_value(str(int(type_counts.get('Amarilla', 0))))
         
         # Usuario más activo
-        if 'Usuario' in data.columns:
-            user_counts = data['Usuario'].value_counts()
-            if len(user_counts) > 0:
-                most_active = user_counts.index[0]
-                count = user_counts.iloc[0]
-                self.active_user_kpi.update_value(f"{most_active} ({count})")
-            else:
-                self.active_user_kpi.update_value("N/A")
+        user_counts = aggregates['by_user']
+        if len(user_counts) > 0:
+            most_active = user_counts.index[0]
+            count = user_counts.iloc[0]
+            self.active_user_kpi.update_value(f"{most_active} ({count})")
+        else:
+            self.active_user_kpi.update_value("N/A")
         
-        # Alertas recientes (últimos 30 días)
-        if 'FechaHora' in data.columns and not data.empty:
-            try:
-                # Convertir FechaHora a datetime si no lo está
-                today = datetime.now().date()  # Solo la fecha, sin hora
-                # Usar 31 días para incluir alertas del día 30 completo
-                thirty_days_ago_date = today - timedelta(days=31)  # Cambiar a 31 para incluir más días
-                
-                # Convertir la columna a datetime temporalmente para la comparación
-                if data['FechaHora'].dtype == 'object':
-                    fecha_dt = pd.to_datetime(data['FechaHora'], errors='coerce')
-                    # Comparar solo las fechas (sin hora) para incluir todo el día
-                    fecha_dates = fecha_dt.dt.date
-                    recent_data = data[fecha_dates >= thirty_days_ago_date]
-                else:
-                    fecha_dates = data['FechaHora'].dt.date
-                    recent_data = data[fecha_dates >= thirty_days_ago_date]
-                
-                self.recent_kpi.update_value(str(len(recent_data)))
-                print(f"📊 KPI Últimos 30 días: {len(recent_data)} alertas (desde {thirty_days_ago_date})")
-            except Exception as e:
-                print(f"Error calculando alertas recientes: {e}")
-                self.recent_kpi.update_value("0")
+        # Alertas recientes (últimos 30 días, calculado por el proveedor)
+        self.recent_kpi.update_value(str(aggregates['recent']))
+        print(f"📊 KPI Últimos 30 días: {aggregates['recent']} alertas")
             
-    def update_charts(self, data):
-        """Actualiza los gráficos con los datos filtrados"""
-        # Cargar matplotlib dinámicamente cuando se necesite
-        if not _load_matplotlib():
-            # Si matplotlib no está disponible, mostrar mensaje en todos los gráficos
-            for chart in [self.alert_type_chart, self.condition_chart, 
-                         self.users_chart, self.monthly_chart]:
-                chart.canvas.setText("📊 Gráficos no disponibles\n\nInstalando matplotlib...")
+    def update_charts(self, aggregates, is_cancelled=lambda: False, draw=True, filters=None):
+        """Actualiza los gráficos con los agregados de los datos filtrados
+        
+        Cada figura se modifica (y, si draw, se dibuja) dentro del lock de su
+        canvas. Devuelve False si se canceló antes de terminar.
+        """
+        filters = filters or {'year': None, 'month': None, 'alert_type': None}
+        updates = [
+            (self.alert_type_chart, self.update_type_chart, aggregates['by_type']),         # Distribución por tipo
+            (self.condition_chart, self.update_condition_chart, aggregates['by_condition']),  # Distribución por condición
+            (self.users_chart, self.update_users_chart, aggregates['by_user']),              # Usuarios más activos
+            (self.monthly_chart, self.update_monthly_chart, aggregates['by_month']),         # Alertas por mes
+            (self.timeline_chart, self.update_timeline_chart, filters),                      # Serie temporal
+        ]
+        for chart, update, data in updates:
+            if is_cancelled():
+                return False
+            if chart.canvas is None:
+                continue
+            with chart.canvas.render_lock:
+                try:
+                    # La serie temporal muestra el historial completo aunque el filtro quede vacío
+                    if aggregates['total'] == 0 and chart is not self.timeline_chart:
+                        chart.show_no_data()  # Limpiar gráficos si no hay datos
+                    else:
+                        update(data)
+                    if draw:
+                        chart.redraw()
+                except Exception as e:
+                    print(f"✗ Error renderizando gráfico '{chart.title}': {e}")
+        return True
+        
+    # Cada gráfico conserva sus ejes y artistas: con las mismas categorías solo se
+    # actualizan alturas, textos y límites; los márgenes (tight_layout) se recalculan
+    # únicamente cuando cambian las categorías
+    def update_type_chart(self, type_counts):
+        """Actualiza gráfico de tipos de alerta"""
+        chart = self.alert_type_chart
+        if chart.ensure_figure() is None:
             return
             
-        if data.empty:
-            # Limpiar gráficos si no hay datos
-            for chart in [self.alert_type_chart, self.condition_chart, 
-                         self.users_chart, self.monthly_chart]:
-                if chart.figure is None:
-                    chart.figure = Figure(figsize=(12, 8), dpi=75)
-                    chart.figure.patch.set_facecolor('white')
-                    chart.figure.set_canvas(FigureCanvas(chart.figure))
-                    
-                chart.figure.clear()
-                ax = chart.figure.add_subplot(111)
-                ax.text(0.5, 0.5, 'Sin datos para mostrar', 
-                       horizontalalignment='center', verticalalignment='center',
-                       transform=ax.transAxes, fontsize=14, color='gray')
-                ax.set_xticks([])
-                ax.set_yticks([])
-                ax.spines['top'].set_visible(False)
-                ax.spines['right'].set_visible(False)
-                ax.spines['bottom'].set_visible(False)
-                ax.spines['left'].set_visible(False)
-                chart.figure.subplots_adjust(left=0.2, right=0.8, top=0.8, bottom=0.3)  # Márgenes extremos
-                chart.figure.tight_layout(pad=6.0)  # Padding extremo para etiquetas
-                chart._render_to_label()
-            return
+        print(f"DEBUG - Tipos de alerta encontrados: {type_counts}")  # Debug
         
-        # Gráfico de distribución por tipo
-        self.update_type_chart(data)
+        # Solo incluir tipos con datos
+        type_counts = type_counts[type_counts > 0]
+        labels_list = list(type_counts.index)
+        values_list = list(type_counts.values)
+        print(f"DEBUG - Labels: {labels_list}, Values: {values_list}")  # Debug
         
-        # Gráfico de distribución por condición
-        self.update_condition_chart(data)
+        if len(labels_list) == 0:
+            chart.show_no_data()
+            return
+            
+        layout_key = ('pie', tuple(labels_list))
+        if chart.layout_key == layout_key:
+            _update_pie(chart.artists['wedges'], chart.artists['texts'], chart.artists['autotexts'], values_list)
+            return
+            
+        ax = chart.reset_axes(layout_key)
         
-        # Gráfico de usuarios más activos
-        self.update_users_chart(data)
+        # Color de fondo según el tipo más común
+        ax.set_facecolor(ALERT_BACKGROUNDS.get(labels_list[0], '#F5F5F5'))
         
-        # Gráfico de alertas por mes
-        self.update_monthly_chart(data)
+        # Crear gráfico de pie con colores personalizados
+        wedges, texts, autotexts = ax.pie(
+            values_list,
+            labels=labels_list,
+            autopct='%1.1f%%',
+            startangle=90,
+            colors=[ALERT_COLORS.get(tipo, '#CCCCCC') for tipo in labels_list],
+            textprops={'fontsize': 9}
+        )
         
-    def update_type_chart(self, data):
-        """Actualiza gráfico de tipos de alerta"""
-        # Crear figura si no existe
-        if self.alert_type_chart.figure is None:
-            self.alert_type_chart.figure = Figure(figsize=(12, 8), dpi=75)
-            self.alert_type_chart.figure.patch.set_facecolor('white')
-            self.alert_type_chart.figure.set_canvas(FigureCanvas(self.alert_type_chart.figure))
+        # Aplicar colores de texto con contraste para cada porción
+        for tipo, autotext, text in zip(labels_list, autotexts, texts):
+            autotext.set_color('black' if tipo in LIGHT_ALERT_TYPES else 'white')
+            autotext.set_weight('bold')
+            autotext.set_fontsize(10)
+            # Las etiquetas de la leyenda siempre en negro para visibilidad
+            text.set_color('black')
+            text.set_fontsize(9)
+            text.set_weight('bold')
             
-        self.alert_type_chart.figure.clear()
+        ax.set_title('Distribución por Tipo de Alerta', fontsize=12, fontweight='bold', pad=20)
+        chart.artists = {'wedges': wedges, 'texts': texts, 'autotexts': autotexts}
         
-        if 'TipoAlerta' in data.columns:
-            type_counts = data['TipoAlerta'].value_counts()
-            print(f"DEBUG - Tipos de alerta encontrados: {type_counts}")  # Debug
+        chart.figure.subplots_adjust(left=0.15, right=0.85, top=0.85, bottom=0.25)  # Márgenes generosos
+        chart.apply_layout(pad=6.0)  # Padding extremo para etiquetas
             
-            if len(type_counts) > 0:
-                ax = self.alert_type_chart.figure.add_subplot(111)
-                
-                # Definir colores para cada tipo de alerta (más opciones)
-                alerta_colores = {
-                    'Amarilla': '#FFD600',      # Amarillo brillante
-                    'Amarillo': '#FFD600',      # Por si viene como "Amarillo"
-                    'Naranja': '#FF9040',       # Naranja corporativo Teck
-                    'Roja': '#FF4040',          # Rojo vibrante
-                    'Rojo': '#FF4040',          # Por si viene como "Rojo"
-                    'Verde': '#00A26A',         # Verde corporativo Teck
-                    'Azul': '#3153E4',          # Azul corporativo Teck
-                    'Alta': '#FF4040',          # Roja para "Alta"
-                    'Media': '#FF9040',         # Naranja para "Media"
-                    'Baja': '#FFD600',          # Amarillo para "Baja"
-                    'Crítica': '#8B0000',       # Rojo oscuro para "Crítica"
-                }
-                
-                # Definir colores de fondo suaves para cada alerta
-                fondo_colores = {
-                    'Amarilla': '#FFFDE7',     'Amarillo': '#FFFDE7',
-                    'Naranja': '#FFF3E0',      
-                    'Roja': '#FFEBEE',         'Rojo': '#FFEBEE',
-                    'Verde': '#E8F5E8',        
-                    'Azul': '#E3F2FD',
-                    'Alta': '#FFEBEE',
-                    'Media': '#FFF3E0',
-                    'Baja': '#FFFDE7',
-                    'Crítica': '#FFCDD2'
-                }
-                
-                # Función para determinar color de texto con contraste
-                def get_text_color(tipo_alerta):
-                    # Negro para colores claros
-                    colores_claros = ['Amarilla', 'Amarillo', 'Verde', 'Baja']
-                    if tipo_alerta in colores_claros:
-                        return 'black'
-                    return 'white'
-                
-                # Obtener colores para las porciones del pie
-                colors_list = []
-                text_colors = []
-                labels_list = []
-                values_list = []
-                
-                for tipo in type_counts.index:
-                    if type_counts[tipo] > 0:  # Solo incluir tipos con datos
-                        colors_list.append(alerta_colores.get(tipo, '#CCCCCC'))
-                        text_colors.append(get_text_color(tipo))
-                        labels_list.append(tipo)
-                        values_list.append(type_counts[tipo])
-                
-                print(f"DEBUG - Labels: {labels_list}, Values: {values_list}")  # Debug
-                
-                # Solo proceder si hay datos para mostrar
-                if len(labels_list) > 0:
-                    # Determinar color de fondo (usar el tipo más común)
-                    tipo_principal = labels_list[0]  # El más frecuente
-                    fondo_color = fondo_colores.get(tipo_principal, '#F5F5F5')
-                    ax.set_facecolor(fondo_color)
-                    
-                    # Crear gráfico de pie con colores personalizados
-                    wedges, texts, autotexts = ax.pie(
-                        values_list,
-                        labels=labels_list,
-                        autopct='%1.1f%%',
-                        startangle=90,
-                        colors=colors_list,
-                        textprops={'fontsize': 9}
-                    )
-                    
-                    # Aplicar colores de texto con contraste para cada porción
-                    for i, (autotext, text) in enumerate(zip(autotexts, texts)):
-                        if i < len(text_colors):
-                            color = text_colors[i]
-                            autotext.set_color(color)
-                            autotext.set_weight('bold')
-                            autotext.set_fontsize(10)
-                            # Las etiquetas de la leyenda siempre en negro para visibilidad
-                            text.set_color('black')
-                            text.set_fontsize(9)
-                            text.set_weight('bold')
-                
-                    ax.set_title('Distribución por Tipo de Alerta', fontsize=12, fontweight='bold', pad=20)
-                else:
-                    # Si no hay datos, mostrar mensaje
-                    ax.text(0.5, 0.5, 'Sin datos para mostrar', 
-                           horizontalalignment='center', verticalalignment='center',
-                           transform=ax.transAxes, fontsize=12)
-                    ax.set_title('Distribución por Tipo de Alerta', fontsize=12, fontweight='bold', pad=20)
-                
-        self.alert_type_chart.figure.subplots_adjust(left=0.15, right=0.85, top=0.85, bottom=0.25)  # Márgenes generosos
-        self.alert_type_chart.figure.tight_layout(pad=6.0)  # Padding extremo para etiquetas
-        self.alert_type_chart._render_to_label()
-            
-    def update_condition_chart(self, data):
+    def update_condition_chart(self, condition_counts):
         """Actualiza gráfico de condiciones de alerta"""
-        # Crear figura si no existe
-        if self.condition_chart.figure is None:
-            self.condition_chart.figure = Figure(figsize=(12, 8), dpi=75)
-            self.condition_chart.figure.patch.set_facecolor('white')
-            self.condition_chart.figure.set_canvas(FigureCanvas(self.condition_chart.figure))
-            
-        self.condition_chart.figure.clear()
-        
-        if 'Condicion' in data.columns:
-            condition_counts = data['Condicion'].value_counts()
-            if len(condition_counts) > 0:
-                ax = self.condition_chart.figure.add_subplot(111)
-                
-                # Colores para las diferentes condiciones
-                colors = {
-                    'Crítica': '#F44336', 
-                    'Progresiva': '#FF9800', 
-                    'Transgresiva': '#FFEB3B', 
-                    'Progresiva-Crítica': '#E91E63', 
-                    'Transgresiva-Progresiva': '#FF5722', 
-                    'Regresiva': '#4CAF50'
-                }
-                
-                # Crear barras con colores
-                bar_colors = [colors.get(condition, '#9E9E9E') for condition in condition_counts.index]
-                bars = ax.bar(range(len(condition_counts)), condition_counts.values, color=bar_colors)
-                
-                # Configurar ejes y etiquetas
-                ax.set_xticks(range(len(condition_counts)))
-                ax.set_xticklabels(condition_counts.index, rotation=45, ha='right', fontsize=9)
-                ax.set_ylabel('Cantidad', fontsize=10)
-                ax.set_title('Distribución por Condición', fontsize=12, fontweight='bold', pad=20)
-                
-                # Agregar valores en las barras
-                for bar, value in zip(bars, condition_counts.values):
-                    height = bar.get_height()
-                    ax.text(bar.get_x() + bar.get_width()/2., height + max(condition_counts.values) * 0.01,
-                           f'{int(value)}', ha='center', va='bottom', fontsize=8)
-                
-                # Ajustar diseño
-                ax.grid(True, alpha=0.3, axis='y')
-                ax.spines['top'].set_visible(False)
-                ax.spines['right'].set_visible(False)
-                
-        self.condition_chart.figure.subplots_adjust(left=0.15, right=0.85, top=0.85, bottom=0.25)  # Márgenes generosos
-        self.condition_chart.figure.tight_layout(pad=6.0)  # Padding extremo para etiquetas
-        self.condition_chart._render_to_label()
+        chart = self.condition_chart
+        if chart.ensure_figure() is None:
+            return
             
-    def update_users_chart(self, data):
+        if len(condition_counts) == 0:
+            chart.show_no_data()
+            return
+            
+        conditions = list(condition_counts.index)
+        values = condition_counts.values
+        positions = range(len(conditions))
+        
+        # Las barras se recrean solo si cambia el conjunto de condiciones (no su orden)
+        layout_key = ('bar', frozenset(conditions), _value_digits(values))
+        rebuild = chart.layout_key != layout_key
+        if rebuild:
+            ax = chart.reset_axes(layout_key)
+            bars = ax.bar(positions, values)
+            value_texts = [ax.text(0, 0, '', ha='center', va='bottom', fontsize=8) for _ in bars]
+            chart.artists = {'bars': bars, 'value_texts': value_texts}
+            
+            ax.set_ylabel('Cantidad', fontsize=10)
+            ax.set_title('Distribución por Condición', fontsize=12, fontweight='bold', pad=20)
+            ax.grid(True, alpha=0.3, axis='y')
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+            
+        # Alturas, colores y valores sobre las barras
+        offset = max(values) * 0.01
+        for bar, text, condition, value in zip(chart.artists['bars'], chart.artists['value_texts'], conditions, values):
+            bar.set_height(value)
+            bar.set_color(CONDITION_COLORS.get(condition, '#9E9E9E'))
+            text.set_text(f'{int(value)}')
+            text.set_position((bar.get_x() + bar.get_width()/2., value + offset))
+            
+        ax = chart.ax
+        ax.set_xticks(positions)
+        ax.set_xticklabels(conditions, rotation=45, ha='right', fontsize=9)
+        ax.relim()
+        ax.autoscale_view()
+        
+        if rebuild:
+            chart.figure.subplots_adjust(left=0.15, right=0.85, top=0.85, bottom=0.25)  # Márgenes generosos
+            chart.apply_layout(pad=6.0)  # Padding extremo para etiquetas
+            
+    def update_users_chart(self, user_counts):
         """Actualiza gráfico de usuarios más activos"""
-        # Crear figura si no existe
-        if self.users_chart.figure is None:
-            self.users_chart.figure = Figure(figsize=(12, 8), dpi=75)
-            self.users_chart.figure.patch.set_facecolor('white')
-            self.users_chart.figure.set_canvas(FigureCanvas(self.users_chart.figure))
-            
-        self.users_chart.figure.clear()
-        
-        if 'Usuario' in data.columns:
-            user_counts = data['Usuario'].value_counts().head(10)  # Top 10 usuarios
-            if len(user_counts) > 0:
-                ax = self.users_chart.figure.add_subplot(111)
-                
-                # Crear gráfico de barras horizontal para mejor legibilidad
-                colors = plt.cm.viridis(np.linspace(0, 1, len(user_counts)))
-                bars = ax.barh(range(len(user_counts)), user_counts.values, color=colors)
-                
-                # Configurar ejes
-                ax.set_yticks(range(len(user_counts)))
-                ax.set_yticklabels(user_counts.index, fontsize=9)
-                ax.set_xlabel('Número de Alertas', fontsize=10)
-                ax.set_title('Usuarios Más Activos', fontsize=12, fontweight='bold', pad=20)
-                
-                # Agregar valores en las barras
-                for i, (bar, value) in enumerate(zip(bars, user_counts.values)):
-                    width = bar.get_width()
-                    ax.text(width + max(user_counts.values) * 0.01, bar.get_y() + bar.get_height()/2,
-                           f'{int(value)}', ha='left', va='center', fontsize=9, fontweight='bold')
-                
-                # Mejorar apariencia
-                ax.grid(True, alpha=0.3, axis='x')
-                ax.spines['top'].set_visible(False)
-                ax.spines['right'].set_visible(False)
-                ax.invert_yaxis()  # Mostrar el usuario con más alertas arriba
-                
-        self.users_chart.figure.subplots_adjust(left=0.25, right=0.85, top=0.85, bottom=0.25)  # Más espacio izquierdo para nombres
-        self.users_chart.figure.tight_layout(pad=6.0)  # Padding extremo para etiquetas
-        self.users_chart._render_to_label()
+        chart = self.users_chart
+        if chart.ensure_figure() is None:
+            return
+            
+        user_counts = user_counts.head(10)  # Top 10 usuarios
+        if len(user_counts) == 0:
+            chart.show_no_data()
+            return
+            
+        users = list(user_counts.index)
+        values = user_counts.values
+        positions = range(len(users))
+        
+        layout_key = ('barh', frozenset(users), _value_digits(values))
+        rebuild = chart.layout_key != layout_key
+        if rebuild:
+            ax = chart.reset_axes(layout_key)
+            
+            # Crear gráfico de barras horizontal para mejor legibilidad
+            colors = plt.cm.viridis(np.linspace(0, 1, len(users)))
+            bars = ax.barh(positions, values, color=colors)
+            value_texts = [ax.text(0, 0, '', ha='left', va='center', fontsize=9, fontweight='bold') for _ in bars]
+            chart.artists = {'bars': bars, 'value_texts': value_texts}
             
-    def update_monthly_chart(self, data):
+            ax.set_xlabel('Número de Alertas', fontsize=10)
+            ax.set_title('Usuarios Más Activos', fontsize=12, fontweight='bold', pad=20)
+            ax.grid(True, alpha=0.3, axis='x')
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+            ax.invert_yaxis()  # Mostrar el usuario con más alertas arriba
+            
+        # Largos de las barras y valores
+        offset = max(values) * 0.01
+        for bar, text, value in zip(chart.artists['bars'], chart.artists['value_texts'], values):
+            bar.set_width(value)
+            text.set_text(f'{int(value)}')
+            text.set_position((value + offset, bar.get_y() + bar.get_height()/2))
+            
+        ax = chart.ax
+        ax.set_yticks(positions)
+        ax.set_yticklabels(users, fontsize=9)
+        ax.relim()
+        ax.autoscale_view()
+        
+        if rebuild:
+            chart.figure.subplots_adjust(left=0.25, right=0.85, top=0.85, bottom=0.25)  # Más espacio izquierdo para nombres
+            chart.apply_layout(pad=6.0)  # Padding extremo para etiquetas
+            
+    def update_monthly_chart(self, monthly_counts):
         """Actualiza gráfico de alertas por mes"""
-        # Crear figura si no existe
-        if self.monthly_chart.figure is None:
-            self.monthly_chart.figure = Figure(figsize=(12, 8), dpi=75)
-            self.monthly_chart.figure.patch.set_facecolor('white')
-            self.monthly_chart.figure.set_canvas(FigureCanvas(self.monthly_chart.figure))
-            
-        self.monthly_chart.figure.clear()
-        
-        if 'Mes' in data.columns:
-            # Usar la columna Mes que ya viene creada del ExcelManager
-            data_with_month = data.dropna(subset=['Mes'])
-            if not data_with_month.empty:
-                ax = self.monthly_chart.figure.add_subplot(111)
-                
-                # Contar alertas por mes
-                monthly_counts = data_with_month['Mes'].value_counts().sort_index()
-                
-                if len(monthly_counts) > 0:
-                    # Nombres de los meses
-                    month_names = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun',
-                                  'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
-                    
-                    # Asegurar que tenemos datos para todos los meses (1-12)
-                    all_months = pd.Series(0, index=range(1, 13))
-                    all_months.update(monthly_counts)
-                    
-                    # Crear gráfico de línea con área
-                    months = list(range(1, 13))
-                    ax.plot(months, all_months.values, marker='o', linewidth=3, 
+        chart = self.monthly_chart
+        if chart.ensure_figure() is None:
+            return
+            
+        # Conteo por número de mes (1-12) calculado por el proveedor de consultas
+        if len(monthly_counts) == 0:
+            chart.show_no_data()
+            return
+            
+        # Asegurar que tenemos datos para todos los meses (1-12)
+        all_months = pd.Series(0, index=range(1, 13))
+        all_months.update(monthly_counts)
+        months = list(range(1, 13))
+        values = all_months.values
+        
+        layout_key = ('months', _value_digits(values))
+        rebuild = chart.layout_key != layout_key
+        if rebuild:
+            ax = chart.reset_axes(layout_key)
+            
+            # Crear gráfico de línea con área
+            line, = ax.plot(months, values, marker='o', linewidth=3, 
                            markersize=8, color='#FF6B35', markerfacecolor='#FF6B35')
-                    ax.fill_between(months, all_months.values, alpha=0.3, color='#FF6B35')
-                    
-                    # Configurar ejes
-                    ax.set_xticks(months)
-                    ax.set_xticklabels(month_names, fontsize=9)
-                    ax.set_ylabel('Número de Alertas', fontsize=10)
-                    ax.set_title('Distribución de Alertas por Mes', fontsize=12, fontweight='bold', pad=20)
-                    
-                    # Agregar valores en los puntos donde hay datos
-                    for month, value in monthly_counts.items():
-                        if value > 0:
-                            ax.annotate(f'{int(value)}', 
-                                       (month, value), 
-                                       textcoords="offset points", 
-                                       xytext=(0,10), 
-                                       ha='center', 
-                                       fontsize=8,
-                                       fontweight='bold')
-                    
-                    # Mejorar apariencia
-                    ax.grid(True, alpha=0.3, axis='y')
-                    ax.spines['top'].set_visible(False)
-                    ax.spines['right'].set_visible(False)
-                    ax.set_xlim(0.5, 12.5)
-                
-        self.monthly_chart.figure.subplots_adjust(left=0.15, right=0.85, top=0.85, bottom=0.3)  # Espacio extra abajo para etiquetas de meses
-        self.monthly_chart.figure.tight_layout(pad=6.0)  # Padding extremo para etiquetas
-        self.monthly_chart._render_to_label()
+            area = ax.fill_between(months, values, alpha=0.3, color='#FF6B35')
+            labels = [ax.annotate('', (month, 0), textcoords="offset points", xytext=(0,10), 
+                                  ha='center', fontsize=8, fontweight='bold') for month in months]
+            chart.artists = {'line': line, 'area': area, 'labels': labels}
+            
+            # Configurar ejes
+            ax.set_xticks(months)
+            ax.set_xticklabels(MONTH_NAMES, fontsize=9)
+            ax.set_ylabel('Número de Alertas', fontsize=10)
+            ax.set_title('Distribución de Alertas por Mes', fontsize=12, fontweight='bold', pad=20)
+            
+            # Mejorar apariencia
+            ax.grid(True, alpha=0.3, axis='y')
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+        else:
+            chart.artists['line'].set_ydata(values)
+            chart.artists['area'].set_data(months, values, 0)
+            
+        # Valores en los puntos donde hay datos
+        for label, month, value in zip(chart.artists['labels'], months, values):
+            label.xy = (month, value)
+            label.set_text(f'{int(value)}')
+            label.set_visible(value > 0)
+            
+        ax = chart.ax
+        ax.relim()
+        ax.autoscale_view()
+        ax.set_xlim(0.5, 12.5)
+        
+        if rebuild:
+            chart.figure.subplots_adjust(left=0.15, right=0.85, top=0.85, bottom=0.3)  # Espacio extra abajo para etiquetas de meses
+            chart.apply_layout(pad=6.0)  # Padding extremo para etiquetas
+            
+    def update_timeline_chart(self, filters):
+        """Actualiza la serie temporal de alertas y velocidades
+        
+        El año y el mes filtrados fijan el rango inicial; el pan y el zoom lo cambian
+        y cada cambio de límites vuelve a pedir los puntos del rango visible.
+        """
+        chart = self.timeline_chart
+        if chart.ensure_figure() is None:
+            return
+            
+        series = self.timeseries
+        if series is None or series.empty:
+            chart.show_no_data()
+            return
+            
+        rebuild = chart.layout_key != 'timeline'
+        if rebuild:
+            ax = chart.reset_axes('timeline')
+            counts_line, = ax.plot([], [], drawstyle='steps-post', linewidth=1.5, color='#2E7D4F')
+            ax_velocity = ax.twinx()
+            velocity_points, = ax_velocity.plot([], [], linestyle='none', marker='.', markersize=4,
+                                                color='#FF6B35', alpha=0.6)
+            detail_text = ax.text(0.01, 0.97, '', transform=ax.transAxes, fontsize=9,
+                                  va='top', color='#555555')
+            chart.artists = {'counts': counts_line, 'velocity_axis': ax_velocity,
+                             'velocity': velocity_points, 'detail': detail_text, 'alert_type': None}
+            
+            locator = mdates.AutoDateLocator()
+            ax.xaxis.set_major_locator(locator)
+            ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+            ax.yaxis.set_major_locator(matplotlib.ticker.MaxNLocator(integer=True))
+            ax.set_ylabel('Número de Alertas', fontsize=10, color='#2E7D4F')
+            ax_velocity.set_ylabel('Velocidad (mm/día)', fontsize=10, color='#FF6B35')
+            ax.set_title('Alertas y Velocidad en el Tiempo', fontsize=12, fontweight='bold', pad=20)
+            ax.grid(True, alpha=0.3)
+            ax.spines['top'].set_visible(False)
+            ax_velocity.spines['top'].set_visible(False)
+            # También se dispara con el pan/zoom sobre el eje de velocidad (comparten x)
+            ax.callbacks.connect('xlim_changed', lambda ax: self.update_timeline_view())
+            
+        # Rango inicial: año/mes filtrados o el historial completo
+        start, end = series.span()
+        if filters['year'] is not None:
+            if filters['month'] is not None:
+                start = np.datetime64(f"{filters['year']:04d}-{filters['month']:02d}", 'M')
+                end = start + np.timedelta64(1, 'M')
+            else:
+                start = np.datetime64(f"{filters['year']:04d}", 'Y')
+                end = start + np.timedelta64(1, 'Y')
+        chart.artists['alert_type'] = filters['alert_type']
+        chart.ax.set_xlim(mdates.date2num(start.astype('datetime64[D]')),
+                          mdates.date2num(end.astype('datetime64[D]')))  # Dispara update_timeline_view
+        
+        if rebuild:
+            chart.apply_layout(pad=3.0)
+            
+    def update_timeline_view(self):
+        """Pone en la serie temporal los puntos del rango visible (nivel de detalle según el zoom)
+        
+        Se llama al cambiar los límites del eje x: desde el render o desde el pan/zoom,
+        en ambos casos dentro del lock del canvas.
+        """
+        chart = self.timeline_chart
+        series = self.timeseries
+        if series is None or series.empty or chart.layout_key != 'timeline':
+            return
+            
+        ax = chart.ax
+        artists = chart.artists
+        start, end = (np.datetime64(mdates.num2date(limit).replace(tzinfo=None), 'ns') for limit in ax.get_xlim())
+        # Un punto cada ~2 píxeles del ancho de la figura
+        max_points = max(int(chart.figure.bbox.width) // 2, 50)
+        
+        edges, counts, level = series.counts(start, end, artists['alert_type'], max_points)
+        # Escalones: el último conteo se repite para cerrar su intervalo
+        artists['counts'].set_data(mdates.date2num(edges), np.append(counts, counts[-1:]))
+        
+        times, velocities = series.velocities(start, end, artists['alert_type'], max_points)
+        artists['velocity'].set_data(mdates.date2num(times), velocities)
+        artists['detail'].set_text(f"Alertas por {level} · {len(times)} puntos de velocidad")
+        
+        for axis in (ax, artists['velocity_axis']):
+            axis.relim()
+            axis.autoscale_view(scalex=False)
+        ax.set_ylim(bottom=0)
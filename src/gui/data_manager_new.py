@@ -77,6 +77,12 @@ class SQLConfigWidget(QWidget):
         config_layout.setSpacing(12)
         config_layout.setFieldGrowthPolicy(QFormLayout.ExpandingFieldsGrow)
         
+        self.dialect_combo = QComboBox()
+        self.dialect_combo.addItem("SQL Server", "mssql")
+        self.dialect_combo.addItem("SQLite (archivo local)", "sqlite")
+        self.dialect_combo.currentIndexChanged.connect(self.on_dialect_changed)
+        config_layout.addRow("Motor:", self.dialect_combo)
+        
         self.server_input = QLineEdit()
         self.server_input.setPlaceholderText("Servidor SQL (ej: localhost)")
         self.server_input.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
@@ -121,15 +127,33 @@ class SQLConfigWidget(QWidget):
         self.log_text.setPlaceholderText("Log de operaciones SQL...")
         layout.addWidget(self.log_text)
         
+    def on_dialect_changed(self, index):
+        """Ajusta los campos según el motor seleccionado"""
+        is_sqlite = self.dialect_combo.itemData(index) == "sqlite"
+        self.server_input.setEnabled(not is_sqlite)
+        self.username_input.setEnabled(not is_sqlite)
+        self.password_input.setEnabled(not is_sqlite)
+        self.database_input.setPlaceholderText(
+            "Archivo SQLite (ej: data/alertas_geotecnicas.db)" if is_sqlite else "Nombre de base de datos"
+        )
+        
     def get_connection_config(self) -> dict:
         """Obtiene la configuración de conexión"""
         return {
             'server': self.server_input.text().strip(),
             'database': self.database_input.text().strip(),
             'username': self.username_input.text().strip() or None,
-            'password': self.password_input.text().strip() or None
+            'password': self.password_input.text().strip() or None,
+            'dialect': self.dialect_combo.currentData()
         }
         
+    def is_config_complete(self) -> bool:
+        """Verifica que haya datos suficientes para conectarse"""
+        config = self.get_connection_config()
+        if config['dialect'] == "sqlite":
+            return bool(config['database'])
+        return bool(config['server'] and config['database'])
+        
     def add_log(self, message: str):
         """Añade mensaje al log"""
         from datetime import datetime
@@ -341,7 +365,7 @@ class DataManagerWidget(QWidget):
         try:
             config = self.sql_config.get_connection_config()
             
-            if not config['server'] or not config['database']:
+            if not self.sql_config.is_config_complete():
                 QMessageBox.warning(self, "Error", "Servidor y base de datos son obligatorios")
                 return
                 
@@ -363,7 +387,7 @@ class DataManagerWidget(QWidget):
         """Exporta datos a SQL Server"""
         config = self.sql_config.get_connection_config()
         
-        if not config['server'] or not config['database']:
+        if not self.sql_config.is_config_complete():
             QMessageBox.warning(self, "Error", "Configuración SQL incompleta")
             return
             
@@ -378,7 +402,7 @@ class DataManagerWidget(QWidget):
         """Importa datos desde SQL Server"""
         config = self.sql_config.get_connection_config()
         
-        if not config['server'] or not config['database']:
+        if not self.sql_config.is_config_complete():
             QMessageBox.warning(self, "Error", "Configuración SQL incompleta")
             return
             
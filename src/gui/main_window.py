@@ -3,7 +3,7 @@ Ventana principal de la aplicación de alertas geotécnicas
 """
 
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                              QTabWidget, QStatusBar, QMessageBox, QSizePolicy)
+                              QTabWidget, QStatusBar, QMessageBox, QSizePolicy, QLabel)
 from PySide6.QtCore import Qt
 from datetime import datetime
 
@@ -81,6 +81,10 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.current_user = None
+        self.sync_scheduler = None
+        # Schedulers detenidos cuyo ciclo en curso aún no terminó
+        self.stopping_sync_schedulers = []
+        self.close_after_sync_stops = False
         
         # Inicializar el gestor de menús
         self.menu_manager = MenuManager(self)
@@ -89,6 +93,7 @@ class MainWindow(QMainWindow):
         self.setup_menu()
         self.setup_status_bar()
         self.apply_styles()
+        self.setup_sync_scheduler()
         
     def setup_ui(self):
         """Configura la interfaz principal"""
@@ -151,6 +156,69 @@ class MainWindow(QMainWindow):
         
         self.status_bar.showMessage("Listo", 2000)
         
+        # Estado de la sincronización automática (permanente, a la derecha)
+        self.sync_status_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.sync_status_label)
+        
+    def setup_sync_scheduler(self):
+        """Inicia o reinicia la sincronización automática según la configuración"""
+        self.stop_sync_scheduler()
+        
+        # Import diferido: evita cargar SQLAlchemy al inicio si no hay auto-sync
+        from src.data.sql_manager import load_database_settings
+        database_settings = load_database_settings()
+        
+        if not database_settings.get("auto_sync", False):
+            self.sync_status_label.setText("")
+            return
+            
+        from src.utils.sync_scheduler import SyncSchedulerThread, is_sync_configured
+        
+        if not is_sync_configured(database_settings):
+            self.sync_status_label.setText("⚠️ Auto-sync: configuración SQL incompleta")
+            return
+            
+        self.sync_scheduler = SyncSchedulerThread(database_settings, self)
+        self.sync_scheduler.status_changed.connect(self.sync_status_label.setText)
+        self.sync_scheduler.data_changed.connect(self.on_synced_data_changed)
+        self.sync_scheduler.start()
+        
+        interval = database_settings.get("sync_interval", 15)
+        self.sync_status_label.setText(f"🕒 Auto-sync cada {interval} min")
+        
+    def stop_sync_scheduler(self):
+        """Detiene la sincronización automática si está activa, sin bloquear la GUI
+        
+        Un ciclo en curso termina en segundo plano (el lock de escritura del Excel lo
+        ordena respecto de un scheduler nuevo); el thread se libera al finalizar.
+        """
+        if self.sync_scheduler is not None:
+            scheduler = self.sync_scheduler
+            self.sync_scheduler = None
+            scheduler.status_changed.disconnect(self.sync_status_label.setText)
+            scheduler.data_changed.disconnect(self.on_synced_data_changed)
+            scheduler.stop()
+            if scheduler.isRunning():
+                self.stopping_sync_schedulers.append(scheduler)
+                scheduler.finished.connect(self.on_sync_scheduler_finished)
+                scheduler.finished.connect(scheduler.deleteLater)
+            else:
+                scheduler.deleteLater()
+                
+    def on_sync_scheduler_finished(self):
+        """Libera un scheduler detenido; completa el cierre pendiente de la aplicación"""
+        scheduler = self.sender()
+        if scheduler in self.stopping_sync_schedulers:
+            self.stopping_sync_schedulers.remove(scheduler)
+        if self.close_after_sync_stops and not self.stopping_sync_schedulers:
+            self.close()
+            
+    def on_synced_data_changed(self):
+        """Recarga las vistas cargadas tras una sincronización que modificó el Excel"""
+        # El visor de datos se actualiza solo con la notificación de cambios del Excel
+        if self.dashboard is not None:
+            self.dashboard.refresh_charts()
+            
     def apply_styles(self):
         """Aplica estilos modernos a la aplicación"""
         self.setStyleSheet(MainWindowStyles.get_complete_styles())
@@ -222,14 +290,12 @@ class MainWindow(QMainWindow):
         elif index == 2 and self.alerts_data_viewer is None:  # Datos de alertas tab
             print("🔄 Cargando Visor de Datos...")
             self.alerts_data_viewer = _get_alerts_viewer()
+            self.alerts_data_viewer.set_current_user(self.current_user)
             self.tab_widget.removeTab(2)
             self.tab_widget.insertTab(2, self.alerts_data_viewer, "Datos de Alertas")
             self.tab_widget.setCurrentIndex(2)
             # NUEVO: Cargar datos solo cuando se muestra por primera vez
             self.alerts_data_viewer.ensure_data_loaded()
-            # Conectar señal de alerta guardada
-            if hasattr(self, 'alert_form'):
-                self.alert_form.alert_saved.connect(self.alerts_data_viewer.load_data)
         elif index == 2 and self.alerts_data_viewer is not None:
             # Visor ya existe, asegurar que los datos estén cargados
             self.alerts_data_viewer.ensure_data_loaded()
@@ -250,9 +316,7 @@ class MainWindow(QMainWindow):
         if self.dashboard is not None:
             self.dashboard.refresh_charts()
         
-        # Actualizar visor de datos solo si ya está cargado
-        if self.alerts_data_viewer is not None:
-            self.alerts_data_viewer.load_data()
+        # El visor de datos inserta la nueva fila al recibir la notificación de cambios del Excel
         
         # Mostrar notificación para alertas rojas
         if alert_data['TipoAlerta'] == 'Roja':
@@ -293,6 +357,9 @@ class MainWindow(QMainWindow):
         dialog = _get_settings_dialog()(self)
         dialog.exec()
         
+        # Aplicar cambios de auto_sync/sync_interval
+        self.setup_sync_scheduler()
+        
     def show_user_management(self):
         """Muestra el diálogo de gestión de usuarios (solo para administradores)"""
         # Verificar que hay un usuario actual y que es administrador
@@ -363,15 +430,30 @@ class MainWindow(QMainWindow):
         
     def closeEvent(self, event):
         """Maneja el cierre de la aplicación"""
-        reply = QMessageBox.question(
-            self, 
-            "Confirmar Salida", 
-            "¿Está seguro de que desea salir?",
-            QMessageBox.Yes | QMessageBox.No,
-            QMessageBox.No
-        )
+        if self.close_after_sync_stops:
+            reply = QMessageBox.Yes  # Ya confirmado; terminó la sincronización en curso
+        else:
+            reply = QMessageBox.question(
+                self, 
+                "Confirmar Salida", 
+                "¿Está seguro de que desea salir?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
         
         if reply == QMessageBox.Yes:
+            self.stop_sync_scheduler()
+            if self.stopping_sync_schedulers:
+                # Un ciclo puede estar escribiendo el Excel: se cierra cuando termine
+                self.close_after_sync_stops = True
+                self.setEnabled(False)
+                self.sync_status_label.setText("⏳ Finalizando la sincronización en curso...")
+                event.ignore()
+                return
+            if self.alerts_data_viewer is not None:
+                self.alerts_data_viewer.stop_background_work()
+            if self.dashboard is not None:
+                self.dashboard.stop_background_work()
             event.accept()
         else:
             event.ignore()
@@ -0,0 +1,67 @@
+"""
+Caché de renders del dashboard
+Guarda, por combinación de versión de datos, filtros y tamaño de los gráficos, los
+agregados (KPIs) y la imagen ya dibujada de cada gráfico; volver a una combinación
+ya vista solo copia las imágenes al canvas
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Memoria máxima de imágenes guardadas (cada gráfico de 900x600 ocupa ~2 MB)
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class RenderCache:
+    """Caché LRU de (agregados, imágenes por gráfico) con límite de memoria, segura entre threads
+    
+    Las claves incluyen la versión de los datos, por lo que un cambio en el Excel
+    deja de coincidir con lo guardado; invalidate() además libera la memoria.
+    """
+    
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        
+    @staticmethod
+    def make_key(data_version: tuple, filters: Dict, sizes: tuple) -> tuple:
+        """Clave: versión de los datos + filtros + tamaño en píxeles de cada gráfico"""
+        return data_version, tuple(sorted(filters.items())), sizes
+        
+    def get(self, key: tuple) -> Optional[Tuple[Dict, Dict]]:
+        """(agregados, imágenes por gráfico) guardados para la clave, o None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            aggregates, images, _ = entry
+            return aggregates, images
+            
+    def put(self, key: tuple, aggregates: Dict, images: Dict):
+        """Guarda un render, descartando los menos usados si se supera la memoria máxima"""
+        nbytes = sum(memoryview(image).nbytes for image in images.values())
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[2]
+            self._entries[key] = (aggregates, images, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, _, dropped) = self._entries.popitem(last=False)
+                self.nbytes -= dropped
+                
+    def invalidate(self, *args):
+        """Descarta todos los renders (también sirve como listener de cambios del Excel)"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -169,6 +169,13 @@ class DatabaseSettingsWidget(QWidget):
         sql_group = QGroupBox("SQL Server")
         sql_layout = QFormLayout(sql_group)
         
+        # Motor de base de datos (SQLite permite trabajar sin SQL Server)
+        self.sql_dialect_combo = QComboBox()
+        self.sql_dialect_combo.addItem("SQL Server", "mssql")
+        self.sql_dialect_combo.addItem("SQLite (archivo local)", "sqlite")
+        self.sql_dialect_combo.currentIndexChanged.connect(self.on_dialect_changed)
+        sql_layout.addRow("Motor:", self.sql_dialect_combo)
+        
         self.sql_server_edit = QLineEdit()
         self.sql_server_edit.setPlaceholderText("localhost\\SQLEXPRESS")
         sql_layout.addRow("Servidor:", self.sql_server_edit)
@@ -201,6 +208,13 @@ class DatabaseSettingsWidget(QWidget):
         
         sql_layout.addRow("", auth_group)
         
+        self.dashboard_from_sql_check = QCheckBox("Calcular el Dashboard directamente en SQL")
+        self.dashboard_from_sql_check.setToolTip(
+            "Los filtros y agregados del Dashboard se resuelven con consultas GROUP BY "
+            "en la base de datos en lugar de cargar todo el Excel"
+        )
+        sql_layout.addRow("", self.dashboard_from_sql_check)
+        
         # Configuraciones de sincronización
         sync_group = QGroupBox("Sincronización")
         sync_layout = QFormLayout(sync_group)
@@ -214,11 +228,26 @@ class DatabaseSettingsWidget(QWidget):
         self.sync_interval_spin.setSuffix(" minutos")
         sync_layout.addRow("Intervalo de sincronización:", self.sync_interval_spin)
         
+        # Qué hacer si una alerta cambió en Excel y en SQL desde la última sincronización
+        self.sync_conflict_combo = QComboBox()
+        self.sync_conflict_combo.addItem("El último cambio gana", "last_writer_wins")
+        self.sync_conflict_combo.addItem("Manual (no sobrescribir)", "manual")
+        sync_layout.addRow("Conflictos:", self.sync_conflict_combo)
+        
         layout.addWidget(sql_group)
         layout.addWidget(sync_group)
         
         layout.addStretch()
         
+    def on_dialect_changed(self, index):
+        """Maneja el cambio de motor de base de datos"""
+        is_sqlite = self.sql_dialect_combo.itemData(index) == "sqlite"
+        self.sql_server_edit.setEnabled(not is_sqlite)
+        self.auth_type_combo.setEnabled(not is_sqlite)
+        self.sql_database_edit.setPlaceholderText(
+            "data/alertas_geotecnicas.db" if is_sqlite else "AlertasGeotecnicas"
+        )
+        
     def on_auth_type_changed(self, auth_type):
         """Maneja el cambio de tipo de autenticación"""
         is_sql_auth = auth_type == "SQL Server Authentication"
@@ -345,6 +374,7 @@ class SettingsDialog(QDialog):
                 "notification_email": ""
             },
             "database": {
+                "sql_dialect": "mssql",
                 "sql_server": "",
                 "sql_database": "",
                 "sql_table": "alertas_geotecnicas",
@@ -352,7 +382,9 @@ class SettingsDialog(QDialog):
                 "sql_username": "",
                 "sql_password": "",
                 "auto_sync": False,
-                "sync_interval": 15
+                "sync_interval": 15,
+                "sync_conflict_policy": "last_writer_wins",
+                "dashboard_from_sql": False
             }
         }
         
@@ -402,6 +434,10 @@ class SettingsDialog(QDialog):
         
         # Base de datos
         database = settings.get("database", {})
+        dialect_index = self.database_widget.sql_dialect_combo.findData(database.get("sql_dialect", "mssql"))
+        if dialect_index >= 0:
+            self.database_widget.sql_dialect_combo.setCurrentIndex(dialect_index)
+            
         self.database_widget.sql_server_edit.setText(database.get("sql_server", ""))
         self.database_widget.sql_database_edit.setText(database.get("sql_database", ""))
         self.database_widget.sql_table_edit.setText(database.get("sql_table", "alertas_geotecnicas"))
@@ -415,6 +451,13 @@ class SettingsDialog(QDialog):
         self.database_widget.auto_sync_check.setChecked(database.get("auto_sync", False))
         self.database_widget.sync_interval_spin.setValue(database.get("sync_interval", 15))
         
+        conflict_index = self.database_widget.sync_conflict_combo.findData(
+            database.get("sync_conflict_policy", "last_writer_wins"))
+        if conflict_index >= 0:
+            self.database_widget.sync_conflict_combo.setCurrentIndex(conflict_index)
+            
+        self.database_widget.dashboard_from_sql_check.setChecked(database.get("dashboard_from_sql", False))
+        
     def get_settings_from_ui(self) -> dict:
         """Obtiene la configuración de la interfaz"""
         return {
@@ -436,6 +479,7 @@ class SettingsDialog(QDialog):
                 "notification_email": self.alert_widget.notification_email_edit.text()
             },
             "database": {
+                "sql_dialect": self.database_widget.sql_dialect_combo.currentData(),
                 "sql_server": self.database_widget.sql_server_edit.text(),
                 "sql_database": self.database_widget.sql_database_edit.text(),
                 "sql_table": self.database_widget.sql_table_edit.text(),
@@ -443,7 +487,9 @@ class SettingsDialog(QDialog):
                 "sql_username": self.database_widget.sql_username_edit.text(),
                 "sql_password": self.database_widget.sql_password_edit.text(),
                 "auto_sync": self.database_widget.auto_sync_check.isChecked(),
-                "sync_interval": self.database_widget.sync_interval_spin.value()
+                "sync_interval": self.database_widget.sync_interval_spin.value(),
+                "sync_conflict_policy": self.database_widget.sync_conflict_combo.currentData(),
+                "dashboard_from_sql": self.database_widget.dashboard_from_sql_check.isChecked()
             }
         }
         
@@ -480,17 +526,12 @@ class SettingsDialog(QDialog):
         
         # Probar configuración de base de datos si está configurada
         db_config = settings["database"]
-        if db_config["sql_server"] and db_config["sql_database"]:
+        is_sqlite = db_config["sql_dialect"] == "sqlite"
+        if db_config["sql_database"] and (is_sqlite or db_config["sql_server"]):
             try:
                 from src.data.sql_manager import SQLManager
                 
-                sql_manager = SQLManager(
-                    server=db_config["sql_server"],
-                    database=db_config["sql_database"],
-                    username=db_config["sql_username"] if db_config["auth_type"] == "SQL Server Authentication" else None,
-                    password=db_config["sql_password"] if db_config["auth_type"] == "SQL Server Authentication" else None,
-                    table=db_config["sql_table"]
-                )
+                sql_manager = SQLManager.from_settings(db_config)
                 
                 success, message = sql_manager.test_connection()
                 
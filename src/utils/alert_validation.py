@@ -0,0 +1,96 @@
+"""
+Reglas de validación de los campos de una alerta
+Las comparten el formulario de registro y la edición en el visor de datos
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.data.excel_manager import VALID_ALERT_TYPES, VALID_CONDITIONS, parse_fecha_hora
+
+# Valores permitidos en las columnas de selección (los datos importados usan "Si")
+YES_NO_VALUES = ['No', 'Sí', 'Si']
+CHOICE_COLUMNS = {
+    'TipoAlerta': VALID_ALERT_TYPES,
+    'Condicion': VALID_CONDITIONS,
+    'Colapso': YES_NO_VALUES,
+    'Evacuacion': YES_NO_VALUES,
+}
+# Margen aceptado para fechas futuras
+MAX_FUTURE_DAYS = 1
+
+
+def _is_empty(value) -> bool:
+    """Indica si un valor del formulario o del Excel está vacío"""
+    if value is None:
+        return True
+    if isinstance(value, datetime):
+        return False
+    return pd.isna(value) or not str(value).strip()
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    """Fecha de un valor del formulario o del Excel (None si está vacío o no es válida)"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if _is_empty(value):
+        return None
+    parsed = parse_fecha_hora(pd.Series([str(value).strip()])).iloc[0]
+    return None if pd.isna(parsed) else parsed.to_pydatetime()
+
+
+def normalize_velocity(value) -> str:
+    """Velocidad como texto con punto decimal ("20,3" -> "20.3")"""
+    return str(value).strip().replace(',', '.')
+
+
+def validate_alert_fields(fields: Dict) -> Tuple[bool, str]:
+    """Valida los campos de una alerta; devuelve (válido, mensaje de error)
+    
+    Solo se validan los campos presentes en fields.
+    """
+    # Observaciones y ubicación (obligatorias)
+    if 'Observaciones' in fields and not str(fields['Observaciones'] or '').strip():
+        return False, "Las observaciones son obligatorias"
+    if 'Ubicacion' in fields and not str(fields['Ubicacion'] or '').strip():
+        return False, "La ubicación es obligatoria"
+        
+    # Velocidad (obligatoria y numérica, no negativa)
+    if 'VelocidadMmDia' in fields:
+        velocity_text = '' if fields['VelocidadMmDia'] is None else str(fields['VelocidadMmDia']).strip()
+        if not velocity_text or velocity_text.lower() == 'nan':
+            return False, "La velocidad (mm/día) es obligatoria"
+        try:
+            if float(normalize_velocity(velocity_text)) < 0:  # Permitir coma como decimal
+                return False, "La velocidad no puede ser negativa"
+        except ValueError:
+            return False, "La velocidad debe ser un número válido (ej: 15.5, 20,3)"
+            
+    # Valores de selección
+    for column, allowed in CHOICE_COLUMNS.items():
+        if column in fields and fields[column] not in allowed:
+            return False, f"{column} debe ser uno de: {', '.join(allowed)}"
+            
+    # Fecha (no puede ser futura más allá del límite razonable)
+    fecha = _parse_datetime(fields.get('FechaHora'))
+    if 'FechaHora' in fields:
+        if fecha is None:
+            return False, "La fecha de la alerta no es válida"
+        if fecha > datetime.now() + timedelta(days=MAX_FUTURE_DAYS):
+            return False, "La fecha no puede estar más de 1 día en el futuro"
+            
+    # Fecha de colapso: si se indica debe ser válida
+    collapse = _parse_datetime(fields.get('FechaHoraColapso'))
+    if 'FechaHoraColapso' in fields and collapse is None and not _is_empty(fields['FechaHoraColapso']):
+        return False, "La fecha de colapso no es válida"
+        
+    # Si hubo colapso, no puede ser anterior a la alerta (sin fecha de la alerta no se puede verificar)
+    if fields.get('Colapso') in ('Sí', 'Si') and collapse is not None:
+        if fecha is None:
+            return False, "La fecha de la alerta no es válida; no se puede verificar la fecha de colapso"
+        if collapse < fecha:
+            return False, "La fecha de colapso no puede ser anterior a la fecha de la alerta"
+            
+    return True, ""
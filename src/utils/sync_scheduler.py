@@ -0,0 +1,137 @@
+"""
+Sincronización automática Excel <-> SQL en segundo plano
+Respeta database.auto_sync y database.sync_interval de config/settings.json
+"""
+
+import random
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PySide6.QtCore import QThread, Signal
+
+from src.data.excel_manager import ExcelManager
+from src.data.sql_manager import SQLManager, DIALECT_MSSQL, DIALECT_SQLITE
+
+
+# Espera antes del primer ciclo para no competir con el arranque de la aplicación
+INITIAL_DELAY_SECONDS = 30
+# Variación aleatoria del intervalo (±10%) para que varios equipos no sincronicen a la vez
+JITTER_FRACTION = 0.1
+# Tope de espera entre reintentos tras fallos consecutivos
+MAX_BACKOFF_SECONDS = 60 * 60
+
+NO_CHANGES_MESSAGE = "Sin cambios desde la última sincronización"
+
+
+def is_sync_configured(database_settings: dict) -> bool:
+    """Indica si la sección 'database' tiene datos suficientes para conectarse"""
+    if database_settings.get("sql_dialect", DIALECT_MSSQL) == DIALECT_SQLITE:
+        return bool(database_settings.get("sql_database"))
+    return bool(database_settings.get("sql_server") and database_settings.get("sql_database"))
+
+
+def file_change_token(path: Path) -> Optional[Tuple[int, int]]:
+    """Token de cambios de un archivo local: (mtime en ns, tamaño)"""
+    try:
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+class SyncSchedulerThread(QThread):
+    """Thread que ejecuta sync_bidirectional cada sync_interval minutos
+    
+    Un ciclo se omite si ni el Excel ni la tabla SQL cambiaron desde la última
+    sincronización exitosa. Tras un fallo el intervalo se duplica hasta MAX_BACKOFF_SECONDS.
+    """
+    
+    status_changed = Signal(str)
+    sync_completed = Signal(bool, str)
+    data_changed = Signal()  # El ciclo modificó el Excel local
+    
+    def __init__(self, database_settings: dict, parent=None):
+        super().__init__(parent)
+        self.database_settings = dict(database_settings)
+        self.interval_seconds = max(1, int(database_settings.get("sync_interval", 15))) * 60
+        self.consecutive_failures = 0
+        self._stop_event = threading.Event()
+        self._last_tokens = None
+        
+        self.excel_manager = None
+        self.sql_manager = None
+        
+    def stop(self):
+        """Solicita la detención; interrumpe la espera en curso"""
+        self._stop_event.set()
+        
+    def next_delay(self) -> float:
+        """Segundos hasta el próximo ciclo, con backoff exponencial y jitter"""
+        delay = self.interval_seconds * (2 ** self.consecutive_failures)
+        delay = min(delay, max(self.interval_seconds, MAX_BACKOFF_SECONDS))
+        return delay * (1 + random.uniform(-JITTER_FRACTION, JITTER_FRACTION))
+        
+    def _ensure_managers(self):
+        """Crea los gestores dentro del thread (la carga inicial del Excel no bloquea la GUI)"""
+        if self.sql_manager is None:
+            self.excel_manager = ExcelManager()
+            self.sql_manager = SQLManager.from_settings(self.database_settings, self.excel_manager)
+            
+    def _current_tokens(self) -> tuple:
+        """Tokens de cambios local (Excel) y remoto (SQL)"""
+        return (file_change_token(self.excel_manager.excel_file),
+                self.sql_manager.get_change_token())
+                
+    def run_cycle(self) -> Tuple[bool, str]:
+        """Ejecuta un ciclo de sincronización si hubo cambios"""
+        self._ensure_managers()
+        
+        tokens = self._current_tokens()
+        if None not in tokens and tokens == self._last_tokens:
+            return True, NO_CHANGES_MESSAGE
+            
+        success, message = self.sql_manager.sync_bidirectional()
+        
+        if success:
+            new_tokens = self._current_tokens()
+            if new_tokens[0] != tokens[0]:
+                self.data_changed.emit()
+            self._last_tokens = new_tokens
+            
+        return success, message
+        
+    def run(self):
+        """Bucle del scheduler; termina al llamar stop()"""
+        delay = INITIAL_DELAY_SECONDS
+        
+        while not self._stop_event.wait(delay):
+            self.status_changed.emit("🔄 Sincronizando...")
+            
+            try:
+                success, message = self.run_cycle()
+            except Exception as e:
+                success, message = False, f"Error en sincronización: {str(e)}"
+                
+            timestamp = datetime.now().strftime("%H:%M")
+            
+            if success:
+                self.consecutive_failures = 0
+                if message == NO_CHANGES_MESSAGE:
+                    self.status_changed.emit(f"⏸️ SQL sin cambios ({timestamp})")
+                else:
+                    print(f"✅ Sincronización automática: {message}")
+                    self.status_changed.emit(f"✅ SQL sincronizado ({timestamp})")
+            else:
+                self.consecutive_failures += 1
+                print(f"❌ Sincronización automática fallida: {message}")
+                
+            delay = self.next_delay()
+            
+            if not success:
+                self.status_changed.emit(
+                    f"⚠️ Error de sincronización ({timestamp}), reintento en {delay / 60:.0f} min"
+                )
+                
+            self.sync_completed.emit(success, message)
@@ -0,0 +1,41 @@
+"""
+Normalización de texto para la búsqueda en las alertas
+Minúsculas y sin tildes, para que "GRIETA" y "grieta" o "Sección" y "seccion" coincidan
+"""
+
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Columnas de texto libre donde se busca
+SEARCH_COLUMNS = ['Observaciones', 'CronologiaAnalisis', 'Ubicacion']
+
+# Marcas diacríticas que quedan separadas tras la normalización NFKD
+COMBINING_MARKS = r'[\u0300-\u036f]'
+
+
+def fold_text(text: str) -> str:
+    """Minúsculas y sin tildes ("Grieta en Sector Norte" -> "grieta en sector norte")"""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def fold_series(values: pd.Series) -> pd.Series:
+    """fold_text vectorizado; los valores vacíos quedan como ''"""
+    text = values.astype(object).where(values.notna(), '').astype(str)
+    return (text.str.normalize('NFKD')
+            .str.replace(COMBINING_MARKS, '', regex=True)
+            .str.lower())
+
+
+def build_search_text(df: pd.DataFrame, columns=SEARCH_COLUMNS) -> np.ndarray:
+    """Texto normalizado de cada fila (columnas de búsqueda separadas por un salto de línea)"""
+    available = [col for col in columns if col in df.columns]
+    if df.empty or not available:
+        return np.full(len(df), '', dtype=object)
+        
+    folded = fold_series(df[available[0]])
+    for col in available[1:]:
+        folded = folded + '\n' + fold_series(df[col])
+    return folded.to_numpy(dtype=object)